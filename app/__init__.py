@@ -19,13 +19,18 @@ from .api.v1.typeapproval import typeapproval_api
 from .api.v1.spectrum import spectrum_api
 from .api.v1.telecom import telecom_api
 from .api.v1.postal import postal_api
+from .api.v1.metrics import metrics_api
 from .models.baseModel import db
+from .utils.conditional import set_validators
+from .utils.cache import response_cache
 
 bcrypt = Bcrypt()
 
 # Create v1 blueprint for api
 api_v1 = Blueprint('api', __name__, url_prefix='/api/v1')
 
+api_v1.after_request(set_validators)
+
 api = Api(
     api_v1,
     version='1.0',
@@ -45,6 +50,7 @@ api.add_namespace(typeapproval_api)
 api.add_namespace(spectrum_api)
 api.add_namespace(telecom_api)
 api.add_namespace(postal_api)
+api.add_namespace(metrics_api)
 
 
 def create_app(config_name):
@@ -59,6 +65,7 @@ def create_app(config_name):
     app.register_blueprint(api_v1)
     db.init_app(app)
     bcrypt.init_app(app)
+    response_cache.init_app(app)
 
     return app
 
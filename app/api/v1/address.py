@@ -4,7 +4,11 @@ from flask_restplus import marshal
 from sqlalchemy import desc
 from app.models.address import Address
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
 
 
 address_api = Namespace(
@@ -31,40 +35,41 @@ address_fields = address_api.model(
     }
 )
 
+address_serializer = compile_serializer(address_fields)
+
 
 @address_api.route('', endpoint='address')
 class AddressesEndPoint(Resource):
 
+    @response_cache.cached(Address)
     @address_api.response(200, 'Successful Retrieval of addresses')
     @address_api.response(200, 'No addresses found')
     def get(self):
         ''' Retrieve addresses'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        address_data = Address.query.filter_by(active=True).\
-            order_by(desc(Address.date_created))
-        if address_data.all():
+        address_data = Address.query.order_by(desc(Address.date_created))
+        if address_data.first():
             addresses = address_data
 
             if search_term:
-                addresses = address_data.filter(
-                    Address.address_line_1.ilike('%'+search_term+'%')
-                )
+                addresses = Address.search(address_data, search_term)
 
-            address_paged = addresses.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(address_paged.items, address_fields))
+            if cursor is not None:
+                return cursor_page(
+                    addresses, Address, cursor, page_limit,
+                    'api.address', address_serializer), 200
+
+            address_paged = paginate(addresses, page, page_limit)
+            results = dict(data=address_serializer(address_paged.items))
 
             pages = {
                 'page': page, 'per_page': page_limit,
-                'total_data': address_paged.total, 'pages': address_paged.pages
+                'total_data': address_paged.total,
+                'pages': address_paged.pages,
+                'count_strategy': address_paged.count_strategy
             }
 
             if page == 1:
@@ -112,10 +117,23 @@ class AddressesEndPoint(Resource):
         except Exception as e:
             abort(400, message='Failed to create new address -> {}'.format(e))
 
+@address_api.route('/export', endpoint='address_export')
+class AddressesExportEndPoint(Resource):
+
+    @address_api.response(200, 'Streaming export of addresses')
+    @address_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active addresses as NDJSON or CSV '''
+        addresses = Address.query.order_by(Address.id)
+        return export_response(
+            addresses, address_fields, address_serializer, 'address')
+
+
 
 @address_api.route('/<int:address_id>', endpoint='single_address')
 class SingleAddressEndpoint(Resource):
 
+    @response_cache.cached(Address)
     @address_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(address_fields)
     @address_api.response(200, 'Successful retrieval of address')
@@ -123,8 +141,9 @@ class SingleAddressEndpoint(Resource):
     def get(self, address_id):
         ''' Retrieve individual address with given address_id '''
         address = Address.query.filter_by(
-            id=address_id, active=True).first()
+            id=address_id).first()
         if address:
+            conditional([address.id], address.date_modified)
             return address, 200
         abort(404, message='No address found with specified ID')
 
@@ -137,7 +156,7 @@ class SingleAddressEndpoint(Resource):
         arguments = request.get_json(force=True)
         address_line_1 = arguments.get('address1').strip()
         address = Address.query.filter_by(
-            id=address_id, active=True).first()
+            id=address_id).first()
         if address:
             if address_line_1:
                 address.address_line_1 = address_line_1
@@ -156,7 +175,7 @@ class SingleAddressEndpoint(Resource):
     def delete(self, address_id):
         ''' Delete address with address_id as given '''
         address = Address.query.filter_by(
-            id=address_id, active=True).first()
+            id=address_id).first()
         if address:
             if address.delete_address():
                 response = {
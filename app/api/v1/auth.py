@@ -2,6 +2,7 @@ from flask import request, g
 from flask_restplus import abort, Resource, Namespace, fields
 from app.models.user import User
 from app.utils.utilities import validate_email, auth
+from app.utils.hashing import HashingPoolBusy
 
 
 auth_api = Namespace(
@@ -27,6 +28,7 @@ class RegisterUser(Resource):
     @auth_api.response(201, 'User registration successfull.')
     @auth_api.response(409, 'User already Exists!. Login')
     @auth_api.response(400, 'Error while creating your account:')
+    @auth_api.response(503, 'Server busy, please retry shortly')
     @auth_api.response(400, 'Password doesn\'nt match confirmation')
     @auth_api.response(500, 'Server Error. Couldn\'t complete request')
     @auth_api.doc(model='User', body=user_fields)
@@ -47,8 +49,11 @@ class RegisterUser(Resource):
         if password != password_confirm:
             return abort(401, message='Password doesn\'t match confirmation')
 
-        user = User(email=email, first_name=first_name,
-                    last_name=last_name, password=password)
+        try:
+            user = User(email=email, first_name=first_name,
+                        last_name=last_name, password=password)
+        except HashingPoolBusy:
+            return abort(503, message='Server busy, please retry shortly')
 
         try:
             confirm = user.save_user()
@@ -69,6 +74,7 @@ class AuthenticateUser(Resource):
     @auth_api.response(202, 'Login Successful')
     @auth_api.response(400, 'Bad Request')
     @auth_api.response(401, 'Wrong password')
+    @auth_api.response(503, 'Server busy, please retry shortly')
     @auth_api.response(500, 'Internal Server Error')
     def post(self):
         ''' Method to handle POST request for User LOGIN '''
@@ -79,17 +85,22 @@ class AuthenticateUser(Resource):
             return abort(400, message='Please provide valid email credentials.')
         if not password:
             return abort(400, message='Password cannot be empty')
-        user = User.query.filter_by(email=email, active=True).first()
+        user = User.query.filter_by(email=email).first()
         try:
             if not user:
                 return {'message': 'Email not found'}, 400
             if user.verify_password(password):
+                if user.needs_rehash():
+                    user.password = password
+                    user.save()
                 token = user.generate_auth_token()
                 g.user, g.token = user, token.decode('utf-8')
                 if token:
                     result = {'token': g.token}
                     return result, 200
             return {'message': 'Wrong password'}, 401
+        except HashingPoolBusy:
+            return abort(503, message='Server busy, please retry shortly')
         except Exception as e:
             return abort(500, 'Error logging in user:{}'.format(e.message))
 
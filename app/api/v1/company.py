@@ -2,6 +2,7 @@ from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from app.models.baseModel import UnitOfWork
 from app.models.company import Company
 from app.models.address import Address
 from app.models.person import Person
@@ -9,7 +10,13 @@ from app.models.contact import Contact
 from app.models.contact_person import ContactPerson
 from app.models.user import User
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.archive import include_archived
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
 
 
 company_api = Namespace(
@@ -58,40 +65,47 @@ company_fields = company_api.model(
     }
 )
 
+company_loader = LoaderPlan(Company, company_fields)
+company_serializer = compile_serializer(company_fields)
+
 
 @company_api.route('', endpoint='company')
 class CompaniesEndPoint(Resource):
 
+    @response_cache.cached(company_loader)
     @company_api.response(200, 'Successful Retrieval of companies')
     @company_api.response(200, 'No companies found')
     def get(self):
         ''' Retrieve companies'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        match = request.args.get('match')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        company_data = Company.query.filter_by(active=True).\
+        company_data = include_archived(Company).options(
+            *company_loader.options).\
             order_by(desc(Company.date_created))
-        if company_data.all():
+        if company_data.first():
             companies = company_data
 
-            if search_term:
-                companies = company_data.filter(
-                    Company.name.ilike('%'+search_term+'%')
-                )
+            if search_term and match == 'fuzzy':
+                companies = Company.fuzzy_search(company_data, search_term)
+            elif search_term:
+                companies = Company.search(company_data, search_term)
 
-            company_paged = companies.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(company_paged.items, company_fields))
+            if cursor is not None:
+                return cursor_page(
+                    companies, Company, cursor, page_limit,
+                    'api.company', company_serializer), 200
+
+            company_paged = paginate(companies, page, page_limit)
+            results = dict(data=company_serializer(company_paged.items))
 
             pages = {
                 'page': page, 'per_page': page_limit,
-                'total_data': company_paged.total, 'pages': company_paged.pages
+                'total_data': company_paged.total,
+                'pages': company_paged.pages,
+                'count_strategy': company_paged.count_strategy
             }
 
             if page == 1:
@@ -135,74 +149,63 @@ class CompaniesEndPoint(Resource):
         if not name:
             return abort(400, 'Name cannot be empty!')
         try:
-            address = Address(
-                district=district,
-                postal_code=postal,
-                country=country,
-                address_line_1=address_line_1,
-                address_line_2=address_line_2
-                )
-            tech_person = Person(tech_person_name[0], tech_person_name[-1])
-            legal_person = Person(legal_person_name[0], legal_person_name[-1])
-            tech_contact = Contact(email=tech_person_email)
-            legal_contact = Contact(email=legal_person_email)
-
-            if not address.save_address():
-                address = Address.query.filter_by(
-                    address_line_1=address.address_line_1,
-                    active=True).first()
-            if not tech_person.save_person():
-                tech_person = Person.query.filter_by(
-                    full_name=tech_person_name_string).first()
-            if not legal_person.save_person():
-                legal_person = Person.query.filter_by(
-                    full_name=legal_person_name_str).first()
-            if not tech_contact.save_contact():
-                tech_contact = Contact.query.filter_by(
-                    email=tech_person_email).first()
-            if not legal_contact.save_contact():
-                legal_contact = Contact.query.filter_by(
-                    email=legal_person_email).first()
-            tech_contact_person = ContactPerson(
-                person=tech_person,
-                contact=tech_contact)
-            legal_contact_person = ContactPerson(
-                person=legal_person,
-                contact=legal_contact)
-            if not tech_contact_person.save_contact_person():
-                tech_contact_person = ContactPerson.query.filter_by(
-                    person=tech_person,
-                    contact=tech_contact).first()
-            if not legal_contact_person.save_contact_person():
-                legal_contact_person = ContactPerson.query.filter_by(
-                    person=legal_person,
-                    contact=legal_contact).first()
-
-            company = Company(
-                name=name,
-                address=address,
-                legal_person=legal_contact_person,
-                tech_person=tech_contact_person
-                )
-            if company.save_company():
-                return {'message': 'Company created successfully!'}, 201
-            return abort(409, message='Company already exists!')
+            with UnitOfWork() as unit:
+                address, tech_person, legal_person, tech_contact, \
+                    legal_contact = unit.resolve(
+                        Address(
+                            district=district,
+                            postal_code=postal,
+                            country=country,
+                            address_line_1=address_line_1,
+                            address_line_2=address_line_2),
+                        Person(tech_person_name[0], tech_person_name[-1]),
+                        Person(legal_person_name[0], legal_person_name[-1]),
+                        Contact(email=tech_person_email),
+                        Contact(email=legal_person_email))
+                tech_contact_person, legal_contact_person = unit.resolve(
+                    ContactPerson(person=tech_person, contact=tech_contact),
+                    ContactPerson(person=legal_person, contact=legal_contact))
+
+                created = unit.create(Company(
+                    name=name,
+                    address=address,
+                    legal_person=legal_contact_person,
+                    tech_person=tech_contact_person
+                    ))
         except Exception as e:
             abort(400, message='Failed to create new company -> {}'.format(e))
+        if created:
+            return {'message': 'Company created successfully!'}, 201
+        return abort(409, message='Company already exists!')
+
+@company_api.route('/export', endpoint='company_export')
+class CompaniesExportEndPoint(Resource):
+
+    @company_api.response(200, 'Streaming export of companies')
+    @company_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active companies as NDJSON or CSV '''
+        companies = Company.query.options(*company_loader.options).\
+            order_by(Company.id)
+        return export_response(
+            companies, company_fields, company_serializer, 'company')
+
 
 
 @company_api.route('/<int:company_id>', endpoint='single_company')
 class SingleCompanyEndpoint(Resource):
 
+    @response_cache.cached(company_loader)
     @company_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(company_fields)
     @company_api.response(200, 'Successful retrieval of company')
     @company_api.response(400, 'No company found with specified ID')
     def get(self, company_id):
         ''' Retrieve individual company with given company_id '''
-        company = Company.query.filter_by(
-            id=company_id, active=True).first()
+        company = include_archived(Company).options(
+            *company_loader.options).filter_by(id=company_id).first()
         if company:
+            conditional([company.id], company.date_modified)
             return company, 200
         abort(404, message='No company found with specified ID')
 
@@ -215,7 +218,7 @@ class SingleCompanyEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         company = Company.query.filter_by(
-            id=company_id, active=True).first()
+            id=company_id).first()
         if company:
             if name:
                 company.name = name
@@ -233,7 +236,7 @@ class SingleCompanyEndpoint(Resource):
     def delete(self, company_id):
         ''' Delete company with company_id as given '''
         company = Company.query.filter_by(
-            id=company_id, active=True).first()
+            id=company_id).first()
         if company:
             if company.delete_company():
                 response = {
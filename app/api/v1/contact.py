@@ -4,7 +4,11 @@ from flask_restplus import marshal
 from sqlalchemy import desc
 from app.models.contact import Contact
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
 
 
 contact_api = Namespace(
@@ -33,40 +37,41 @@ contact_fields = contact_api.model(
     }
 )
 
+contact_serializer = compile_serializer(contact_fields)
+
 
 @contact_api.route('', endpoint='contact')
 class ContactsEndPoint(Resource):
 
+    @response_cache.cached(Contact)
     @contact_api.response(200, 'Successful Retrieval of contacts')
     @contact_api.response(200, 'No contacts found')
     def get(self):
         ''' Retrieve contacts'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        contact_data = Contact.query.filter_by(active=True).\
-            order_by(desc(Contact.date_created))
-        if contact_data.all():
+        contact_data = Contact.query.order_by(desc(Contact.date_created))
+        if contact_data.first():
             contacts = contact_data
 
             if search_term:
-                contacts = contact_data.filter(
-                    Contact.email.ilike('%'+search_term+'%')
-                )
+                contacts = Contact.search(contact_data, search_term)
 
-            contact_paged = contacts.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(contact_paged.items, contact_fields))
+            if cursor is not None:
+                return cursor_page(
+                    contacts, Contact, cursor, page_limit,
+                    'api.contact', contact_serializer), 200
+
+            contact_paged = paginate(contacts, page, page_limit)
+            results = dict(data=contact_serializer(contact_paged.items))
 
             pages = {
                 'page': page, 'per_page': page_limit,
-                'total_data': contact_paged.total, 'pages': contact_paged.pages
+                'total_data': contact_paged.total,
+                'pages': contact_paged.pages,
+                'count_strategy': contact_paged.count_strategy
             }
 
             if page == 1:
@@ -114,10 +119,23 @@ class ContactsEndPoint(Resource):
         except Exception as e:
             abort(400, message='Failed to create new contact -> {}'.format(e))
 
+@contact_api.route('/export', endpoint='contact_export')
+class ContactsExportEndPoint(Resource):
+
+    @contact_api.response(200, 'Streaming export of contacts')
+    @contact_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active contacts as NDJSON or CSV '''
+        contacts = Contact.query.order_by(Contact.id)
+        return export_response(
+            contacts, contact_fields, contact_serializer, 'contact')
+
+
 
 @contact_api.route('/<int:contact_id>', endpoint='single_contact')
 class SingleContactEndpoint(Resource):
 
+    @response_cache.cached(Contact)
     @contact_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(contact_fields)
     @contact_api.response(200, 'Successful retrieval of contact')
@@ -125,8 +143,9 @@ class SingleContactEndpoint(Resource):
     def get(self, contact_id):
         ''' Retrieve individual contact with given contact_id '''
         contact = Contact.query.filter_by(
-            id=contact_id, active=True).first()
+            id=contact_id).first()
         if contact:
+            conditional([contact.id], contact.date_modified)
             return contact, 200
         abort(404, message='No contact found with specified ID')
 
@@ -139,7 +158,7 @@ class SingleContactEndpoint(Resource):
         arguments = request.get_json(force=True)
         contact_line_1 = arguments.get('contact1').strip()
         contact = Contact.query.filter_by(
-            id=contact_id, active=True).first()
+            id=contact_id).first()
         if contact:
             if contact_line_1:
                 contact.contact_line_1 = contact_line_1
@@ -158,7 +177,7 @@ class SingleContactEndpoint(Resource):
     def delete(self, contact_id):
         ''' Delete contact with contact_id as given '''
         contact = Contact.query.filter_by(
-            id=contact_id, active=True).first()
+            id=contact_id).first()
         if contact:
             if contact.delete_contact():
                 response = {
@@ -4,7 +4,11 @@ from flask_restplus import marshal
 from sqlalchemy import desc
 from app.models.department import Department
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
 
 
 department_api = Namespace(
@@ -30,43 +34,44 @@ department_fields = department_api.model(
     }
 )
 
+department_serializer = compile_serializer(department_fields)
+
 
 @department_api.route('', endpoint='department')
 class DepartmentsEndPoint(Resource):
 
+    @response_cache.cached(Department)
     @department_api.response(200, 'Successful Retrieval of departments')
     @department_api.response(200, 'No departments found')
     def get(self):
         ''' Retrieve departments'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        department_data = Department.query.filter_by(active=True).\
+        department_data = Department.query.\
             order_by(desc(Department.date_created))
-        if department_data.all():
+        if department_data.first():
             departments = department_data
 
             if search_term:
-                departments = department_data.filter(
-                    Department.department_line_1.ilike('%'+search_term+'%')
-                )
+                departments = Department.search(department_data, search_term)
 
-            department_paged = departments.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
+            if cursor is not None:
+                return cursor_page(
+                    departments, Department, cursor, page_limit,
+                    'api.department', department_serializer), 200
+
+            department_paged = paginate(departments, page, page_limit)
             results = dict(
-                data=marshal(department_paged.items, department_fields)
+                data=department_serializer(department_paged.items)
             )
 
             pages = {
                 'page': page, 'per_page': page_limit,
                 'total_data': department_paged.total,
-                'pages': department_paged.pages
+                'pages': department_paged.pages,
+                'count_strategy': department_paged.count_strategy
             }
 
             if page == 1:
@@ -116,10 +121,24 @@ class DepartmentsEndPoint(Resource):
                 message='Failed to create new department -> {}'.format(e)
             )
 
+@department_api.route('/export', endpoint='department_export')
+class DepartmentsExportEndPoint(Resource):
+
+    @department_api.response(200, 'Streaming export of departments')
+    @department_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active departments as NDJSON or CSV '''
+        departments = Department.query.order_by(Department.id)
+        return export_response(
+            departments, department_fields, department_serializer,
+            'department')
+
+
 
 @department_api.route('/<int:department_id>', endpoint='single_department')
 class SingleDepartmentEndpoint(Resource):
 
+    @response_cache.cached(Department)
     @department_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(department_fields)
     @department_api.response(200, 'Successful retrieval of department')
@@ -127,8 +146,9 @@ class SingleDepartmentEndpoint(Resource):
     def get(self, department_id):
         ''' Retrieve individual department with given department_id '''
         department = Department.query.filter_by(
-            id=department_id, active=True).first()
+            id=department_id).first()
         if department:
+            conditional([department.id], department.date_modified)
             return department, 200
         abort(404, message='No department found with specified ID')
 
@@ -141,7 +161,7 @@ class SingleDepartmentEndpoint(Resource):
         arguments = request.get_json(force=True)
         permissions = arguments.get('permissions').strip()
         department = Department.query.filter_by(
-            id=department_id, active=True).first()
+            id=department_id).first()
         if department:
             if permissions:
                 department.permissions = permissions
@@ -160,7 +180,7 @@ class SingleDepartmentEndpoint(Resource):
     def delete(self, department_id):
         ''' Delete department with department_id as given '''
         department = Department.query.filter_by(
-            id=department_id, active=True).first()
+            id=department_id).first()
         if department:
             if department.delete_department():
                 response = {
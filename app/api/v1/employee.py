@@ -3,6 +3,7 @@ from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from app.models.baseModel import UnitOfWork
 from app.models.employee import Employee
 from app.models.address import Address
 from app.models.person import Person
@@ -11,7 +12,12 @@ from app.models.contact_person import ContactPerson
 from app.models.department import Department
 from app.models.user import User
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
 
 
 employee_api = Namespace(
@@ -38,42 +44,52 @@ employee_fields = employee_api.model(
     }
 )
 
+employee_loader = LoaderPlan(Employee, employee_fields)
+employee_serializer = compile_serializer(employee_fields)
+
 
 @employee_api.route('', endpoint='employee')
 class EmployeesEndPoint(Resource):
 
+    @response_cache.cached(employee_loader)
     @employee_api.response(200, 'Successful Retrieval of employees')
     @employee_api.response(200, 'No employees found')
     def get(self):
         ''' Retrieve employees'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        match = request.args.get('match')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        employee_data = Employee.query.filter_by(active=True).\
+        employee_data = Employee.query.options(*employee_loader.options).\
             order_by(desc(Employee.date_created))
-        if employee_data.all():
+        if employee_data.first():
             employees = employee_data
 
-            if search_term:
-                employees = employee_data.filter(
-                    Employee.name.ilike('%'+search_term+'%')
-                )
+            if search_term and match == 'fuzzy':
+                employees = Person.fuzzy_search(
+                    employee_data.join(Employee.contact_person).
+                    join(ContactPerson.person).join(ContactPerson.contact),
+                    search_term, Contact)
+            elif search_term:
+                employees = Person.search(
+                    employee_data.join(Employee.contact_person).
+                    join(ContactPerson.person), search_term)
 
-            employee_paged = employees.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(employee_paged.items, employee_fields))
+            if cursor is not None:
+                return cursor_page(
+                    employees, Employee, cursor, page_limit,
+                    'api.employee', employee_serializer), 200
+
+            employee_paged = paginate(employees, page, page_limit)
+            results = dict(data=employee_serializer(employee_paged.items))
 
             pages = {
                 'page': page,
                 'per_page': page_limit,
                 'total_data': employee_paged.total,
-                'pages': employee_paged.pages
+                'pages': employee_paged.pages,
+                'count_strategy': employee_paged.count_strategy
             }
 
             if page == 1:
@@ -110,47 +126,53 @@ class EmployeesEndPoint(Resource):
         if not last_name:
             return abort(400, 'Name cannot be empty!')
         try:
-            person = Person(first_name, last_name)
-            contact = Contact(email=email, tel_one=tel_one, tel_two=tel_two)
-            department = Department.query.filter_by(id=int(department)).first()
-
-            if not person.save_person():
-                person = Person.query.filter_by(
-                    full_name=(first_name+' '+last_name)).first()
-            if not contact.save_contact():
-                contact = Contact.query.filter_by(
-                    email=email).first()
-            contact_person = ContactPerson(
-                person=person,
-                contact=contact)
-            if not contact_person.save_contact_person():
-                contact_person = ContactPerson.query.filter_by(
-                    person=person,
-                    contact=contact).first()
-
-            employee = Employee(
-                contact_person=contact_person,
-                department=department
-                )
-            if employee.save_employee():
-                return {'message': 'Employee created successfully!'}, 201
-            return abort(409, message='Employee already exists!')
+            with UnitOfWork() as unit:
+                person, contact = unit.resolve(
+                    Person(first_name, last_name),
+                    Contact(email=email, tel_one=tel_one, tel_two=tel_two))
+                contact_person, = unit.resolve(
+                    ContactPerson(person=person, contact=contact))
+                department = Department.query.filter_by(
+                    id=int(department)).first()
+
+                created = unit.create(Employee(
+                    contact_person=contact_person,
+                    department=department
+                    ))
         except Exception as e:
             abort(400, message='Failed to create new employee -> {}'.format(e))
+        if created:
+            return {'message': 'Employee created successfully!'}, 201
+        return abort(409, message='Employee already exists!')
+
+@employee_api.route('/export', endpoint='employee_export')
+class EmployeesExportEndPoint(Resource):
+
+    @employee_api.response(200, 'Streaming export of employees')
+    @employee_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active employees as NDJSON or CSV '''
+        employees = Employee.query.options(*employee_loader.options).\
+            order_by(Employee.id)
+        return export_response(
+            employees, employee_fields, employee_serializer, 'employee')
+
 
 
 @employee_api.route('/<int:employee_id>', endpoint='single_employee')
 class SingleEmployeeEndpoint(Resource):
 
+    @response_cache.cached(employee_loader)
     @employee_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(employee_fields)
     @employee_api.response(200, 'Successful retrieval of employee')
     @employee_api.response(400, 'No employee found with specified ID')
     def get(self, employee_id):
         ''' Retrieve individual employee with given employee_id '''
-        employee = Employee.query.filter_by(
-            id=employee_id, active=True).first()
+        employee = Employee.query.options(*employee_loader.options).filter_by(
+            id=employee_id).first()
         if employee:
+            conditional([employee.id], employee.date_modified)
             return employee, 200
         abort(404, message='No employee found with specified ID')
 
@@ -163,7 +185,7 @@ class SingleEmployeeEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         employee = Employee.query.filter_by(
-            id=employee_id, active=True).first()
+            id=employee_id).first()
         if employee:
             if name:
                 employee.name = name
@@ -181,7 +203,7 @@ class SingleEmployeeEndpoint(Resource):
     def delete(self, employee_id):
         ''' Delete employee with employee_id as given '''
         employee = Employee.query.filter_by(
-            id=employee_id, active=True).first()
+            id=employee_id).first()
         if employee:
             if employee.delete_employee():
                 response = {
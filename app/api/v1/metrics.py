@@ -0,0 +1,35 @@
+from flask_restplus import Resource, Namespace
+from app.utils.cache import response_cache
+from app.utils.hashing import password_hasher
+from app.utils.number_index import number_index
+
+
+metrics_api = Namespace(
+    'metrics', description='Runtime counters of the API')
+
+
+@metrics_api.route('/cache', endpoint='cache_metrics')
+class CacheMetricsEndPoint(Resource):
+
+    @metrics_api.response(200, 'Response cache counters')
+    def get(self):
+        ''' Retrieve response cache hit, miss and eviction counts '''
+        return response_cache.stats(), 200
+
+
+@metrics_api.route('/hashing', endpoint='hashing_metrics')
+class HashingMetricsEndPoint(Resource):
+
+    @metrics_api.response(200, 'Password hashing pool counters')
+    def get(self):
+        ''' Retrieve password hashing queue depth and wait times '''
+        return password_hasher.stats(), 200
+
+
+@metrics_api.route('/numbering', endpoint='numbering_metrics')
+class NumberingMetricsEndPoint(Resource):
+
+    @metrics_api.response(200, 'Number lookup index counters')
+    def get(self):
+        ''' Retrieve the size and refresh counts of the number index '''
+        return number_index.stats(), 200
@@ -2,11 +2,22 @@ from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
+from app.models.baseModel import UnitOfWork
 from app.models.company import Company
 from app.models.resource import ResourceMeta
 from app.models.numbering import Numbering
+from app.models.number_block import NumberBlock
 from app.models.employee import Employee
 from app.utils.utilities import auth
+from app.utils.archive import include_archived
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
+from app.utils.number_index import number_index
 from instance.config import Config
 from datetime import datetime
 
@@ -51,44 +62,64 @@ numbering_fields = numbering_api.model(
     }
 )
 
+numbering_loader = LoaderPlan(Numbering, numbering_fields)
+numbering_serializer = compile_serializer(numbering_fields)
+
+# SQLSTATE of a row rejected by an exclusion constraint
+EXCLUSION_VIOLATION = '23P01'
+
+
+def overlap_conflict(numbering, error):
+    ''' Answer 409 naming the record whose numbers numbering overlaps '''
+    if getattr(error.orig, 'pgcode', None) != EXCLUSION_VIOLATION:
+        return
+    conflict = numbering.overlapping()
+    first, last = numbering.block()
+    message = 'Numbers {}-{} overlap an assigned block'.format(first, last)
+    if conflict is not None:
+        held = conflict.block()
+        message = 'Numbers {}-{} overlap numbering record {} ({} {}-{})'.\
+            format(first, last, conflict.id, conflict.service_category,
+                   held[0], held[1])
+    abort(409, message=message, conflict=conflict and conflict.id)
+
 
 @numbering_api.route('', endpoint='numbering')
 class NumberingEndPoint(Resource):
 
+    @response_cache.cached(numbering_loader)
     @numbering_api.response(200, 'Successful Retrieval of Numbering records')
     @numbering_api.response(200, 'No numbering records found')
     def get(self):
         ''' Retrieve numbering records'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        numbering_data = Numbering.query.filter_by(active=True).\
+        numbering_data = include_archived(Numbering).options(
+            *numbering_loader.options).\
             order_by(desc(Numbering.date_created))
-        if numbering_data.all():
+        if numbering_data.first():
             numbering_records = numbering_data
 
             if search_term:
-                numbering_records = numbering_data.filter(
-                    Numbering.name.ilike('%'+search_term+'%')
-                )
+                numbering_records = Numbering.search(
+                    numbering_data, search_term)
 
-            numbering_paged = numbering_records.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(
-                numbering_paged.items,
-                numbering_fields))
+            if cursor is not None:
+                return cursor_page(
+                    numbering_records, Numbering, cursor, page_limit,
+                    'api.numbering', numbering_serializer), 200
+
+            numbering_paged = paginate(numbering_records, page, page_limit)
+            results = dict(data=numbering_serializer(numbering_paged.items))
 
             pages = {
                 'page': page,
                 'per_page': page_limit,
                 'total_data': numbering_paged.total,
-                'pages': numbering_paged.pages
+                'pages': numbering_paged.pages,
+                'count_strategy': numbering_paged.count_strategy
             }
 
             if page == 1:
@@ -108,7 +139,8 @@ class NumberingEndPoint(Resource):
         return abort(404, message='No Numbering found for specified user')
 
     @numbering_api.response(201, 'Numbering created successfully!')
-    @numbering_api.response(409, 'Numbering already exists!')
+    @numbering_api.response(
+        409, 'Numbering already exists or overlaps an assigned block!')
     @numbering_api.response(500, 'Internal Server Error')
     @numbering_api.doc(model='Numbering', body=numbering_fields)
     def post(self):
@@ -140,15 +172,8 @@ class NumberingEndPoint(Resource):
         if not service_category:
             return abort(400, 'Service Category cannot be empty!')
         try:
-            report = ResourceMeta.query.filter_by(full_name=report_url).first()
-            if not report:
-                report = ResourceMeta(
-                    version=1,
-                    name=report_url.split('/')[-1],
-                    location=report_url.split('/')[:-1])
             service_provider = Company.query.filter_by(
-                id=service_provider_id,
-                active=True).first()
+                id=service_provider_id).first()
             assigned_by = Employee.query.filter_by(id=assigned_by_id).first()
             numbering = Numbering(
                 service_category=service_category,
@@ -163,31 +188,186 @@ class NumberingEndPoint(Resource):
                 is_compliant=is_compliant,
                 notes=notes,
                 recommendations=recommendations,
-                assigned_by=assigned_by,
-                report=report
+                assigned_by=assigned_by
                 )
-            if numbering.save_numbering():
-                return {
-                    'message': 'Numbering record created successfully!'}, 201
-            return abort(409, message='Numbering already exists!')
+            with UnitOfWork() as unit:
+                numbering.report, = unit.resolve(
+                    ResourceMeta.from_url(report_url))
+                created = unit.create(numbering)
+                if created:
+                    numbering.reserve()
+        except IntegrityError as e:
+            overlap_conflict(numbering, e)
+            abort(
+                400,
+                message='Failed to create new numbering -> {}'.format(e))
         except Exception as e:
             abort(
                 400,
                 message='Failed to create new numbering -> {}'.format(e))
+        if created:
+            return {
+                'message': 'Numbering record created successfully!'}, 201
+        return abort(409, message='Numbering already exists!')
+
+@numbering_api.route('/allocate', endpoint='numbering_allocate')
+class NumberingAllocateEndPoint(Resource):
+
+    @numbering_api.header('x-access-token', 'Access Token', required=True)
+    @auth.login_required
+    @numbering_api.response(201, 'Numbers allocated successfully!')
+    @numbering_api.response(400, 'Invalid allocation request')
+    @numbering_api.response(409, 'No free block of numbers fits')
+    def post(self):
+        ''' Allocate a free block of numbers from a number plan '''
+        arguments = request.get_json(force=True)
+        service_category = (arguments.get('serviceCategory') or '').strip()
+        number_type = (arguments.get('numberType') or '').strip() or None
+        service_provider_id = arguments.get('serviceProvider') or None
+        description = (arguments.get('description') or '').strip() or None
+        notes = (arguments.get('notes') or '').strip() or None
+        try:
+            size = int(arguments.get('size') or 1)
+            start = arguments.get('start')
+            start = int(start) if start not in (None, '') else None
+        except (TypeError, ValueError):
+            return abort(400, message='Size and start must be integers')
+
+        if not service_category:
+            return abort(400, message='Service Category cannot be empty!')
+        if size < 1:
+            return abort(400, message='Size must be at least 1')
+        try:
+            with UnitOfWork() as unit:
+                first = NumberBlock.take(
+                    service_category, number_type, size, start)
+                if first is None:
+                    unit.rollback()
+                else:
+                    numbering = Numbering(
+                        service_category=service_category,
+                        number_type=number_type,
+                        description=description,
+                        notes=notes,
+                        assigned_number=first,
+                        assigned_range=size,
+                        service_provider=Company.query.get(
+                            service_provider_id)
+                        if service_provider_id else None)
+                    created = unit.create(numbering)
+        except IntegrityError as e:
+            overlap_conflict(numbering, e)
+            abort(
+                400,
+                message='Failed to allocate numbers -> {}'.format(e))
+        except Exception as e:
+            abort(
+                400,
+                message='Failed to allocate numbers -> {}'.format(e))
+        if first is None:
+            return abort(409, message='No free block of {} numbers{}'.format(
+                size, ' at {}'.format(start) if start is not None else ''))
+        if created:
+            return {
+                'message': 'Numbers allocated successfully!',
+                'id': numbering.id,
+                'assignedNumber': first,
+                'assignedRange': size}, 201
+        return abort(409, message='Number {} is already assigned'.format(
+            first))
+
+
+def lookup_results(numbers):
+    ''' Method to build the lookup response body for a list of numbers '''
+    limit = int(Config.NUMBER_LOOKUP_LIMIT)
+    if not numbers:
+        return abort(400, message='Give at least one number to look up')
+    if len(numbers) > limit:
+        return abort(
+            400, message='At most {} numbers can be looked up'.format(limit))
+    try:
+        numbers = [int(number) for number in numbers]
+    except (TypeError, ValueError):
+        return abort(400, message='Numbers must be integers')
+
+    holders = number_index.lookup(numbers)
+    provider_ids = {holder[3] for holder in holders if holder}
+    names = dict(Company.query.filter(
+        Company.id.in_(provider_ids)).with_entities(
+            Company.id, Company.name)) if provider_ids else {}
+
+    data = []
+    for number, holder in zip(numbers, holders):
+        result = {'number': number, 'holder': None}
+        if holder:
+            first, last, numbering_id, provider_id = holder
+            result['holder'] = {
+                'numberingId': numbering_id,
+                'assignedNumber': first,
+                'assignedRange': last - first + 1,
+                'serviceProvider': {
+                    'id': provider_id,
+                    'name': names.get(provider_id)
+                } if provider_id else None}
+        data.append(result)
+    return {'data': data}, 200
+
+
+@numbering_api.route('/lookup', endpoint='numbering_lookup')
+class NumberingLookupEndPoint(Resource):
+
+    @numbering_api.response(200, 'Holders of the numbers looked up')
+    @numbering_api.response(400, 'Invalid or too many numbers')
+    def get(self):
+        ''' Find the numbering record and provider holding each ?number= '''
+        numbers = [
+            number.strip()
+            for argument in request.args.getlist('number')
+            for number in argument.split(',') if number.strip()]
+        return lookup_results(numbers)
+
+    @numbering_api.response(200, 'Holders of the numbers looked up')
+    @numbering_api.response(400, 'Invalid or too many numbers')
+    def post(self):
+        ''' Find the holder of each number in a {"numbers": [...]} body '''
+        arguments = request.get_json(force=True) or {}
+        numbers = arguments.get('numbers')
+        if not isinstance(numbers, list):
+            return abort(400, message='numbers must be a list')
+        return lookup_results(numbers)
+
+
+@numbering_api.route('/export', endpoint='numbering_export')
+class NumberingExportEndPoint(Resource):
+
+    @numbering_api.response(200, 'Streaming export of numbering records')
+    @numbering_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active numbering records as NDJSON or CSV '''
+        numbering_records = Numbering.query.options(
+            *numbering_loader.options).\
+            order_by(Numbering.id)
+        return export_response(
+            numbering_records, numbering_fields, numbering_serializer,
+            'numbering')
+
 
 
 @numbering_api.route('/<int:numbering_id>', endpoint='single_numbering')
 class SingleNumberingEndpoint(Resource):
 
+    @response_cache.cached(numbering_loader)
     @numbering_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(numbering_fields)
     @numbering_api.response(200, 'Successful retrieval of numbering')
     @numbering_api.response(400, 'No numbering found with specified ID')
     def get(self, numbering_id):
         ''' Retrieve individual numbering with given numbering_id '''
-        numbering = Numbering.query.filter_by(
-            id=numbering_id, active=True).first()
+        numbering = include_archived(Numbering).options(
+            *numbering_loader.options).filter_by(
+                id=numbering_id).first()
         if numbering:
+            conditional([numbering.id], numbering.date_modified)
             return numbering, 200
         abort(404, message='No numbering found with specified ID')
 
@@ -202,7 +382,7 @@ class SingleNumberingEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         numbering = Numbering.query.filter_by(
-            id=numbering_id, active=True).first()
+            id=numbering_id).first()
         if numbering:
             if name:
                 numbering.name = name
@@ -222,7 +402,7 @@ class SingleNumberingEndpoint(Resource):
     def delete(self, numbering_id):
         ''' Delete numbering with numbering_id as given '''
         numbering = Numbering.query.filter_by(
-            id=numbering_id, active=True).first()
+            id=numbering_id).first()
         if numbering:
             if numbering.delete_numbering():
                 response = {
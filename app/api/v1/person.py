@@ -7,7 +7,11 @@ from app.models.address import Address
 from app.models.person import Person
 from app.models.user import User
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
 
 
 person_api = Namespace(
@@ -33,41 +37,44 @@ person_fields = person_api.model(
     }
 )
 
+person_serializer = compile_serializer(person_fields)
+
 
 @person_api.route('', endpoint='person')
 class PeopleEndPoint(Resource):
 
+    @response_cache.cached(Person)
     @person_api.response(200, 'Successful Retrieval of people')
     @person_api.response(200, 'No people found')
     def get(self):
         ''' Retrieve people'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        match = request.args.get('match')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        person_data = Person.query.filter_by(active=True).\
-            order_by(desc(Person.date_created))
-        if person_data.all():
+        person_data = Person.query.order_by(desc(Person.date_created))
+        if person_data.first():
             people = person_data
 
-            if search_term:
-                people = person_data.filter(
-                    Person.last_name.ilike('%'+search_term+'%'),
-                    Person.first_name.ilike('%'+search_term+'%')
-                )
+            if search_term and match == 'fuzzy':
+                people = Person.fuzzy_search(person_data, search_term)
+            elif search_term:
+                people = Person.search(person_data, search_term)
+
+            if cursor is not None:
+                return cursor_page(
+                    people, Person, cursor, page_limit,
+                    'api.person', person_serializer), 200
 
-            person_paged = people.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(person_paged.items, person_fields))
+            person_paged = paginate(people, page, page_limit)
+            results = dict(data=person_serializer(person_paged.items))
 
             pages = {
                 'page': page, 'per_page': page_limit,
-                'total_data': person_paged.total, 'pages': person_paged.pages
+                'total_data': person_paged.total,
+                'pages': person_paged.pages,
+                'count_strategy': person_paged.count_strategy
             }
 
             if page == 1:
@@ -109,10 +116,23 @@ class PeopleEndPoint(Resource):
         except Exception as e:
             abort(400, message='Failed to create new person -> {}'.format(e))
 
+@person_api.route('/export', endpoint='person_export')
+class PeopleExportEndPoint(Resource):
+
+    @person_api.response(200, 'Streaming export of people')
+    @person_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active people as NDJSON or CSV '''
+        people = Person.query.order_by(Person.id)
+        return export_response(
+            people, person_fields, person_serializer, 'person')
+
+
 
 @person_api.route('/<int:person_id>', endpoint='single_person')
 class SinglePersonEndpoint(Resource):
 
+    @response_cache.cached(Person)
     @person_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(person_fields)
     @person_api.response(200, 'Successful retrieval of person')
@@ -120,8 +140,9 @@ class SinglePersonEndpoint(Resource):
     def get(self, person_id):
         ''' Retrieve individual person with given person_id '''
         person = Person.query.filter_by(
-            id=person_id, active=True).first()
+            id=person_id).first()
         if person:
+            conditional([person.id], person.date_modified)
             return person, 200
         abort(404, message='No person found with specified ID')
 
@@ -134,7 +155,7 @@ class SinglePersonEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip().split(' ')
         person = Person.query.filter_by(
-            id=person_id, active=True).first()
+            id=person_id).first()
         if person:
             if name:
                 person.first_name, person.last_name = name[0], name[-1]
@@ -153,7 +174,7 @@ class SinglePersonEndpoint(Resource):
     def delete(self, person_id):
         ''' Delete person with person_id as given '''
         person = Person.query.filter_by(
-            id=person_id, active=True).first()
+            id=person_id).first()
         if person:
             if person.delete_person():
                 response = {
@@ -2,12 +2,18 @@ from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from app.models.baseModel import UnitOfWork
 from app.models.company import Company
 from app.models.resource import ResourceMeta
 from app.models.postal import Postal
 from app.models.employee import Employee
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
 from datetime import datetime
 
 
@@ -56,44 +62,44 @@ postal_fields = postal_api.model(
     }
 )
 
+postal_loader = LoaderPlan(Postal, postal_fields)
+postal_serializer = compile_serializer(postal_fields)
+
 
 @postal_api.route('', endpoint='postal')
 class PostalEndPoint(Resource):
 
+    @response_cache.cached(postal_loader)
     @postal_api.response(200, 'Successful Retrieval of Postal records')
     @postal_api.response(200, 'No postal records found')
     def get(self):
         ''' Retrieve postal records'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        postal_data = Postal.query.filter_by(active=True).\
+        postal_data = Postal.query.options(*postal_loader.options).\
             order_by(desc(Postal.date_created))
-        if postal_data.all():
+        if postal_data.first():
             postal_records = postal_data
 
             if search_term:
-                postal_records = postal_data.filter(
-                    Postal.name.ilike('%'+search_term+'%')
-                )
+                postal_records = Postal.search(postal_data, search_term)
 
-            postal_paged = postal_records.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(
-                postal_paged.items,
-                postal_fields))
+            if cursor is not None:
+                return cursor_page(
+                    postal_records, Postal, cursor, page_limit,
+                    'api.postal', postal_serializer), 200
+
+            postal_paged = paginate(postal_records, page, page_limit)
+            results = dict(data=postal_serializer(postal_paged.items))
 
             pages = {
                 'page': page,
                 'per_page': page_limit,
                 'total_data': postal_paged.total,
-                'pages': postal_paged.pages
+                'pages': postal_paged.pages,
+                'count_strategy': postal_paged.count_strategy
             }
 
             if page == 1:
@@ -145,12 +151,6 @@ class PostalEndPoint(Resource):
         report_url = arguments.get('report').strip() or None
 
         try:
-            report = ResourceMeta.query.filter_by(full_name=report_url).first()
-            if not report:
-                report = ResourceMeta(
-                    version=1,
-                    name=report_url.split('/')[-1],
-                    location=report_url.split('/')[:-1])
             reviewed_by = Employee.query.filter_by(id=reviewed_by_id).first()
             approved_by = Employee.query.filter_by(id=approved_by_id).first()
             inspected_by = Employee.query.filter_by(id=inspected_by_id).first()
@@ -170,31 +170,49 @@ class PostalEndPoint(Resource):
                 recommendations=recommendations,
                 reviewed_by=reviewed_by,
                 approved_by=approved_by,
-                inspected_by=inspected_by,
-                report=report
+                inspected_by=inspected_by
                 )
-            if postal.save_postal():
-                return {
-                    'message': 'Postal record created successfully!'}, 201
-            return abort(409, message='Postal already exists!')
+            with UnitOfWork() as unit:
+                postal.report, = unit.resolve(
+                    ResourceMeta.from_url(report_url))
+                created = unit.create(postal)
         except Exception as e:
             abort(
                 400,
                 message='Failed to create new postal -> {}'.format(e))
+        if created:
+            return {
+                'message': 'Postal record created successfully!'}, 201
+        return abort(409, message='Postal already exists!')
+
+@postal_api.route('/export', endpoint='postal_export')
+class PostalExportEndPoint(Resource):
+
+    @postal_api.response(200, 'Streaming export of postal records')
+    @postal_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active postal records as NDJSON or CSV '''
+        postal_records = Postal.query.options(*postal_loader.options).\
+            order_by(Postal.id)
+        return export_response(
+            postal_records, postal_fields, postal_serializer, 'postal')
+
 
 
 @postal_api.route('/<int:postal_id>', endpoint='single_postal')
 class SinglePostalEndpoint(Resource):
 
+    @response_cache.cached(postal_loader)
     @postal_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(postal_fields)
     @postal_api.response(200, 'Successful retrieval of postal')
     @postal_api.response(400, 'No postal found with specified ID')
     def get(self, postal_id):
         ''' Retrieve individual postal with given postal_id '''
-        postal = Postal.query.filter_by(
-            id=postal_id, active=True).first()
+        postal = Postal.query.options(*postal_loader.options).filter_by(
+            id=postal_id).first()
         if postal:
+            conditional([postal.id], postal.date_modified)
             return postal, 200
         abort(404, message='No postal found with specified ID')
 
@@ -209,7 +227,7 @@ class SinglePostalEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         postal = Postal.query.filter_by(
-            id=postal_id, active=True).first()
+            id=postal_id).first()
         if postal:
             if name:
                 postal.name = name
@@ -229,7 +247,7 @@ class SinglePostalEndpoint(Resource):
     def delete(self, postal_id):
         ''' Delete postal with postal_id as given '''
         postal = Postal.query.filter_by(
-            id=postal_id, active=True).first()
+            id=postal_id).first()
         if postal:
             if postal.delete_postal():
                 response = {
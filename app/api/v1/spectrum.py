@@ -1,12 +1,23 @@
+import numpy as np
 from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from app.models.baseModel import UnitOfWork
 from app.models.company import Company
 from app.models.resource import ResourceMeta
-from app.models.spectrum import Spectrum
+from app.models.spectrum import Spectrum, SpectrumConflict
 from app.models.employee import Employee
 from app.utils.utilities import auth
+from app.utils.archive import include_archived
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
+from app.utils.geo import parse_point
+from app.utils import analytics
 from instance.config import Config
 from datetime import datetime
 
@@ -32,6 +43,10 @@ spectrum_fields = spectrum_api.model(
             attribute='assigned_stl_power'),
         'assignedStlLocation': fields.String(
             attribute='assigned_stl_location'),
+        'transmitLatitude': fields.Float(attribute='transmit_latitude'),
+        'transmitLongitude': fields.Float(attribute='transmit_longitude'),
+        'stlLatitude': fields.Float(attribute='stl_latitude'),
+        'stlLongitude': fields.Float(attribute='stl_longitude'),
         'txFreqAssignDate': fields.DateTime(
             attribute='tx_freq_assign_date'),
         'stlFreqAssignDate': fields.DateTime(
@@ -53,10 +68,14 @@ spectrum_fields = spectrum_api.model(
     }
 )
 
+spectrum_loader = LoaderPlan(Spectrum, spectrum_fields)
+spectrum_serializer = compile_serializer(spectrum_fields)
+
 
 @spectrum_api.route('', endpoint='spectrum')
 class SpectrumEndPoint(Resource):
 
+    @response_cache.cached(spectrum_loader)
     @spectrum_api.response(
         200,
         'Successful Retrieval of Spectrum records')
@@ -64,36 +83,46 @@ class SpectrumEndPoint(Resource):
     def get(self):
         ''' Retrieve spectrum records'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
+        near = request.args.get('near')
+        if near:
+            try:
+                latitude, longitude = parse_point(near)
+                radius_km = float(request.args.get('radius_km') or
+                                  Config.SPECTRUM_NEAR_RADIUS_KM)
+            except ValueError as e:
+                return abort(400, message=str(e))
+            if radius_km <= 0:
+                return abort(400, message='radius_km must be positive')
 
-        spectrum = Spectrum.query.filter_by(active=True).\
+        spectrum = include_archived(Spectrum).options(
+            *spectrum_loader.options).\
             order_by(desc(Spectrum.date_created))
-        if spectrum.all():
+        if spectrum.first():
             spectrum_records = spectrum
 
             if search_term:
-                spectrum_records = spectrum_data.filter(
-                    Spectrum.assigned_transmission_power.ilike(
-                        '%'+search_term+'%')
-                )
+                spectrum_records = Spectrum.search(spectrum, search_term)
 
-            spectrum_paged = spectrum_records.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(
-                spectrum_paged.items,
-                spectrum_fields))
+            if near:
+                spectrum_records = Spectrum.near(
+                    spectrum_records, latitude, longitude, radius_km)
+
+            if cursor is not None:
+                return cursor_page(
+                    spectrum_records, Spectrum, cursor, page_limit,
+                    'api.spectrum', spectrum_serializer), 200
+
+            spectrum_paged = paginate(spectrum_records, page, page_limit)
+            results = dict(data=spectrum_serializer(spectrum_paged.items))
 
             pages = {
                 'page': page,
                 'per_page': page_limit,
                 'total_data': spectrum_paged.total,
-                'pages': spectrum_paged.pages
+                'pages': spectrum_paged.pages,
+                'count_strategy': spectrum_paged.count_strategy
             }
 
             if page == 1:
@@ -114,6 +143,8 @@ class SpectrumEndPoint(Resource):
 
     @spectrum_api.response(201, 'Spectrum created successfully!')
     @spectrum_api.response(409, 'Spectrum already exists!')
+    @spectrum_api.response(
+        409, 'Frequency conflicts with assigned spectrum in the area')
     @spectrum_api.response(500, 'Internal Server Error')
     @spectrum_api.doc(model='Spectrum', body=spectrum_fields)
     def post(self):
@@ -152,17 +183,10 @@ class SpectrumEndPoint(Resource):
         report_url = arguments.get('report').strip() or None
 
         try:
-            report = ResourceMeta.query.filter_by(full_name=report_url).first()
-            if not report:
-                report = ResourceMeta(
-                    version=1,
-                    name=report_url.split('/')[-1],
-                    location=report_url.split('/')[:-1])
             if not applicant_id:
                 return abort(400, message='Applicant needed to process data')
             applicant = Company.query.filter_by(
-                id=applicant_id,
-                active=True).first()
+                id=applicant_id).first()
             assigned_by = Employee.query.filter_by(
                 id=assigned_by_id).first()
             authorized_by = Employee.query.filter_by(
@@ -182,18 +206,147 @@ class SpectrumEndPoint(Resource):
                 service_authorized=service_authorized,
                 assigned_by=assigned_by,
                 authorized_by=authorized_by,
-                applicant=applicant,
-                report=report
+                applicant=applicant
                 )
-            if spectrum.save_spectrum():
-                return {
-                        'message': 'Spectrum record created successfully!'
-                    }, 201
-            return abort(409, message='Spectrum already exists!')
+            with UnitOfWork() as unit:
+                spectrum.report, = unit.resolve(
+                    ResourceMeta.from_url(report_url))
+                created = unit.create(spectrum)
+        except SpectrumConflict as e:
+            abort(409, message=str(e), conflicts=e.conflicts)
         except Exception as e:
             abort(
                 400,
                 message='Failed to create new spectrum -> {}'.format(e))
+        if created:
+            return {
+                    'message': 'Spectrum record created successfully!'
+                }, 201
+        return abort(409, message='Spectrum already exists!')
+
+@spectrum_api.route('/check', endpoint='spectrum_check')
+class SpectrumCheckEndPoint(Resource):
+
+    @spectrum_api.response(200, 'Assignments the frequency would hit')
+    @spectrum_api.response(400, 'Frequency and location are needed')
+    def post(self):
+        ''' Check a proposed STL frequency for conflicts in its area '''
+        arguments = request.get_json(force=True)
+        location = (arguments.get('authorizedStlLocation') or '').strip()
+        try:
+            frequency = int(arguments.get('authorizedStlFrequency'))
+        except (TypeError, ValueError):
+            return abort(400, message='Frequency must be an integer')
+        if not location:
+            return abort(400, message='Location cannot be empty!')
+
+        conflicts = Spectrum.conflicting(frequency, location).options(
+            *spectrum_loader.options).all()
+        return {
+            'clear': not conflicts,
+            'guardBand': int(Config.SPECTRUM_GUARD_BAND),
+            'conflicts': [
+                {
+                    'id': conflict.id,
+                    'applicant': conflict.applicant and
+                    conflict.applicant.name,
+                    'assignedStlFrequency': conflict.assigned_stl_frequency,
+                    'assignedStlPower': conflict.assigned_stl_power,
+                    'assignedStlLocation': conflict.assigned_stl_location,
+                    'separation': abs(
+                        conflict.assigned_stl_frequency - frequency)
+                } for conflict in conflicts]
+        }, 200
+
+
+@spectrum_api.route('/export', endpoint='spectrum_export')
+class SpectrumExportEndPoint(Resource):
+
+    @spectrum_api.response(200, 'Streaming export of spectrum records')
+    @spectrum_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active spectrum records as NDJSON or CSV '''
+        spectrum_records = Spectrum.query.options(*spectrum_loader.options).\
+            order_by(Spectrum.id)
+        return export_response(
+            spectrum_records, spectrum_fields, spectrum_serializer, 'spectrum')
+
+
+@spectrum_api.route(
+    '/analytics/occupancy', endpoint='spectrum_occupancy')
+class SpectrumOccupancyEndPoint(Resource):
+
+    @spectrum_api.response(200, 'Assignments in each frequency bin')
+    @spectrum_api.response(400, 'Invalid bins requested')
+    def get(self):
+        ''' Retrieve a histogram of the STL frequencies assigned in a band '''
+        band = request.args.get('band')
+        try:
+            width = float(
+                request.args.get('width') or Config.SPECTRUM_GUARD_BAND)
+            low, high = [
+                float(request.args[name]) if request.args.get(name)
+                else None for name in ('low', 'high')]
+            starts, counts, peaks = analytics.occupancy(
+                analytics.load_assignments(band), width, low, high,
+                int(Config.SPECTRUM_OCCUPANCY_MAX_BINS))
+        except ValueError as e:
+            return abort(400, message=str(e))
+
+        occupied = int(np.count_nonzero(counts))
+        return {
+            'band': band,
+            'binWidth': width,
+            'assignments': int(counts.sum()),
+            'occupiedBins': occupied,
+            'occupancy': occupied / counts.size if counts.size else 0,
+            'bins': [
+                {
+                    'start': float(start),
+                    'end': float(start + width),
+                    'assignments': int(count),
+                    'peakEirp': None if np.isnan(peak) else float(peak)
+                } for start, count, peak in zip(starts, counts, peaks)]
+        }, 200
+
+
+@spectrum_api.route(
+    '/analytics/interference', endpoint='spectrum_interference')
+class SpectrumInterferenceEndPoint(Resource):
+
+    @spectrum_api.response(200, 'Pairs of assignments interfering')
+    @spectrum_api.response(400, 'Limit must be a non-negative integer')
+    def get(self):
+        ''' Retrieve the assignment pairs of a band that interfere '''
+        band = request.args.get('band')
+        try:
+            limit = int(request.args.get('limit') or Config.MAX_PAGE_SIZE)
+        except ValueError:
+            return abort(400, message='Limit must be an integer')
+        if limit < 0:
+            return abort(400, message='Limit cannot be negative')
+
+        assignments = analytics.load_assignments(band)
+        compared, interfering, pairs = analytics.interference(
+            assignments, int(Config.SPECTRUM_GUARD_BAND),
+            float(Config.SPECTRUM_INTERFERENCE_THRESHOLD),
+            int(Config.SPECTRUM_ANALYTICS_BLOCK_SIZE), min(limit, 100))
+        return {
+            'band': band,
+            'assignments': int(assignments['id'].size),
+            'compared': compared,
+            'interfering': interfering,
+            'threshold': float(Config.SPECTRUM_INTERFERENCE_THRESHOLD),
+            'pairs': [
+                {
+                    'first': first,
+                    'second': second,
+                    'separation': separation,
+                    'distanceKm': round(distance, 3),
+                    'marginDb': round(margin, 2)
+                } for first, second, separation, distance, margin in pairs]
+        }, 200
+
 
 
 @spectrum_api.route(
@@ -201,15 +354,17 @@ class SpectrumEndPoint(Resource):
     endpoint='single_spectrum')
 class SingleSpectrumEndpoint(Resource):
 
+    @response_cache.cached(spectrum_loader)
     @spectrum_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(spectrum_fields)
     @spectrum_api.response(200, 'Successful retrieval of spectrum')
     @spectrum_api.response(400, 'No spectrum found with specified ID')
     def get(self, spectrum_id):
         ''' Retrieve individual spectrum with given spectrum_id '''
-        spectrum = Spectrum.query.filter_by(
-            id=spectrum_id, active=True).first()
+        spectrum = include_archived(Spectrum).options(
+            *spectrum_loader.options).filter_by(id=spectrum_id).first()
         if spectrum:
+            conditional([spectrum.id], spectrum.date_modified)
             return spectrum, 200
         abort(404, message='No spectrum found with specified ID')
 
@@ -224,7 +379,7 @@ class SingleSpectrumEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         spectrum = Spectrum.query.filter_by(
-            id=spectrum_id, active=True).first()
+            id=spectrum_id).first()
         if spectrum:
             if name:
                 spectrum.name = name
@@ -246,7 +401,7 @@ class SingleSpectrumEndpoint(Resource):
     def delete(self, spectrum_id):
         ''' Delete spectrum with spectrum_id as given '''
         spectrum = Spectrum.query.filter_by(
-            id=spectrum_id, active=True).first()
+            id=spectrum_id).first()
         if spectrum:
             if spectrum.delete_spectrum():
                 response = {
@@ -2,12 +2,18 @@ from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from app.models.baseModel import UnitOfWork
 from app.models.company import Company
 from app.models.resource import ResourceMeta
 from app.models.telecom import Telecom
 from app.models.employee import Employee
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
 from datetime import datetime
 
 
@@ -54,44 +60,44 @@ telecom_fields = telecom_api.model(
     }
 )
 
+telecom_loader = LoaderPlan(Telecom, telecom_fields)
+telecom_serializer = compile_serializer(telecom_fields)
+
 
 @telecom_api.route('', endpoint='telecom')
 class TelecomEndPoint(Resource):
 
+    @response_cache.cached(telecom_loader)
     @telecom_api.response(200, 'Successful Retrieval of Telecom records')
     @telecom_api.response(200, 'No telecom records found')
     def get(self):
         ''' Retrieve telecom records'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        telecom_data = Telecom.query.filter_by(active=True).\
+        telecom_data = Telecom.query.options(*telecom_loader.options).\
             order_by(desc(Telecom.date_created))
-        if telecom_data.all():
+        if telecom_data.first():
             telecom_records = telecom_data
 
             if search_term:
-                telecom_records = telecom_data.filter(
-                    Telecom.name.ilike('%'+search_term+'%')
-                )
+                telecom_records = Telecom.search(telecom_data, search_term)
 
-            telecom_paged = telecom_records.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(
-                telecom_paged.items,
-                telecom_fields))
+            if cursor is not None:
+                return cursor_page(
+                    telecom_records, Telecom, cursor, page_limit,
+                    'api.telecom', telecom_serializer), 200
+
+            telecom_paged = paginate(telecom_records, page, page_limit)
+            results = dict(data=telecom_serializer(telecom_paged.items))
 
             pages = {
                 'page': page,
                 'per_page': page_limit,
                 'total_data': telecom_paged.total,
-                'pages': telecom_paged.pages
+                'pages': telecom_paged.pages,
+                'count_strategy': telecom_paged.count_strategy
             }
 
             if page == 1:
@@ -142,19 +148,6 @@ class TelecomEndPoint(Resource):
         outage_report_url = arguments.get('outageReport').strip() or None
 
         try:
-            report = ResourceMeta.query.filter_by(full_name=report_url).first()
-            if not report:
-                report = ResourceMeta(
-                    version=1,
-                    name=report_url.split('/')[-1],
-                    location=report_url.split('/')[:-1])
-            outage_report = ResourceMeta.query.filter_by(
-                full_name=outage_report_url).first()
-            if not outage_report:
-                report = ResourceMeta(
-                    version=1,
-                    name=outage_report_url.split('/')[-1],
-                    location=outage_report_url.split('/')[:-1])
             reviewed_by = Employee.query.filter_by(id=reviewed_by_id).first()
             approved_by = Employee.query.filter_by(id=approved_by_id).first()
             inspected_by = Employee.query.filter_by(id=inspected_by_id).first()
@@ -174,31 +167,50 @@ class TelecomEndPoint(Resource):
                 recommendations=recommendations,
                 reviewed_by=reviewed_by,
                 approved_by=approved_by,
-                inspected_by=inspected_by,
-                report=report
+                inspected_by=inspected_by
                 )
-            if telecom.save_telecom():
-                return {
-                    'message': 'Telecom record created successfully!'}, 201
-            return abort(409, message='Telecom already exists!')
+            with UnitOfWork() as unit:
+                telecom.report, telecom.outage_report = unit.resolve(
+                    ResourceMeta.from_url(report_url),
+                    ResourceMeta.from_url(outage_report_url))
+                created = unit.create(telecom)
         except Exception as e:
             abort(
                 400,
                 message='Failed to create new telecom -> {}'.format(e))
+        if created:
+            return {
+                'message': 'Telecom record created successfully!'}, 201
+        return abort(409, message='Telecom already exists!')
+
+@telecom_api.route('/export', endpoint='telecom_export')
+class TelecomExportEndPoint(Resource):
+
+    @telecom_api.response(200, 'Streaming export of telecom records')
+    @telecom_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active telecom records as NDJSON or CSV '''
+        telecom_records = Telecom.query.options(*telecom_loader.options).\
+            order_by(Telecom.id)
+        return export_response(
+            telecom_records, telecom_fields, telecom_serializer, 'telecom')
+
 
 
 @telecom_api.route('/<int:telecom_id>', endpoint='single_telecom')
 class SingleTelecomEndpoint(Resource):
 
+    @response_cache.cached(telecom_loader)
     @telecom_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(telecom_fields)
     @telecom_api.response(200, 'Successful retrieval of telecom')
     @telecom_api.response(400, 'No telecom found with specified ID')
     def get(self, telecom_id):
         ''' Retrieve individual telecom with given telecom_id '''
-        telecom = Telecom.query.filter_by(
-            id=telecom_id, active=True).first()
+        telecom = Telecom.query.options(*telecom_loader.options).filter_by(
+            id=telecom_id).first()
         if telecom:
+            conditional([telecom.id], telecom.date_modified)
             return telecom, 200
         abort(404, message='No telecom found with specified ID')
 
@@ -213,7 +225,7 @@ class SingleTelecomEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         telecom = Telecom.query.filter_by(
-            id=telecom_id, active=True).first()
+            id=telecom_id).first()
         if telecom:
             if name:
                 telecom.name = name
@@ -233,7 +245,7 @@ class SingleTelecomEndpoint(Resource):
     def delete(self, telecom_id):
         ''' Delete telecom with telecom_id as given '''
         telecom = Telecom.query.filter_by(
-            id=telecom_id, active=True).first()
+            id=telecom_id).first()
         if telecom:
             if telecom.delete_telecom():
                 response = {
@@ -2,13 +2,19 @@ from flask import request, jsonify, g, url_for
 from flask_restplus import abort, Resource, fields, Namespace, marshal_with
 from flask_restplus import marshal
 from sqlalchemy import desc
+from app.models.baseModel import UnitOfWork
 from app.models.company import Company
 from app.models.employee import Employee
 from app.models.uniqueId import UniqueId
 from app.models.resource import ResourceMeta
 from app.models.typeapproval import Typeapproval
 from app.utils.utilities import auth
-from instance.config import Config
+from app.utils.pagination import cursor_page, page_arguments, paginate
+from app.utils.conditional import conditional
+from app.utils.cache import response_cache
+from app.utils.serializers import compile_serializer
+from app.utils.export import export_response
+from app.utils.loading import LoaderPlan
 from datetime import datetime
 
 
@@ -57,10 +63,14 @@ typeapproval_fields = typeapproval_api.model(
     }
 )
 
+typeapproval_loader = LoaderPlan(Typeapproval, typeapproval_fields)
+typeapproval_serializer = compile_serializer(typeapproval_fields)
+
 
 @typeapproval_api.route('', endpoint='typeapproval')
 class TypeapprovalEndPoint(Resource):
 
+    @response_cache.cached(typeapproval_loader)
     @typeapproval_api.response(
         200,
         'Successful Retrieval of Typeapproval records')
@@ -68,35 +78,35 @@ class TypeapprovalEndPoint(Resource):
     def get(self):
         ''' Retrieve typeapproval records'''
         search_term = request.args.get('q') or None
-        limit = request.args.get('limit') or Config.MAX_PAGE_SIZE
-        page_limit = 100 if int(limit) > 100 else int(limit)
-        page = request.args.get('page') or 1
-
-        if page_limit < 1 or page < 1:
-            return abort(400, 'Page or Limit cannot be negative values')
+        page, page_limit = page_arguments()
+        cursor = request.args.get('cursor')
 
-        typeapproval = Typeapproval.query.filter_by(active=True).\
+        typeapproval = Typeapproval.query.options(
+            *typeapproval_loader.options).\
             order_by(desc(Typeapproval.date_created))
-        if typeapproval.all():
+        if typeapproval.first():
             typeapproval_records = typeapproval
 
             if search_term:
-                typeapproval_records = typeapproval_data.filter(
-                    Typeapproval.ta_unique_id.ilike('%'+search_term+'%')
-                )
+                typeapproval_records = Typeapproval.search(
+                    typeapproval, search_term)
 
-            typeapproval_paged = typeapproval_records.paginate(
-                page=page, per_page=page_limit, error_out=True
-            )
-            results = dict(data=marshal(
-                typeapproval_paged.items,
-                typeapproval_fields))
+            if cursor is not None:
+                return cursor_page(
+                    typeapproval_records, Typeapproval, cursor, page_limit,
+                    'api.typeapproval', typeapproval_serializer), 200
+
+            typeapproval_paged = paginate(
+                typeapproval_records, page, page_limit)
+            results = dict(
+                data=typeapproval_serializer(typeapproval_paged.items))
 
             pages = {
                 'page': page,
                 'per_page': page_limit,
                 'total_data': typeapproval_paged.total,
-                'pages': typeapproval_paged.pages
+                'pages': typeapproval_paged.pages,
+                'count_strategy': typeapproval_paged.count_strategy
             }
 
             if page == 1:
@@ -141,17 +151,10 @@ class TypeapprovalEndPoint(Resource):
         report_url = arguments.get('report').strip() or None
 
         try:
-            report = ResourceMeta.query.filter_by(full_name=report_url).first()
-            if not report:
-                report = ResourceMeta(
-                    version=1,
-                    name=report_url.split('/')[-1],
-                    location=report_url.split('/')[:-1])
             if not applicant_id:
                 return abort(400, message='Applicant needed to process data')
             applicant = Company.query.filter_by(
-                id=applicant_id,
-                active=True).first()
+                id=applicant_id).first()
             assessed_by = Employee.query.filter_by(id=assessed_by_id).first()
             ta_certificate = ResourceMeta.query.filter_by(
                 id=ta_certificate_id).first()
@@ -166,18 +169,36 @@ class TypeapprovalEndPoint(Resource):
                 approval_rejection_date=approval_rejection_date,
                 assessed_by=assessed_by,
                 ta_certificate=ta_certificate,
-                applicant=applicant,
-                report=report
+                applicant=applicant
                 )
-            if typeapproval.save_typeapproval():
-                return {
-                        'message': 'Typeapproval record created successfully!'
-                    }, 201
-            return abort(409, message='Typeapproval already exists!')
+            with UnitOfWork() as unit:
+                typeapproval.report, = unit.resolve(
+                    ResourceMeta.from_url(report_url))
+                created = unit.create(typeapproval)
         except Exception as e:
             abort(
                 400,
                 message='Failed to create new typeapproval -> {}'.format(e))
+        if created:
+            return {
+                    'message': 'Typeapproval record created successfully!'
+                }, 201
+        return abort(409, message='Typeapproval already exists!')
+
+@typeapproval_api.route('/export', endpoint='typeapproval_export')
+class TypeapprovalExportEndPoint(Resource):
+
+    @typeapproval_api.response(200, 'Streaming export of typeapproval records')
+    @typeapproval_api.response(400, 'Unsupported export format')
+    def get(self):
+        ''' Stream all active typeapproval records as NDJSON or CSV '''
+        typeapproval_records = Typeapproval.query.options(
+            *typeapproval_loader.options).\
+            order_by(Typeapproval.id)
+        return export_response(
+            typeapproval_records, typeapproval_fields,
+            typeapproval_serializer, 'typeapproval')
+
 
 
 @typeapproval_api.route(
@@ -185,15 +206,18 @@ class TypeapprovalEndPoint(Resource):
     endpoint='single_typeapproval')
 class SingleTypeapprovalEndpoint(Resource):
 
+    @response_cache.cached(typeapproval_loader)
     @typeapproval_api.header('x-access-token', 'Access Token', required=True)
     @marshal_with(typeapproval_fields)
     @typeapproval_api.response(200, 'Successful retrieval of typeapproval')
     @typeapproval_api.response(400, 'No typeapproval found with specified ID')
     def get(self, typeapproval_id):
         ''' Retrieve individual typeapproval with given typeapproval_id '''
-        typeapproval = Typeapproval.query.filter_by(
-            id=typeapproval_id, active=True).first()
+        typeapproval = Typeapproval.query.options(
+            *typeapproval_loader.options).filter_by(
+                id=typeapproval_id).first()
         if typeapproval:
+            conditional([typeapproval.id], typeapproval.date_modified)
             return typeapproval, 200
         abort(404, message='No typeapproval found with specified ID')
 
@@ -208,7 +232,7 @@ class SingleTypeapprovalEndpoint(Resource):
         arguments = request.get_json(force=True)
         name = arguments.get('name').strip()
         typeapproval = Typeapproval.query.filter_by(
-            id=typeapproval_id, active=True).first()
+            id=typeapproval_id).first()
         if typeapproval:
             if name:
                 typeapproval.name = name
@@ -230,7 +254,7 @@ class SingleTypeapprovalEndpoint(Resource):
     def delete(self, typeapproval_id):
         ''' Delete typeapproval with typeapproval_id as given '''
         typeapproval = Typeapproval.query.filter_by(
-            id=typeapproval_id, active=True).first()
+            id=typeapproval_id).first()
         if typeapproval:
             if typeapproval.delete_typeapproval():
                 response = {
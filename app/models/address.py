@@ -6,6 +6,9 @@ class Address(BaseModel):
     '''This class represents the Address model'''
 
     __tablename__ = 'address'
+    __searchable__ = (
+        'address_line_1', 'address_line_2', 'district', 'country')
+    __natural_key__ = ('address_line_1',)
 
     district = db.Column(db.String(255))
     postal_code = db.Column(db.String(255))
@@ -15,10 +18,7 @@ class Address(BaseModel):
 
     def save_address(self):
         ''' Method to save address '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_address(self, deep_delete=False):
         ''' Method to delete address '''
@@ -1,11 +1,179 @@
-from flask_sqlalchemy import SQLAlchemy
+import re
+from collections import Counter, OrderedDict
+from itertools import chain
+
+from flask_sqlalchemy import BaseQuery, SQLAlchemy
+from sqlalchemy import DDL, desc, event, false, func, literal, literal_column
+from sqlalchemy import FetchedValue, inspect, or_, select, true, tuple_
+from sqlalchemy import union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.interfaces import MANYTOONE
+from sqlalchemy.schema import CreateColumn
 
 db = SQLAlchemy()
 
+# Incremented for a table each time a write to it is committed
+table_versions = Counter()
+# SQLSTATE of an insert repeating a unique key
+UNIQUE_VIOLATION = '23505'
+
+# Text search configuration used by both the search indexes and queries
+SEARCH_CONFIG = literal_column("'english'")
+
+# Whether the database has an extension, read once per process
+installed_extensions = {}
+
+
+def extension_available(name):
+    ''' Build a DDL check that the server can provide an extension '''
+    def available(ddl, target, bind, **kw):
+        return bind.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = %s", name
+        ).scalar() is not None
+    return available
+
+
+def extension_installed(name, installed=True):
+    ''' Build a DDL check that an extension is, or is not, installed '''
+    def check(ddl, target, bind, **kw):
+        return (bind.execute(
+            "SELECT 1 FROM pg_extension WHERE extname = %s", name
+        ).scalar() is not None) == installed
+    return check
+
+
+def has_extension(name):
+    ''' Check, once per process, that the database has an extension '''
+    if name not in installed_extensions:
+        installed_extensions[name] = extension_installed(name)(
+            None, None, db.engine)
+    return installed_extensions[name]
+
+
+def needs_missing_extension(index, bind):
+    ''' Check if an index needs an extension the database lacks '''
+    name = index.info.get('extension')
+    return name is not None and not extension_installed(name)(
+        None, None, bind)
+
+
+def generated_column(name, type_, expression, **kwargs):
+    ''' A column the database computes from expression and stores.
+
+    The ORM never writes the column and reloads it after every insert
+    or update, so it can be indexed and filtered on like any other.
+    '''
+    return db.Column(
+        name, type_, server_default=FetchedValue(),
+        server_onupdate=FetchedValue(), info={'generated': expression},
+        **kwargs)
+
+
+@compiles(CreateColumn, 'postgresql')
+def compile_generated_column(element, compiler, **kw):
+    ''' Add GENERATED ALWAYS AS ... STORED to generated columns '''
+    text = compiler.visit_create_column(element, **kw)
+    expression = element.element.info.get('generated')
+    if expression:
+        text += ' GENERATED ALWAYS AS ({}) STORED'.format(expression)
+    return text
+
+
+# Extensions created before the tables, where the server provides them
+EXTENSIONS = [
+    DDL('CREATE EXTENSION IF NOT EXISTS {}'.format(name)).execute_if(
+        dialect='postgresql', callable_=extension_available(name))
+    for name in ('pg_trgm', 'btree_gist')]
+for extension in EXTENSIONS:
+    event.listen(db.metadata, 'before_create', extension)
+
+
+def create_extensions(bind):
+    ''' Method to create the EXTENSIONS the server provides '''
+    for extension in EXTENSIONS:
+        extension(db.metadata, bind)
+    installed_extensions.clear()
+
+
+class ActiveQuery(BaseQuery):
+    ''' Query of a model's active rows, unless with_inactive() is called.
+
+    The active filter is added as the query is compiled, so it applies
+    however the query is run (iterated, counted, used as a subquery or
+    through get()) and with_inactive() still lifts it after other
+    criteria were added.
+    '''
+    _active_model = None
+
+    def __init__(self, entities, *args, **kwargs):
+        super(ActiveQuery, self).__init__(entities, *args, **kwargs)
+        model = getattr(entities, 'class_', None)
+        if model is not None and hasattr(model, 'active'):
+            self._active_model = model
+
+    def with_inactive(self):
+        ''' Method to include soft-deleted rows in the query '''
+        query = self._clone()
+        query._active_model = None
+        return query
+
+    def with_archived(self):
+        ''' Method to read the model's archived rows along with active ones.
+
+        The model's table is swapped for a union of its active rows and
+        its archive table, so it must be called before any criteria.
+        '''
+        model = self._active_model
+        archive = model and model.__table__.info.get('archive')
+        if archive is None:
+            return self
+        table = model.__table__
+        rows = union_all(
+            select([table]).where(table.c.active == true()),
+            select([archive.c[column.name] for column in table.columns]))
+        return self.with_inactive().select_entity_from(
+            rows.alias('{}_all'.format(table.name)))
+
+    def get(self, ident):
+        instance = super(ActiveQuery, self).get(ident)
+        if instance is not None and self._active_model is not None and \
+                not instance.active:
+            # get() answers from the identity map without a query
+            return None
+        return instance
+
+    def _from_selectable(self, fromclause):
+        # fromclause was compiled from this query and is already filtered
+        query = super(ActiveQuery, self)._from_selectable(fromclause)
+        query._active_model = None
+        return query
+
+    def _compile_context(self, labels=True):
+        if self._active_model is None:
+            return super(ActiveQuery, self)._compile_context(labels)
+        query = self.enable_assertions(False).filter(
+            self._active_model.active == true())
+        query._active_model = None
+        return query._compile_context(labels)
+
 
 class BaseModel(db.Model):
     ''' A model detailing the base properties to be inherited '''
     __abstract__ = True
+    query_class = ActiveQuery
+    # Text columns covered by the model's full text search index
+    __searchable__ = ()
+    # Columns given trigram indexes for fuzzy and substring matching
+    __trigram__ = ()
+    # Columns that identify a row, held unique by a constraint
+    __natural_key__ = ()
+    # Whether rows inactive past the retention window move to an archive
+    __archived__ = False
+
     id = db.Column(db.Integer, primary_key=True)
     date_created = db.Column(db.DateTime, default=db.func.current_timestamp())
     date_modified = db.Column(
@@ -13,10 +181,180 @@ class BaseModel(db.Model):
         onupdate=db.func.current_timestamp())
     active = db.Column(db.Boolean, default=True)
 
+    @declared_attr
+    def __table_args__(cls):
+        # Active rows newest first, the order of every listing
+        args = [db.Index(
+            'ix_{}_live'.format(cls.__tablename__), 'date_created', 'id',
+            postgresql_where=db.text('active'))]
+        if cls.__searchable__:
+            args.append(db.Index(
+                'ix_{}_search'.format(cls.__tablename__),
+                cls.search_vector(),
+                postgresql_using='gin'))
+        for name in cls.__trigram__:
+            args.append(db.Index(
+                'ix_{}_{}_trgm'.format(cls.__tablename__, name), name,
+                postgresql_using='gin',
+                postgresql_ops={name: 'gin_trgm_ops'},
+                info={'extension': 'pg_trgm'}))
+        key = cls.__natural_key__
+        column = getattr(cls, key[0]) if len(key) == 1 else None
+        if key and not getattr(column, 'unique', False):
+            # Soft-deleted rows release their natural key
+            args.append(db.Index(
+                'uq_{}_natural_key'.format(cls.__tablename__), *key,
+                unique=True, postgresql_where=db.text('active')))
+        return tuple(args)
+
+    @classmethod
+    def search_vector(cls):
+        ''' tsvector over the searchable columns, as stored in the index '''
+        document = None
+        for name in cls.__searchable__:
+            column = func.coalesce(getattr(cls, name), '')
+            document = column if document is None else \
+                document + ' ' + column
+        return func.to_tsvector(SEARCH_CONFIG, document)
+
+    @classmethod
+    def search(cls, query, term):
+        ''' Filter query to rows matching every word of term, best first '''
+        words = re.findall(r'\w+', term)
+        if not words:
+            return query.filter(false())
+        vector = cls.search_vector()
+        terms = func.to_tsquery(
+            SEARCH_CONFIG, ' & '.join(word + ':*' for word in words))
+        return query.filter(vector.op('@@')(terms)).order_by(None).\
+            order_by(desc(func.ts_rank(vector, terms)), desc(cls.date_created))
+
+    @classmethod
+    def similarity(cls, term):
+        ''' Trigram match condition and score of term against the model '''
+        term = literal(term)
+        columns = [getattr(cls, name) for name in cls.__trigram__]
+        condition = or_(*[term.op('<%%')(column) for column in columns])
+        score = func.greatest(
+            *[func.word_similarity(term, column) for column in columns])
+        return condition, score
+
+    @classmethod
+    def fuzzy_search(cls, query, term, *models):
+        ''' Filter query to rows resembling term, most similar first.
+
+        Matches are on word similarity, so fragments and misspellings of
+        a name are found, and the trigram indexes serve the lookup. The
+        trigram columns of any other models joined into query are matched
+        as well. Without pg_trgm, rows holding term in any of those
+        columns are matched instead, newest first.
+        '''
+        if not has_extension('pg_trgm'):
+            pattern = '%{}%'.format(re.sub(r'([\\%_])', r'\\\1', term))
+            return query.filter(or_(*[
+                getattr(model, name).ilike(pattern, escape='\\')
+                for model in (cls,) + models for name in model.__trigram__
+            ])).order_by(None).order_by(desc(cls.date_created))
+        matches = [model.similarity(term) for model in (cls,) + models]
+        score = func.greatest(*[score for _, score in matches])
+        return query.filter(or_(*[match for match, _ in matches])).\
+            order_by(None).order_by(desc(score), desc(cls.date_created))
+
+    def column_value(self, name):
+        ''' Value of a column, or the id of the row it relates to '''
+        value = getattr(self, name)
+        if value is not None:
+            return value
+        for relationship in inspect(type(self)).relationships:
+            columns = [column.key for column in relationship.local_columns]
+            if relationship.direction is MANYTOONE and columns == [name]:
+                related = getattr(self, relationship.key)
+                if related is not None:
+                    return related.id
+        return None
+
+    def natural_key(self):
+        ''' Values of the model's natural key columns '''
+        return tuple(self.column_value(name) for name in self.__natural_key__)
+
+    @classmethod
+    def find_by_natural_keys(cls, keys):
+        ''' Method to fetch the rows having any of keys, in one query '''
+        if not keys:
+            return {}
+        columns = [getattr(cls, name) for name in cls.__natural_key__]
+        rows = cls.query.filter(tuple_(*columns).in_(keys)).all()
+        return {row.natural_key(): row for row in rows}
+
+    def upsert(self):
+        ''' Insert the row in one statement unless its natural key exists.
+
+        Runs INSERT ... ON CONFLICT DO NOTHING RETURNING id against the
+        natural key's unique index, so a duplicate is detected by the
+        database even under concurrent saves. New rows the instance
+        refers to are written first, so their ids fill its foreign keys.
+        Returns True, leaving the instance persistent, when the row was
+        inserted and False, writing nothing, when an equal active row
+        was already stored.
+        '''
+        table = self.__table__
+        partial = 'uq_{}_natural_key'.format(table.name) in {
+            index.name for index in table.indexes}
+        session = db.session()
+        related = [
+            getattr(self, relationship.key)
+            for relationship in inspect(type(self)).relationships
+            if relationship.direction is MANYTOONE]
+        pending = [
+            row for row in related
+            if row is not None and inspect(row).key is None]
+        if pending:
+            session.add_all(pending)
+            session.flush()
+        values = {}
+        for attribute in inspect(type(self)).column_attrs:
+            column = attribute.columns[0]
+            if column.info.get('generated'):
+                continue
+            value = self.column_value(attribute.key)
+            if value is not None:
+                values[column.key] = value
+        try:
+            inserted = session.execute(
+                insert(table).values(**values).on_conflict_do_nothing(
+                    index_elements=self.__natural_key__,
+                    index_where=table.c.active if partial else None
+                ).returning(table.c.id)).first()
+        except IntegrityError:
+            # Constraints such as NOT NULL are checked before conflicts
+            session.rollback()
+            if self.find_by_natural_keys([self.natural_key()]):
+                return False
+            raise
+        if inserted is None:
+            if pending:
+                session.rollback()
+            return False
+        self.id = inserted.id
+        make_transient_to_detached(self)
+        session.add(self)
+        session.info.setdefault('written_tables', set()).add(table.name)
+        self.commit()
+        return True
+
+    @staticmethod
+    def commit():
+        ''' Commit the session and record which tables were written '''
+        session = db.session()
+        session.flush()
+        tables = session.info.pop('written_tables', set())
+        session.commit()
+        record_writes(tables)
+
     def delete(self):
         '''delete data from database'''
         db.session.delete(self)
-        db.session.commit()
+        self.commit()
 
     def deactivate(self):
         ''' deactivate data '''
@@ -29,8 +367,185 @@ class BaseModel(db.Model):
     def save(self):
         '''save data to database'''
         db.session.add(self)
-        db.session.commit()
+        self.commit()
 
     @staticmethod
     def __item_exists():
         pass
+
+
+class TableVersion(db.Model):
+    ''' Writes committed to a table, counted where every process sees them '''
+    __tablename__ = 'table_version'
+    name = db.Column(db.String(255), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+
+def record_writes(tables, bind=None):
+    ''' Count a committed write to each of tables.
+
+    The shared counts are bumped in a short transaction of their own
+    once the write has committed, so writers to a table never queue on
+    its count, and a process reading the new count also sees the write.
+    '''
+    if not tables:
+        return
+    for table in tables:
+        table_versions[table] += 1
+    statement = insert(TableVersion.__table__).values(
+        [dict(name=table, version=1) for table in sorted(tables)])
+    (bind or db.engine).execute(statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_=dict(version=TableVersion.version + 1)))
+
+
+class UnitOfWork(object):
+    ''' Stages a graph of new rows and writes it in one transaction.
+
+    resolve() swaps each staged instance for the stored row sharing its
+    natural key, looking up all the instances of a model in one query,
+    and flushes the rest so the next stage can refer to them. The block
+    commits once when it exits cleanly; any error rolls back the whole
+    graph, so a failed create leaves no partial rows behind.
+    '''
+
+    def __init__(self):
+        self.session = db.session()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        if self.closed:
+            return False
+        if kind is None:
+            BaseModel.commit()
+        else:
+            self.rollback()
+        return False
+
+    def rollback(self):
+        ''' Method to discard everything staged in the unit '''
+        self.session.rollback()
+        self.closed = True
+
+    def resolve(self, *instances):
+        ''' Map each instance to its stored row, or stage it.
+
+        The rows are staged under a savepoint. When a concurrent request
+        stores a row with the same natural key first, the insert fails
+        on the unique index; only the savepoint is rolled back and the
+        lookup runs again, finding that row.
+        '''
+        try:
+            with self.session.begin_nested():
+                return self._resolve(instances)
+        except IntegrityError as error:
+            if getattr(error.orig, 'pgcode', None) != UNIQUE_VIOLATION:
+                raise
+        return self._resolve(instances)
+
+    def _resolve(self, instances):
+        ''' Method to look up or stage instances, a model at a time '''
+        by_model = OrderedDict()
+        for instance in instances:
+            if instance is not None:
+                by_model.setdefault(type(instance), []).append(instance)
+
+        resolved = {}
+        for model, staged in by_model.items():
+            keys = {instance.natural_key() for instance in staged}
+            stored = model.find_by_natural_keys(
+                [key for key in keys if None not in key])
+            for instance in staged:
+                key = instance.natural_key()
+                match = instance if None in key else \
+                    stored.setdefault(key, instance)
+                if match is instance:
+                    self.session.add(instance)
+                resolved[id(instance)] = match
+        self.session.flush()
+        return [resolved.get(id(instance)) for instance in instances]
+
+    def create(self, instance):
+        ''' Method to stage instance, or discard the unit if it exists '''
+        if self.resolve(instance)[0] is instance:
+            return True
+        self.rollback()
+        return False
+
+
+@event.listens_for(db.session, 'before_flush')
+def record_written_tables(session, flush_context, instances):
+    ''' Note the tables each flush writes, for commit to report '''
+    session.info.setdefault('written_tables', set()).update(
+        instance.__table__.name for instance in
+        chain(session.new, session.dirty, session.deleted))
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def forget_written_tables(session, transaction):
+    ''' Drop the written tables once the outermost transaction ends '''
+    if transaction.parent is None:
+        session.info.pop('written_tables', None)
+
+
+@event.listens_for(BaseModel, 'instrument_class', propagate=True)
+def add_foreign_key_indexes(mapper, cls):
+    ''' Index each foreign key that no other index of its table leads with '''
+    table = cls.__table__
+    leading = set()
+    for index in chain(table.indexes, table.constraints):
+        if isinstance(index, db.Index) and \
+                index.dialect_options['postgresql']['where'] is not None:
+            # Partial indexes cannot serve the checks on referenced rows
+            continue
+        if isinstance(index, (db.Index, db.UniqueConstraint)) and \
+                len(index.columns):
+            leading.add(list(index.columns)[0])
+    for column in table.columns:
+        if column.foreign_keys and column not in leading:
+            db.Index('ix_{}_{}'.format(table.name, column.name), column)
+
+
+@event.listens_for(BaseModel, 'instrument_class', propagate=True)
+def add_archive_table(mapper, cls):
+    ''' Mirror an archived model's table into <table>_archive.
+
+    The archive keeps every column and id but no foreign keys, so rows
+    it references may be archived or deleted in turn.
+    '''
+    if not cls.__archived__:
+        return
+    table = cls.__table__
+    archive = db.Table(
+        '{}_archive'.format(table.name), table.metadata,
+        *[db.Column(column.name, column.type,
+                    primary_key=column.primary_key)
+          for column in table.columns] + [
+            db.Column('archived_at', db.DateTime,
+                      server_default=db.func.current_timestamp()),
+            db.Index('ix_{}_archive_listing'.format(table.name),
+                     'date_created', 'id')])
+    table.info['archive'] = archive
+
+
+@event.listens_for(BaseModel, 'instrument_class', propagate=True)
+def defer_extension_indexes(mapper, cls):
+    ''' Leave indexes needing a missing extension out of create_all '''
+    table = cls.__table__
+    if not any(index.info.get('extension') for index in table.indexes):
+        return
+
+    @event.listens_for(table, 'before_create')
+    def skip_indexes(target, connection, **kw):
+        skipped = [
+            index for index in target.indexes
+            if needs_missing_extension(index, connection)]
+        target.indexes.difference_update(skipped)
+        target.info['skipped_indexes'] = skipped
+
+    @event.listens_for(table, 'after_create')
+    def restore_indexes(target, connection, **kw):
+        target.indexes.update(target.info.pop('skipped_indexes', ()))
@@ -8,8 +8,12 @@ class Company(BaseModel):
     '''This class represents the company model'''
 
     __tablename__ = 'company'
+    __searchable__ = ('name',)
+    __trigram__ = ('name',)
+    __natural_key__ = ('name',)
+    __archived__ = True
 
-    name = db.Column(db.String(255), nullable=False, unique=True)
+    name = db.Column(db.String(255), nullable=False)
     address_id = db.Column(db.Integer, db.ForeignKey("address.id"))
     legal_person_id = db.Column(db.Integer, db.ForeignKey('contact_person.id'))
     tech_person_id = db.Column(db.Integer, db.ForeignKey('contact_person.id'))
@@ -22,10 +26,7 @@ class Company(BaseModel):
 
     def save_company(self):
         ''' Method to save company '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_company(self, deep_delete=False):
         ''' Method to delete company '''
@@ -6,6 +6,9 @@ class Contact(BaseModel):
     '''This class represents the contact model'''
 
     __tablename__ = 'contact'
+    __searchable__ = ('email', 'website', 'social_media_handle')
+    __trigram__ = ('email',)
+    __natural_key__ = ('email',)
 
     tel_one = db.Column(db.String(255))
     tel_two = db.Column(db.String(255))
@@ -15,10 +18,7 @@ class Contact(BaseModel):
 
     def save_contact(self):
         ''' Method to save contact '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def exists(self):
         ''' Check if contact exists '''
@@ -8,6 +8,7 @@ class ContactPerson(BaseModel):
     '''This class represents the company model'''
 
     __tablename__ = 'contact_person'
+    __natural_key__ = ('person_id', 'contact_id')
 
     person_id = db.Column(
         db.Integer,
@@ -21,10 +22,7 @@ class ContactPerson(BaseModel):
     contact = relationship('Contact', foreign_keys=[contact_id])
 
     def save_contact_person(self):
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_contact_person(self, deep_delete=False):
         if not deep_delete:
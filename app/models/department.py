@@ -6,6 +6,8 @@ class Department(BaseModel):
     '''This class represents the department model'''
 
     __tablename__ = 'department'
+    __searchable__ = ('name', 'description')
+    __natural_key__ = ('name',)
 
     name = db.Column(db.String(255))
     description = db.Column(db.String(255))
@@ -14,10 +16,7 @@ class Department(BaseModel):
 
     def save_department(self):
         ''' Method to save contact '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def exists(self):
         ''' Check if department exists '''
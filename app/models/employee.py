@@ -8,6 +8,7 @@ class Employee(BaseModel):
     '''This class represents the company model'''
 
     __tablename__ = 'employee'
+    __natural_key__ = ('contact_person_id',)
 
     contact_person_id = db.Column(
         db.Integer,
@@ -22,10 +23,7 @@ class Employee(BaseModel):
 
     def save_employee(self):
         ''' Method to save employee '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_employee(self, deep_delete=False):
         ''' Method to delete employee '''
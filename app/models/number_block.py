@@ -0,0 +1,167 @@
+from sqlalchemy import desc
+
+from app.models.baseModel import BaseModel, db, generated_column
+from app.models.numbering import Numbering
+
+
+class NumberBlock(BaseModel):
+    ''' A run of free numbers in a service category's number plan.
+
+    Free space is kept as non-overlapping blocks, indexed by size for
+    the best fitting block and by first number for the block holding a
+    given number, so both are found with a single index probe however
+    much of the plan is assigned. Allocations and saved numbering
+    records carve their numbers out of the blocks under a row lock, and
+    deleted records return them.
+    '''
+
+    __tablename__ = 'number_block'
+
+    service_category = db.Column(db.String(255), nullable=False)
+    number_type = db.Column(db.String(255))
+    first_number = db.Column(db.Integer, nullable=False)
+    last_number = db.Column(db.Integer, nullable=False)
+    size = generated_column(
+        'size', db.Integer, 'last_number - first_number + 1')
+
+    @classmethod
+    def plan(cls, service_category, number_type):
+        ''' Method to query the free blocks of one number plan '''
+        return cls.query.filter_by(
+            service_category=service_category, number_type=number_type)
+
+    @classmethod
+    def best_fit(cls, service_category, number_type, size):
+        ''' Method to query the smallest free blocks holding size numbers '''
+        return cls.plan(service_category, number_type).filter(
+            cls.size >= size).order_by(cls.size, cls.first_number)
+
+    @classmethod
+    def holding(cls, service_category, number_type, start):
+        ''' Method to query the free block starting at or before start '''
+        return cls.plan(service_category, number_type).filter(
+            cls.first_number <= start).order_by(desc(cls.first_number))
+
+    @classmethod
+    def next_free(cls, service_category, number_type, size):
+        ''' Method to find the first number of a free block of size '''
+        block = cls.best_fit(service_category, number_type, size).first()
+        return block.first_number if block else None
+
+    @classmethod
+    def is_free(cls, service_category, number_type, start, size):
+        ''' Check if the size numbers from start are all free '''
+        block = cls.holding(service_category, number_type, start).first()
+        return block is not None and block.last_number >= start + size - 1
+
+    @classmethod
+    def take(cls, service_category, number_type, size, start=None):
+        ''' Remove size numbers from the free space, returning the first.
+
+        Without start the best fitting block is used, skipping blocks
+        that concurrent allocations have locked; with start the block
+        holding it is locked, waiting for any allocation using it. The
+        rest of the block stays free. Numbers of active records found in
+        the block are carved out of the free space and another block is
+        tried. Returns None when no free block fits. The change is
+        committed with the caller's transaction.
+        '''
+        while True:
+            if start is None:
+                block = cls.best_fit(service_category, number_type, size).\
+                    with_for_update(skip_locked=True).first()
+            else:
+                block = cls.holding(service_category, number_type, start).\
+                    with_for_update().first()
+                if block is not None and \
+                        block.last_number < start + size - 1:
+                    block = None
+            if block is None:
+                return None
+
+            first = block.first_number if start is None else start
+            last = first + size - 1
+            held = Numbering.held(first, last).all()
+            if not held:
+                break
+            for held_first, held_last in held:
+                cls.carve(
+                    service_category, number_type, held_first, held_last)
+
+        if last < block.last_number:
+            db.session.add(cls(
+                service_category=service_category, number_type=number_type,
+                first_number=last + 1, last_number=block.last_number))
+        if first > block.first_number:
+            block.last_number = first - 1
+        else:
+            db.session.delete(block)
+        db.session.flush()
+        return first
+
+    @classmethod
+    def open(cls, service_category, number_type, first, last):
+        ''' Make the unassigned numbers from first to last free.
+
+        Free blocks overlapping or touching the range are merged into it,
+        then the numbers held by active numbering records, of any plan,
+        are left out. Numbers released by deleted records become free
+        again, so a range can be reopened at any time. The change is
+        committed with the caller's transaction.
+        '''
+        blocks = cls.plan(service_category, number_type).filter(
+            cls.first_number <= last + 1,
+            cls.last_number >= first - 1).with_for_update().all()
+        for block in blocks:
+            first = min(first, block.first_number)
+            last = max(last, block.last_number)
+            db.session.delete(block)
+
+        start = first
+        for assigned_first, assigned_last in Numbering.held(first, last):
+            if assigned_first > start:
+                db.session.add(cls(
+                    service_category=service_category,
+                    number_type=number_type,
+                    first_number=start, last_number=assigned_first - 1))
+            start = max(start, assigned_last + 1)
+        if start <= last:
+            db.session.add(cls(
+                service_category=service_category, number_type=number_type,
+                first_number=start, last_number=last))
+        db.session.flush()
+
+    @classmethod
+    def carve(cls, service_category, number_type, first, last):
+        ''' Remove the numbers from first to last from a plan's free space.
+
+        Free blocks overlapping the range are trimmed, or split when the
+        range falls inside one. The change is committed with the caller's
+        transaction.
+        '''
+        blocks = cls.plan(service_category, number_type).filter(
+            cls.first_number <= last,
+            cls.last_number >= first).with_for_update().all()
+        for block in blocks:
+            if block.last_number > last:
+                db.session.add(cls(
+                    service_category=service_category,
+                    number_type=number_type,
+                    first_number=last + 1, last_number=block.last_number))
+            if block.first_number < first:
+                block.last_number = first - 1
+            else:
+                db.session.delete(block)
+        db.session.flush()
+
+    def __repr__(self):
+        return '<NumberBlock: {} {}-{}>'.format(
+            self.service_category, self.first_number, self.last_number)
+
+
+db.Index(
+    'ix_number_block_fit', NumberBlock.service_category,
+    NumberBlock.number_type, NumberBlock.size, NumberBlock.first_number)
+db.Index(
+    'ix_number_block_start', NumberBlock.service_category,
+    NumberBlock.number_type, NumberBlock.first_number)
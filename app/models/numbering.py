@@ -1,17 +1,40 @@
-from app.models.baseModel import BaseModel, db
+from app.models.baseModel import BaseModel, db, extension_installed
+from app.models.baseModel import generated_column
+from sqlalchemy import DDL, event, func, true
+from sqlalchemy.dialects.postgresql import INT4RANGE
 from sqlalchemy.orm import relationship
 
+# Active records may not hold overlapping blocks; without btree_gist the
+# service category cannot be part of a GiST constraint, so blocks may not
+# overlap across categories either
+BLOCK_EXCLUSION = "DO $$ BEGIN IF NOT EXISTS (" \
+    "SELECT 1 FROM pg_constraint " \
+    "WHERE conname = 'ex_numbering_assigned_block') THEN " \
+    "ALTER TABLE numbering ADD CONSTRAINT ex_numbering_assigned_block " \
+    "EXCLUDE USING gist ({}assigned_block WITH &&) WHERE (active); " \
+    "END IF; END $$"
+
 
 class Numbering(BaseModel):
     ''' This class represents the Numbering model '''
 
     __tablename__ = 'numbering'
+    __searchable__ = (
+        'service_category', 'number_type', 'applicable_service_type',
+        'description')
+    __natural_key__ = ('assigned_number',)
+    __archived__ = True
     service_category = db.Column(db.String(255))
     number_type = db.Column(db.String(255))
     applicable_service_type = db.Column(db.String(255))
     description = db.Column(db.String(255))
     assigned_range = db.Column(db.Integer)
     assigned_number = db.Column(db.Integer)
+    # The numbers from assigned_number over assigned_range, as [first, end)
+    assigned_block = generated_column(
+        'assigned_block', INT4RANGE,
+        'int4range(assigned_number, assigned_number + '
+        'greatest(coalesce(assigned_range, 1), 1))')
     assignment_date = db.Column(
         db.DateTime,
         default=db.func.current_timestamp())
@@ -43,24 +66,97 @@ class Numbering(BaseModel):
     )
 
     def save_numbering(self):
-        ''' Method to save numbering '''
-        if not self.exists():
-            self.save()
+        ''' Save numbering, taking its numbers out of its plan's free space.
+
+        The free blocks are trimmed in the transaction inserting the
+        record, so both are committed or neither is.
+        '''
+        self.reserve()
+        if self.upsert():
             return True
+        db.session.rollback()
         return False
 
     def delete_numbering(self, deep_delete=False):
-        ''' Method to delete numbering '''
-        if not deep_delete:
-            if self.deactivate():
-                return True
+        ''' Delete numbering, returning its numbers to its plan's free space.
+
+        The record is deactivated, or removed with deep_delete, in the
+        transaction reopening its numbers.
+        '''
+        if not self.exists() or not (deep_delete or self.active):
             return False
-        if self.exists():
-            self.delete()
-            return True
-        return False
+        if deep_delete:
+            db.session.delete(self)
+        else:
+            self.active = False
+        db.session.flush()
+        self.release()
+        self.commit()
+        return True
+
+    def reserve(self):
+        ''' Method to carve its numbers out of its plan's free space '''
+        # number_block imports this module to read the assigned numbers
+        from app.models.number_block import NumberBlock
+        block = self.block()
+        if block is not None:
+            NumberBlock.carve(
+                self.service_category, self.number_type, *block)
+
+    def release(self):
+        ''' Method to return its numbers to its plan's free space '''
+        from app.models.number_block import NumberBlock
+        block = self.block()
+        if block is not None:
+            NumberBlock.open(self.service_category, self.number_type, *block)
+
+    @classmethod
+    def held(cls, first, last):
+        ''' Method to query the numbers active records hold in a range '''
+        end = cls.assigned_number + \
+            func.greatest(func.coalesce(cls.assigned_range, 1), 1) - 1
+        return db.session.query(cls.assigned_number, end).filter(
+            cls.active == true(), cls.assigned_number <= last,
+            end >= first).order_by(cls.assigned_number)
+
+    def block(self):
+        ''' Method to get the (first, last) numbers the record holds '''
+        if self.assigned_number is None:
+            return None
+        return self.assigned_number, \
+            self.assigned_number + max(self.assigned_range or 1, 1) - 1
+
+    def overlapping(self):
+        ''' Method to find an active record holding any of its numbers '''
+        block = self.block()
+        if block is None:
+            return None
+        first, last = block
+        query = Numbering.query.filter(Numbering.assigned_block.overlaps(
+            func.int4range(first, last + 1)))
+        if self.id is not None:
+            query = query.filter(Numbering.id != self.id)
+        # A record of the same category is the one a per category
+        # constraint rejected
+        return query.order_by(
+            Numbering.service_category != self.service_category,
+            Numbering.assigned_number).first()
 
     def exists(self):
         ''' Check if numbering exists '''
         return True if Numbering.query.filter_by(
             assigned_number=self.assigned_number).first() else False
+
+
+event.listen(
+    Numbering.__table__, 'after_create',
+    DDL(BLOCK_EXCLUSION.format('service_category WITH =, ')).execute_if(
+        dialect='postgresql', callable_=extension_installed('btree_gist')))
+event.listen(
+    Numbering.__table__, 'after_create',
+    DDL(BLOCK_EXCLUSION.format('')).execute_if(
+        dialect='postgresql',
+        callable_=extension_installed('btree_gist', installed=False)))
+
+# Read by the number lookup index for the rows changed since its update
+db.Index('ix_numbering_date_modified', Numbering.date_modified)
@@ -1,4 +1,4 @@
-from app.models.baseModel import BaseModel, db
+from app.models.baseModel import BaseModel, db, generated_column
 from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 
 
@@ -6,9 +6,15 @@ class Person(BaseModel):
     '''This class represents the person model'''
 
     __table__name = 'person'
+    __searchable__ = ('first_name', 'last_name')
+    __trigram__ = ('first_name', 'last_name')
+    __natural_key__ = ('first_name', 'last_name')
 
     first_name = db.Column(db.String(255))
     last_name = db.Column(db.String(255), nullable=False)
+    _full_name = generated_column(
+        'full_name', db.String(511), "first_name || ' ' || last_name",
+        index=True)
 
     def __init__(self, first_name, last_name):
         self.first_name = first_name
@@ -18,17 +24,19 @@ class Person(BaseModel):
     def full_name(self):
         return self.first_name + ' ' + self.last_name
 
+    @full_name.expression
+    def full_name(cls):
+        return cls._full_name
+
     def save_person(self):
         ''' Method to save person '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def exists(self):
         ''' Check if person exists '''
         return True if Person.query.filter_by(
-            full_name=self.full_name).first() else False
+            first_name=self.first_name,
+            last_name=self.last_name).first() else False
 
     def __repr__(self):
         return "<Person: {}>".format(self.full_name)
@@ -6,6 +6,9 @@ class Postal(BaseModel):
     ''' This class represents the postal modal '''
 
     __tablename__ = 'postal'
+    __searchable__ = (
+        'call_sign', 'physical_location_requirements', 'notes_01', 'notes_02')
+    __natural_key__ = ('call_sign',)
     call_sign = db.Column(db.String(255), nullable=False)
     physical_location_requirements = db.Column(db.String(255))
     license_validity = db.Column(db.Integer)
@@ -42,10 +45,7 @@ class Postal(BaseModel):
 
     def save_postal(self):
         ''' Method to save postal '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_postal(self, deep_delete=False):
         ''' Method to delete postal '''
@@ -61,4 +61,4 @@ class Postal(BaseModel):
     def exists(self):
         ''' Check if postal exists '''
         return True if Postal.query.filter_by(
-            call_sign=self.call_sign, active=True).first() else False
+            call_sign=self.call_sign).first() else False
@@ -1,29 +1,42 @@
-from app.models.baseModel import db, BaseModel
+from app.models.baseModel import db, BaseModel, generated_column
 from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 
 
 class ResourceMeta(BaseModel):
     ''' This class represents the resource model '''
     __tablename__ = 'resource'
+    __natural_key__ = ('location', 'name')
     name = db.Column(db.String(255), nullable=False)
     version = db.Column(db.Integer)
     location = db.Column(db.String(255), nullable=False, default='/public')
+    _full_name = generated_column(
+        'full_name', db.String(511), "location || '/' || name", index=True)
 
     @hybrid_property
     def full_name(self):
         return self.location + '/' + self.name
 
+    @full_name.expression
+    def full_name(cls):
+        return cls._full_name
+
+    @classmethod
+    def from_url(cls, url):
+        ''' Method to describe the resource stored at url '''
+        if not url:
+            return None
+        location, _, name = url.rpartition('/')
+        return cls(version=1, name=name, location=location)
+
     def save_resource(self):
         ''' Method to save resource metadata'''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def exists(self):
         ''' Check if resource metadata exists '''
         return True if ResourceMeta.query.filter_by(
-            name=self.full_name).first() else False
+            location=self.location,
+            name=self.name).first() else False
 
     def __repr__(self):
         return "<Resource metadata: {}>".format(self.full_name)
@@ -1,18 +1,44 @@
-from app.models.baseModel import BaseModel, db
-from sqlalchemy.orm import relationship
+from app.models.baseModel import BaseModel, db, generated_column
+from sqlalchemy import and_, desc, event, func, select
+from sqlalchemy.orm import relationship, validates
+from app.utils.geo import EARTH_RADIUS_KM, bounding_box, parse_coordinates
+from instance.config import Config
+
+
+class SpectrumConflict(Exception):
+    ''' Raised when an assignment's frequency collides in its area '''
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super(SpectrumConflict, self).__init__(
+            'Frequency conflicts with spectrum records {}'.format(
+                ', '.join(str(conflict) for conflict in conflicts)))
 
 
 class Spectrum(BaseModel):
     ''' This class represents the spectrum modal '''
 
     __tablename__ = 'spectrum'
+    __searchable__ = (
+        'band_of_operation', 'service_authorized',
+        'authorized_transmit_location', 'assigned_stl_location')
+    __natural_key__ = ('assigned_stl_location', 'applicant_id')
+    __archived__ = True
     assigned_transmission_power = db.Column(db.Integer)
     authorized_antenna_gain = db.Column(db.Integer)
     authorized_antenna_height = db.Column(db.Integer)
     authorized_transmit_location = db.Column(db.String)
+    # Coordinates written in the locations, kept in step by parse_location
+    transmit_latitude = db.Column(db.Float)
+    transmit_longitude = db.Column(db.Float)
+    stl_latitude = db.Column(db.Float)
+    stl_longitude = db.Column(db.Float)
     assigned_stl_frequency = db.Column(db.Integer)
     assigned_stl_power = db.Column(db.Integer)
     assigned_stl_location = db.Column(db.String(255))
+    # Assignments sharing an area can interfere with each other
+    stl_area = generated_column(
+        'stl_area', db.String(255), 'lower(btrim(assigned_stl_location))')
     tx_freq_assign_date = db.Column(db.DateTime)
     stl_freq_assign_date = db.Column(db.DateTime)
     band_of_operation = db.Column(db.String(255))
@@ -41,10 +67,8 @@ class Spectrum(BaseModel):
 
     def save_spectrum(self):
         ''' Method to save spectrum '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        self.check_conflicts(db.session.connection())
+        return self.upsert()
 
     def delete_spectrum(self, deep_delete=False):
         ''' Method to delete spectrum '''
@@ -57,9 +81,116 @@ class Spectrum(BaseModel):
             return True
         return False
 
+    @validates('authorized_transmit_location', 'assigned_stl_location')
+    def parse_location(self, key, location):
+        ''' Method to set the coordinates read from a location '''
+        latitude, longitude = parse_coordinates(location) or (None, None)
+        prefix = 'transmit' if key == 'authorized_transmit_location' \
+            else 'stl'
+        setattr(self, prefix + '_latitude', latitude)
+        setattr(self, prefix + '_longitude', longitude)
+        return location
+
+    @classmethod
+    def parse_locations(cls, batch_size=500):
+        ''' Method to fill coordinates of rows saved before they existed '''
+        last_id, parsed = 0, 0
+        while True:
+            rows = cls.query.with_inactive().filter(
+                cls.id > last_id).order_by(cls.id).limit(batch_size).all()
+            if not rows:
+                return parsed
+            for row in rows:
+                for key in ('authorized_transmit_location',
+                            'assigned_stl_location'):
+                    row.parse_location(key, getattr(row, key))
+                parsed += 1
+            last_id = rows[-1].id
+            cls.commit()
+
+    @classmethod
+    def transmit_point(cls):
+        ''' point(longitude, latitude) of the transmitter, as indexed '''
+        return func.point(cls.transmit_longitude, cls.transmit_latitude)
+
+    @classmethod
+    def near(cls, query, latitude, longitude, radius_km):
+        ''' Filter query to transmitters within radius_km, nearest first.
+
+        The GiST index on the transmit point finds the rows inside the
+        bounding box of the circle; the great circle distance then
+        drops the box's corners.
+        '''
+        south, west, north, east = bounding_box(
+            latitude, longitude, radius_km)
+        box = func.box(func.point(west, south), func.point(east, north))
+        half_chord = func.power(func.sin(func.radians(
+            cls.transmit_latitude - latitude) / 2), 2) + \
+            func.cos(func.radians(latitude)) * \
+            func.cos(func.radians(cls.transmit_latitude)) * \
+            func.power(func.sin(func.radians(
+                cls.transmit_longitude - longitude) / 2), 2)
+        distance = 2 * EARTH_RADIUS_KM * func.asin(
+            func.sqrt(func.least(half_chord, 1)))
+        return query.filter(and_(
+            cls.transmit_point().op('<@')(box),
+            distance <= radius_km)).order_by(None).order_by(
+                distance, desc(cls.date_created))
+
+    @classmethod
+    def conflicting(cls, frequency, location):
+        ''' Method to query active assignments a frequency would hit.
+
+        Two frequencies closer than SPECTRUM_GUARD_BAND interfere when
+        assigned in the same area. The (area, frequency) index turns
+        this into one range scan, whatever the number of assignments.
+        '''
+        guard = int(Config.SPECTRUM_GUARD_BAND)
+        return cls.query.filter(
+            cls.stl_area == func.lower(func.btrim(location)),
+            cls.assigned_stl_frequency > frequency - guard,
+            cls.assigned_stl_frequency < frequency + guard).order_by(
+                func.abs(cls.assigned_stl_frequency - frequency), cls.id)
+
+    def check_conflicts(self, connection):
+        ''' Raise SpectrumConflict if the assignment collides.
+
+        Checks in one area are serialized with a transaction level
+        advisory lock, so two assignments colliding with each other
+        cannot both pass before either is written.
+        '''
+        if self.assigned_stl_frequency is None or \
+                not self.assigned_stl_location:
+            return
+        area = func.lower(func.btrim(self.assigned_stl_location))
+        connection.execute(select([func.pg_advisory_xact_lock(
+            func.hashtext(self.__tablename__), func.hashtext(area))]))
+        query = Spectrum.conflicting(
+            self.assigned_stl_frequency, self.assigned_stl_location)
+        if self.id is not None:
+            query = query.filter(Spectrum.id != self.id)
+        conflicts = [
+            row.id for row in connection.execute(
+                query.with_entities(Spectrum.id).statement)]
+        if conflicts:
+            raise SpectrumConflict(conflicts)
+
     def exists(self):
         ''' Check if spectrum exists '''
         return True if Spectrum.query.filter_by(
             assigned_stl_location=self.assigned_stl_location,
-            applicant=self.applicant,
-            active=True).first() else False
+            applicant=self.applicant).first() else False
+
+
+@event.listens_for(Spectrum, 'before_insert')
+def check_spectrum_conflicts(mapper, connection, target):
+    ''' Check every assignment for conflicts before it is inserted '''
+    target.check_conflicts(connection)
+
+
+db.Index(
+    'ix_spectrum_transmit_point', Spectrum.transmit_point(),
+    postgresql_using='gist')
+db.Index(
+    'ix_spectrum_stl_area_frequency', Spectrum.stl_area,
+    Spectrum.assigned_stl_frequency, postgresql_where=db.text('active'))
@@ -6,6 +6,9 @@ class Telecom(BaseModel):
     ''' This class represents the telecom modal '''
 
     __tablename__ = 'telecom'
+    __searchable__ = (
+        'service_details', 'service_technology', 'coverage_area_details')
+    __natural_key__ = ('service_details',)
     service_details = db.Column(db.String(255))
     service_technology = db.Column(db.String(255))
     qos_reqs_claims_status = db.Column(db.String(255))
@@ -47,10 +50,7 @@ class Telecom(BaseModel):
 
     def save_telecom(self):
         ''' Method to save telecom '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_telecom(self, deep_delete=False):
         ''' Method to delete telecom '''
@@ -66,5 +66,4 @@ class Telecom(BaseModel):
     def exists(self):
         ''' Check if telecom exists '''
         return True if Telecom.query.filter_by(
-            service_details=self.service_details,
-            active=True).first() else False
+            service_details=self.service_details).first() else False
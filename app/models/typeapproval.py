@@ -6,6 +6,10 @@ class Typeapproval(BaseModel):
     ''' This class represents the typeapproval modal '''
 
     __tablename__ = 'typeapproval'
+    __searchable__ = (
+        'equipment_name', 'equipment_model', 'equipment_category',
+        'ta_unique_id')
+    __natural_key__ = ('applicant_id', 'equipment_name')
     equipment_category = db.Column(db.String(255))
     status_approved = db.Column(db.Boolean)
     equipment_name = db.Column(db.String(255))
@@ -13,7 +17,7 @@ class Typeapproval(BaseModel):
     equipment_desc = db.Column(db.String(255))
     applicable_standards = db.Column(db.String(255))
     approval_rejection_date = db.Column(db.DateTime)
-    ta_unique_id = db.Column(db.String(255))
+    ta_unique_id = db.Column(db.String(255), index=True)
     ta_certificate_id = db.Column(db.Integer, db.ForeignKey('resource.id'))
     report_id = db.Column(db.Integer, db.ForeignKey('resource.id'))
     assessed_by_id = db.Column(db.Integer, db.ForeignKey('employee.id'))
@@ -38,10 +42,7 @@ class Typeapproval(BaseModel):
 
     def save_typeapproval(self):
         ''' Method to save typeapproval '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def delete_typeapproval(self, deep_delete=False):
         ''' Method to delete typeapproval '''
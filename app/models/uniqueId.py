@@ -5,14 +5,12 @@ from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 class UniqueId(BaseModel):
     ''' This class represents the available codes '''
     __tablename__ = 'uniqueid'
+    __natural_key__ = ('value',)
     value = db.Column(db.String(255), nullable=False)
     occupant = db.Column(db.String(255))
 
     def save_resource(self):
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def exists(self):
         return True if UniqueId.query.filter_by(
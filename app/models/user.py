@@ -1,17 +1,53 @@
-from flask_bcrypt import Bcrypt
+from functools import lru_cache
+
+from flask import current_app, has_app_context
 from itsdangerous import (
     TimedJSONWebSignatureSerializer as Serializer,
     BadSignature, SignatureExpired
 )
 
 from app.models.baseModel import BaseModel, db
+from app.utils.hashing import hash_rounds, password_hasher
+from app.utils.lru import LRUCache
+from app.utils.versions import shared_versions
 from instance.config import Config
 
-bcrypt = Bcrypt()
+# Recently authenticated users by id, detached from any session, with the
+# version of the users table they were read at
+user_cache = LRUCache(int(Config.USER_CACHE_SIZE))
+
+
+class TokenSerializer(Serializer):
+    ''' Token serializer that builds each of its signers only once '''
+
+    def __init__(self, *args, **kwargs):
+        super(TokenSerializer, self).__init__(*args, **kwargs)
+        self._signers = {}
+
+    def make_signer(self, salt=None, algorithm=None):
+        key = (salt, algorithm)
+        if key not in self._signers:
+            self._signers[key] = super(TokenSerializer, self).make_signer(
+                salt, algorithm)
+        return self._signers[key]
+
+
+def bcrypt_rounds():
+    ''' Method to read the bcrypt cost of the active configuration '''
+    if has_app_context():
+        return int(current_app.config['BCRYPT_LOG_ROUNDS'])
+    return int(Config.BCRYPT_LOG_ROUNDS)
+
+
+@lru_cache(maxsize=8)
+def token_serializer(expires_in=None):
+    ''' Method to get the shared token serializer for a token lifetime '''
+    return TokenSerializer(Config.SECRET_KEY, expires_in=expires_in)
 
 
 class User(BaseModel):
     '''This class represents the user model'''
+    __natural_key__ = ('email',)
     first_name = db.Column(db.String(25), nullable=False)
     last_name = db.Column(db.String(25), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -25,8 +61,7 @@ class User(BaseModel):
     @password.setter
     def password(self, password):
         ''' Generate password hash '''
-        self._password_hash = bcrypt.generate_password_hash(
-            password, Config.BCRYPT_LOG_ROUNDS).decode()
+        self._password_hash = password_hasher.hash(password, bcrypt_rounds())
 
     def exists(self):
         ''' Check if user exists '''
@@ -34,11 +69,15 @@ class User(BaseModel):
 
     def verify_password(self, password):
         ''' Method to verify that user's password matches password provided '''
-        return bcrypt.check_password_hash(self._password_hash, password)
+        return password_hasher.verify(self._password_hash, password)
+
+    def needs_rehash(self):
+        ''' Check if the password hash was made with a different cost '''
+        return hash_rounds(self._password_hash) != bcrypt_rounds()
 
     def generate_auth_token(self, duration=Config.AUTH_TOKEN_DURATION):
         ''' Method for generating a JWT authentication token '''
-        serializer = Serializer(Config.SECRET_KEY, expires_in=int(duration))
+        serializer = token_serializer(int(duration))
         return serializer.dumps({
                'id': self.id,
                'email': self.email,
@@ -49,7 +88,7 @@ class User(BaseModel):
     @staticmethod
     def verify_authentication_token(token):
         ''' Method to verify authentication token '''
-        serializer = Serializer(Config.SECRET_KEY)
+        serializer = token_serializer()
         try:
             data = serializer.loads(token)
         except SignatureExpired:
@@ -58,23 +97,45 @@ class User(BaseModel):
             return False
         return data['id'] if data['id'] else False
 
+    @classmethod
+    def cached(cls, user_id):
+        ''' Method to get a user by id, from the user cache when possible.
+
+        The cached copy is merged into the current session without a
+        query, so the caller gets an instance it can use as normal. It
+        is only used while the shared version of the users table is the
+        one it was read at, so a user written by another process is read
+        again within TABLE_VERSION_TTL seconds.
+        '''
+        version = shared_versions.get([cls.__tablename__])
+        entry = user_cache.get(user_id)
+        if entry is not None and entry[0] == version:
+            user = entry[1]
+        else:
+            user = cls.query.filter_by(id=user_id).first()
+            if user is None:
+                return None
+            db.session.expunge(user)
+            user_cache.set(
+                user_id, (version, user), float(Config.USER_CACHE_TTL))
+        return db.session.merge(user, load=False)
+
     def delete_user(self, deep_delete=False):
         ''' Method to delete user '''
+        user_id = self.id
         if not deep_delete:
-            if self.deactivate():
-                return True
-            return False        
-        if self.exists():
+            deleted = self.deactivate()
+        elif self.exists():
             self.delete()
-            return True
-        return False
+            deleted = True
+        else:
+            deleted = False
+        user_cache.delete(user_id)
+        return deleted
 
     def save_user(self):
         ''' Method to save user '''
-        if not self.exists():
-            self.save()
-            return True
-        return False
+        return self.upsert()
 
     def __repr__(self):
         return '<User %r>' % self.name()
@@ -0,0 +1,155 @@
+import numpy as np
+from sqlalchemy import func, true
+
+from app.models.baseModel import db
+from app.models.spectrum import Spectrum
+from app.utils.geo import EARTH_RADIUS_KM
+
+# Arrays loaded for each active STL assignment, in load order
+COLUMNS = (
+    'id', 'frequency', 'power', 'gain', 'height', 'latitude', 'longitude')
+# Free space path loss in dB over 1 km at 1 MHz
+PATH_LOSS_DB = 32.44
+# Radio horizon in km of a 1 m high antenna over a 4/3 radius earth
+HORIZON_KM = 4.12
+# Antennas closer than this, in km, are taken to be this far apart
+MIN_DISTANCE_KM = 0.01
+
+
+def load_assignments(band=None):
+    ''' Load the active STL assignments of a band as arrays.
+
+    Returns a dict of the COLUMNS as NumPy arrays sorted by frequency,
+    with NaN for missing values. The STL site's coordinates are used,
+    or the transmitter's when the STL location has none.
+    '''
+    query = db.session.query(
+        Spectrum.id, Spectrum.assigned_stl_frequency,
+        func.coalesce(
+            Spectrum.assigned_stl_power,
+            Spectrum.assigned_transmission_power),
+        Spectrum.authorized_antenna_gain, Spectrum.authorized_antenna_height,
+        func.coalesce(Spectrum.stl_latitude, Spectrum.transmit_latitude),
+        func.coalesce(Spectrum.stl_longitude, Spectrum.transmit_longitude)
+    ).filter(
+        Spectrum.active == true(),
+        Spectrum.assigned_stl_frequency.isnot(None))
+    if band:
+        query = query.filter(
+            func.lower(func.btrim(Spectrum.band_of_operation)) ==
+            band.strip().lower())
+    rows = np.array(
+        query.order_by(Spectrum.assigned_stl_frequency, Spectrum.id).all(),
+        dtype=float).reshape(-1, len(COLUMNS))
+    assignments = dict(zip(COLUMNS, rows.T))
+    assignments['id'] = assignments['id'].astype(np.int64)
+    return assignments
+
+
+def eirp(assignments):
+    ''' Method to get the EIRP of each assignment, gain defaulting to 0 '''
+    return assignments['power'] + np.nan_to_num(assignments['gain'])
+
+
+def occupancy(assignments, width, low=None, high=None, max_bins=None):
+    ''' Count the assignments in each width wide frequency bin.
+
+    Bins are aligned to multiples of width and span low to high, the
+    lowest and highest assigned frequencies by default. Returns the
+    first frequency of each bin, its assignments and the highest EIRP
+    assigned in it (NaN where unknown); raises ValueError past
+    max_bins.
+    '''
+    frequency = assignments['frequency']
+    if low is None:
+        low = frequency.min() if frequency.size else 0
+    if high is None:
+        high = frequency.max() if frequency.size else low
+    if width <= 0 or high < low:
+        raise ValueError('Expected a positive width and low below high')
+    first = np.floor(low / width) * width
+    bins = int((high - first) // width) + 1
+    if max_bins is not None and bins > max_bins:
+        raise ValueError(
+            '{} bins is more than {}, widen the bins'.format(bins, max_bins))
+
+    inside = (frequency >= low) & (frequency <= high)
+    index = ((frequency[inside] - first) // width).astype(np.int64)
+    counts = np.bincount(index, minlength=bins)
+    peak = np.full(bins, np.nan)
+    np.fmax.at(peak, index, eirp(assignments)[inside])
+    return first + width * np.arange(bins), counts, peak
+
+
+def interference(assignments, guard_band, threshold, block_size, limit):
+    ''' Find the pairs of assignments that interfere, worst first.
+
+    Pairs closer in frequency than guard_band and within radio horizon
+    of each other receive each other's EIRP less the free space path
+    loss; the margin is threshold less the stronger of the two. Pairs
+    are compared block_size rows by block_size rows, each block only
+    against the blocks within guard_band of its frequencies, so memory
+    stays bounded by the block size whatever the number of assignments.
+    Returns the pairs compared, the pairs with a negative margin, and
+    the limit worst of those as (first id, second id, separation,
+    distance km, margin dB) tuples.
+    '''
+    located = ~np.isnan(assignments['latitude']) & \
+        ~np.isnan(assignments['longitude']) & \
+        (assignments['frequency'] > 0)
+    ids = assignments['id'][located]
+    frequency = assignments['frequency'][located]
+    power = eirp(assignments)[located]
+    gain = np.nan_to_num(assignments['gain'][located])
+    height = assignments['height'][located]
+    # Unknown heights cannot put a pair out of sight of each other
+    reach = np.where(
+        np.isnan(height), np.inf, HORIZON_KM * np.sqrt(np.abs(height)))
+    latitude = np.radians(assignments['latitude'][located])
+    longitude = np.radians(assignments['longitude'][located])
+    cos_latitude = np.cos(latitude)
+    # Rows from i + 1 up to bound[i] are within the guard band of row i
+    bound = np.searchsorted(frequency, frequency + guard_band, 'left')
+
+    compared, interfering = 0, 0
+    worst = [np.empty(0, dtype=np.int64)] * 2 + [np.empty(0)] * 3
+    for start in range(0, frequency.size, block_size):
+        stop = min(start + block_size, frequency.size)
+        for other in range(start, bound[stop - 1], block_size):
+            rows = np.arange(start, stop)[:, None]
+            columns = np.arange(
+                other, min(other + block_size, bound[stop - 1]))[None, :]
+            first, second = np.nonzero(
+                (columns > rows) & (columns < bound[rows]))
+            first, second = first + start, second + other
+            compared += first.size
+
+            half_chord = np.sin((latitude[second] - latitude[first]) / 2) \
+                ** 2 + cos_latitude[first] * cos_latitude[second] * \
+                np.sin((longitude[second] - longitude[first]) / 2) ** 2
+            distance = 2 * EARTH_RADIUS_KM * np.arcsin(
+                np.sqrt(np.minimum(half_chord, 1)))
+            loss = 20 * np.log10(np.maximum(distance, MIN_DISTANCE_KM)) + \
+                20 * np.log10(frequency[first]) + PATH_LOSS_DB
+            received = np.fmax(
+                power[second] + gain[first], power[first] + gain[second]) \
+                - loss
+            margin = threshold - received
+            harmful = (distance <= reach[first] + reach[second]) & \
+                (margin < 0)
+            interfering += int(np.count_nonzero(harmful))
+
+            worst = [np.concatenate((kept, found[harmful])) for kept, found in
+                     zip(worst, (ids[first], ids[second],
+                                 frequency[second] - frequency[first],
+                                 distance, margin))]
+            if worst[4].size > limit:
+                keep = np.argpartition(worst[4], limit)[:limit]
+                worst = [values[keep] for values in worst]
+
+    order = np.lexsort((worst[1], worst[0], worst[4]))
+    pairs = [
+        (int(first), int(second), float(separation), float(distance),
+         float(margin)) for first, second, separation, distance, margin in
+        zip(*[values[order] for values in worst])]
+    return compared, interfering, pairs
@@ -0,0 +1,67 @@
+from flask import request
+from sqlalchemy import text
+
+from app.models.baseModel import record_writes
+
+ARCHIVE_BATCH = "WITH moved AS (" \
+    "DELETE FROM {table} WHERE id IN (" \
+    "SELECT id FROM {table} WHERE NOT active " \
+    "AND coalesce(date_modified, date_created) < " \
+    "now() - :days * interval '1 day'{unreferenced} " \
+    "ORDER BY id LIMIT :batch FOR UPDATE SKIP LOCKED) " \
+    "RETURNING {columns}) " \
+    "INSERT INTO {archive} ({columns}) SELECT {columns} FROM moved"
+
+
+def include_archived(model):
+    ''' Method to start a model's query, with archived rows on request '''
+    if (request.args.get('include_archived') or '').lower() in (
+            '1', 'true', 'yes'):
+        return model.query.with_archived()
+    return model.query
+
+
+def archive_statement(metadata, table):
+    ''' Method to build the SQL moving one batch of a table's rows '''
+    unreferenced = ''.join(
+        ' AND NOT EXISTS (SELECT 1 FROM {0} WHERE {0}.{1} = {2}.id)'.format(
+            other.name, foreign_key.parent.name, table.name)
+        for other in metadata.sorted_tables
+        for foreign_key in sorted(
+            other.foreign_keys, key=lambda key: key.parent.name)
+        if foreign_key.column.table is table)
+    return text(ARCHIVE_BATCH.format(
+        table=table.name,
+        archive=table.info['archive'].name,
+        columns=', '.join(column.name for column in table.columns),
+        unreferenced=unreferenced))
+
+
+def archive_rows(engine, metadata, retention_days, batch_size, echo=print):
+    ''' Move rows inactive past the retention window to archive tables.
+
+    Each batch is deleted and copied into <table>_archive in one
+    transaction, so an interrupted run loses nothing and the next run
+    carries on where it stopped. Rows still referenced from a live table
+    are kept, and referencing tables are archived first. Returns the
+    number of rows moved from each table.
+    '''
+    moved = {}
+    for table in reversed(metadata.sorted_tables):
+        archive = table.info.get('archive')
+        if archive is None:
+            continue
+        statement = archive_statement(metadata, table)
+        moved[table.name] = 0
+        while True:
+            with engine.begin() as connection:
+                count = connection.execute(
+                    statement, days=retention_days, batch=batch_size
+                ).rowcount
+            if count:
+                moved[table.name] += count
+                record_writes({table.name, archive.name}, engine)
+            if count < batch_size:
+                break
+        echo('archived {} rows of {}'.format(moved[table.name], table.name))
+    return moved
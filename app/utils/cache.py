@@ -0,0 +1,220 @@
+import fcntl
+import hashlib
+import json
+import os
+import time
+from functools import wraps
+
+from flask import Response, current_app, has_app_context, request
+from flask_restplus.utils import unpack
+
+from app.models.user import User
+from app.utils.conditional import set_validators
+from app.utils.lru import LRUCache
+from app.utils.versions import shared_versions
+
+
+class FileSystemBackend(object):
+    ''' Cache shared by every process on a host, one file per entry '''
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(
+            self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as entry:
+                fcntl.flock(entry, fcntl.LOCK_SH)
+                expires, value = json.load(entry)
+        except (IOError, ValueError):
+            return None
+        if expires is not None and expires < time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with open(self._path(key), 'a+') as entry:
+            fcntl.flock(entry, fcntl.LOCK_EX)
+            entry.seek(0)
+            entry.truncate()
+            json.dump([expires, value], entry)
+        self._prune()
+
+    def _prune(self):
+        ''' Method to remove the least recently written entries '''
+        names = os.listdir(self.directory)
+        if len(names) <= self.max_entries:
+            return
+        paths = sorted(
+            (os.path.join(self.directory, name) for name in names),
+            key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+
+
+class RedisBackend(object):
+    ''' Cache shared by every process, on any Redis-protocol server '''
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                'The redis package is needed for the redis response cache')
+        self.client = redis.StrictRedis.from_url(url)
+
+    @property
+    def evictions(self):
+        return int(self.client.info('stats').get('evicted_keys', 0))
+
+    def get(self, key):
+        value = self.client.get('ims:' + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.client.setex('ims:' + key, int(ttl), value)
+        else:
+            self.client.set('ims:' + key, value)
+
+
+def make_backend(config):
+    ''' Method to build the cache backend named by RESPONSE_CACHE_BACKEND '''
+    name = (config.get('RESPONSE_CACHE_BACKEND') or 'none').lower()
+    max_entries = int(config.get('RESPONSE_CACHE_SIZE'))
+    if name == 'lru':
+        return LRUCache(max_entries)
+    if name == 'filesystem':
+        return FileSystemBackend(
+            config.get('RESPONSE_CACHE_DIR'), max_entries)
+    if name == 'redis':
+        return RedisBackend(config.get('RESPONSE_CACHE_URL'))
+    if name == 'none':
+        return None
+    raise ValueError('Unknown response cache backend: {}'.format(name))
+
+
+def source_tables(source):
+    ''' Method to list the tables a model or loader plan reads '''
+    tables = getattr(source, 'tables', None)
+    return tables() if callable(tables) else [source.__tablename__]
+
+
+class CacheState(object):
+    ''' Per application backend and counters of a ResponseCache '''
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+
+class ResponseCache(object):
+    ''' Cache of GET responses, invalidated per table on writes.
+
+    Entries are keyed on the endpoint, its normalized arguments, the
+    requesting user and the shared version of every table the endpoint
+    reads. Committing a write to a table through BaseModel, in any
+    process, moves that table's version on, so every entry built from
+    the table is missed from then on and ages out of the backend.
+    '''
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['response_cache'] = CacheState(
+            make_backend(app.config),
+            float(app.config.get('RESPONSE_CACHE_TTL')))
+
+    @property
+    def state(self):
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('response_cache')
+
+    def stats(self):
+        ''' Method to report the cache's hit, miss and eviction counts '''
+        state = self.state
+        if state is None or state.backend is None:
+            return dict(enabled=False, hits=0, misses=0, evictions=0)
+        return dict(
+            enabled=True,
+            backend=type(state.backend).__name__,
+            hits=state.hits,
+            misses=state.misses,
+            evictions=state.backend.evictions)
+
+    def key(self, tables):
+        ''' Method to build the cache key of the current request '''
+        token = request.headers.get('x-access-token')
+        scope = User.verify_authentication_token(token) if token else None
+        parts = [
+            request.endpoint,
+            sorted((request.view_args or {}).items()),
+            sorted(request.args.items(multi=True)),
+            scope,
+            list(zip(tables, shared_versions.get(tables)))]
+        return 'response:' + hashlib.sha1(
+            json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+    def cached(self, *sources):
+        ''' Decorate a Resource GET so its responses are cached.
+
+        sources are the models or loader plans the response is built from,
+        and decide which table writes invalidate it.
+        '''
+        def decorator(f):
+            tables = []
+
+            @wraps(f)
+            def wrapper(resource, *args, **kwargs):
+                state = self.state
+                if state is None or state.backend is None:
+                    return f(resource, *args, **kwargs)
+                if not tables:
+                    tables.extend(sorted(set(
+                        table for source in sources
+                        for table in source_tables(source))))
+
+                key = self.key(tables)
+                entry = state.backend.get(key)
+                if entry is not None:
+                    state.hits += 1
+                    status, headers, body = json.loads(entry)
+                    return Response(
+                        body, status=status, headers=headers
+                    ).make_conditional(request)
+
+                state.misses += 1
+                response = f(resource, *args, **kwargs)
+                if not isinstance(response, Response):
+                    data, code, headers = unpack(response)
+                    response = resource.api.make_response(
+                        data, code, headers=headers)
+                response = set_validators(response)
+                if response.status_code == 200 and \
+                        not response.is_streamed:
+                    state.backend.set(key, json.dumps([
+                        response.status_code,
+                        list(response.headers.items()),
+                        response.get_data(as_text=True)]), state.ttl)
+                return response
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache()
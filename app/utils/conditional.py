@@ -0,0 +1,78 @@
+import hashlib
+
+from flask import g, request
+from sqlalchemy import func
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import http_date
+
+from app.models.baseModel import db
+
+
+class NotModified(HTTPException):
+    ''' Raised to answer a conditional GET with 304 Not Modified '''
+    code = 304
+    description = 'Not Modified'
+
+    def __init__(self, etag, last_modified=None):
+        super(NotModified, self).__init__()
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def get_headers(self, environ=None):
+        headers = [('ETag', '"{}"'.format(self.etag))]
+        if self.last_modified is not None:
+            headers.append(('Last-Modified', http_date(self.last_modified)))
+        return headers
+
+
+def row_state(query):
+    ''' Method to read the ids and latest change of a query's rows '''
+    model = query.column_descriptions[0]['entity']
+    rows = query.enable_eagerloads(False).with_entities(
+        model.id, model.date_modified).subquery()
+    last_modified, ids = db.session.query(
+        func.max(rows.c.date_modified), func.array_agg(rows.c.id)).one()
+    return ids or [], last_modified
+
+
+def make_etag(ids, last_modified, *extra):
+    ''' Method to derive an ETag from row ids and their last change '''
+    state = [sorted(ids), last_modified and last_modified.isoformat()]
+    return hashlib.sha1(
+        repr(state + list(extra)).encode('utf-8')).hexdigest()
+
+
+def conditional(ids, last_modified, *extra, listing=False):
+    ''' Answer 304 when the client already holds the current response.
+
+    The ETag covers the ids and latest date_modified of the rows in the
+    response, plus anything else it depends on (such as the total), so
+    this can run before any row is marshalled. Otherwise the validators
+    are kept for set_validators to add to the 200 response. A listing
+    gets no Last-Modified: dropping its newest row moves the latest
+    date_modified back, so only the ETag tells its pages apart.
+    '''
+    etag = make_etag(ids, last_modified, *extra)
+    if listing:
+        last_modified = None
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0)
+
+    if request.if_none_match:
+        if request.if_none_match.contains(etag):
+            raise NotModified(etag, last_modified)
+    elif request.if_modified_since and last_modified is not None and \
+            last_modified <= request.if_modified_since.replace(tzinfo=None):
+        raise NotModified(etag, last_modified)
+    g.validators = (etag, last_modified)
+
+
+def set_validators(response):
+    ''' Add the ETag and Last-Modified found by conditional to a response '''
+    validators = g.pop('validators', None)
+    if validators and response.status_code == 200:
+        etag, last_modified = validators
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+    return response
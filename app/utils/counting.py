@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.sql.util import find_tables
+
+from app.models.baseModel import db
+from app.utils.planner import query_plan
+from app.utils.versions import shared_versions
+from instance.config import Config
+
+COUNT_STRATEGIES = ('exact', 'cached', 'estimate')
+
+_counts = OrderedDict()
+_counts_lock = threading.Lock()
+
+
+def cached_count(query):
+    ''' Count a query, reusing earlier counts of the same query.
+
+    A cached count is kept until one of the tables the query reads is
+    written through BaseModel, by this process or another, or it is
+    older than COUNT_CACHE_TTL seconds.
+    '''
+    statement = query.statement
+    compiled = statement.compile(dialect=db.session.bind.dialect)
+    tables = sorted({table.name for table in find_tables(statement)})
+    versions = tuple(zip(tables, shared_versions.get(tables)))
+    key = (str(compiled), repr(sorted(compiled.params.items())), versions)
+    now = time.time()
+
+    with _counts_lock:
+        if key in _counts and _counts[key][1] > now:
+            _counts.move_to_end(key)
+            return _counts[key][0]
+
+    total = query.count()
+    with _counts_lock:
+        _counts[key] = (total, now + float(Config.COUNT_CACHE_TTL))
+        _counts.move_to_end(key)
+        while len(_counts) > int(Config.COUNT_CACHE_SIZE):
+            _counts.popitem(last=False)
+    return total
+
+
+def estimated_count(query):
+    ''' Read the planner's row estimate for a query instead of counting '''
+    return int(query_plan(query)['Plan Rows'])
+
+
+def count_rows(query, strategy='exact'):
+    ''' Count the rows of a query using one of COUNT_STRATEGIES '''
+    if strategy not in COUNT_STRATEGIES:
+        raise ValueError('Unknown count strategy: {}'.format(strategy))
+    query = query.enable_eagerloads(False).order_by(None)
+    if strategy == 'estimate':
+        return estimated_count(query)
+    if strategy == 'cached':
+        return cached_count(query)
+    return query.count()
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+
+from flask import Response, request, stream_with_context
+from flask_restplus import abort
+from instance.config import Config
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def columns(fields, prefix=''):
+    ''' Method to list the flattened column names of a fields model '''
+    fields = getattr(fields, 'resolved', fields)
+    for key, field in fields.items():
+        nested = field if isinstance(field, dict) else \
+            getattr(field, 'nested', None)
+        if nested is not None:
+            for column in columns(nested, prefix + key + '.'):
+                yield column
+        else:
+            yield prefix + key
+
+
+def flatten(record, prefix=''):
+    ''' Method to flatten a serialized record into dotted columns '''
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for item in flatten(value, prefix + key + '.'):
+                yield item
+        else:
+            yield prefix + key, value
+
+
+def export_response(query, fields, serializer, name):
+    ''' Stream every row of a query as NDJSON or CSV.
+
+    Rows are pulled through a server side cursor in batches of
+    EXPORT_CHUNK_SIZE and written out chunk by chunk, so memory use does
+    not grow with the size of the table.
+    '''
+    export_format = (request.args.get('format') or 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return abort(
+            400,
+            message='Export format must be one of: {}'.format(
+                ', '.join(sorted(EXPORT_FORMATS))))
+    chunk_size = int(Config.EXPORT_CHUNK_SIZE)
+    rows = query.execution_options(stream_results=True).yield_per(chunk_size)
+    header = list(columns(fields))
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(header)
+        for index, row in enumerate(rows, 1):
+            record = serializer(row)
+            if export_format == 'csv':
+                values = dict(flatten(record))
+                writer.writerow([values.get(column) for column in header])
+            else:
+                buffer.write(json.dumps(record) + '\n')
+            if index % chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            'Content-Disposition': 'attachment; filename={}.{}'.format(
+                name, export_format)
+        })
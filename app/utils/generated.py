@@ -0,0 +1,38 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateColumn
+
+
+def build_generated_columns(engine, metadata, echo=print):
+    ''' Turn plain copies of the models' generated columns into generated.
+
+    Alembic does not render GENERATED ALWAYS AS, so `db migrate` adds a
+    generated column as a plain one that is never filled. Each such
+    column is dropped and added back as generated, which computes it
+    for every row; the table is locked while it is rewritten. Run this
+    before `create_indexes`, which rebuilds the indexes dropped with it.
+    Constraints declared as DDL on the table are added back here.
+    '''
+    preparer = engine.dialect.identifier_preparer
+    for table in metadata.sorted_tables:
+        for column in table.columns:
+            if not column.info.get('generated'):
+                continue
+            generated = engine.execute(
+                "SELECT attgenerated FROM pg_attribute "
+                "WHERE attrelid = to_regclass(%s) AND attname = %s",
+                (preparer.format_table(table), column.name)).scalar()
+            if generated == 's':
+                continue
+            sql = 'ALTER TABLE {} DROP COLUMN IF EXISTS {}, ADD COLUMN {}'.\
+                format(
+                    preparer.format_table(table),
+                    preparer.format_column(column),
+                    str(CreateColumn(column).compile(
+                        dialect=postgresql.dialect())).strip())
+            echo(sql)
+            with engine.begin() as connection:
+                connection.execute(sql)
+                # Constraints on the column went with it; the table's
+                # after_create DDL adds them back
+                table.dispatch.after_create(
+                    table, connection, checkfirst=True, _ddl_runner=None)
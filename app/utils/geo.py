@@ -0,0 +1,55 @@
+import math
+import re
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# A latitude and longitude in decimal degrees, signed or with hemispheres
+COORDINATES = re.compile(
+    r'(?<![\d.])(?P<lat>[-+]?\d{1,2}(?:\.\d+)?)\s*°?\s*(?P<ns>[NS])?'
+    r'\s*[,;/\s]\s*'
+    r'(?P<lon>[-+]?\d{1,3}(?:\.\d+)?)(?![\d.])\s*°?\s*(?P<ew>[EW])?',
+    re.IGNORECASE)
+
+
+def parse_coordinates(text):
+    ''' Method to read the (latitude, longitude) written in a location.
+
+    Returns None for text holding no coordinates. Whole numbers only
+    count as coordinates with hemispheres, so plot and road numbers
+    are not taken for them.
+    '''
+    for match in COORDINATES.finditer(text or ''):
+        latitude, longitude = match.group('lat'), match.group('lon')
+        hemispheres = match.group('ns') and match.group('ew')
+        if not hemispheres and '.' not in latitude + longitude:
+            continue
+        latitude, longitude = float(latitude), float(longitude)
+        if (match.group('ns') or '').upper() == 'S':
+            latitude = -latitude
+        if (match.group('ew') or '').upper() == 'W':
+            longitude = -longitude
+        if abs(latitude) <= 90 and abs(longitude) <= 180:
+            return latitude, longitude
+    return None
+
+
+def parse_point(text):
+    ''' Method to read a "lat,lon" query argument, raising ValueError '''
+    try:
+        latitude, longitude = [float(part) for part in text.split(',')]
+    except (AttributeError, ValueError):
+        raise ValueError('Expected latitude,longitude: {}'.format(text))
+    if abs(latitude) > 90 or abs(longitude) > 180:
+        raise ValueError('Coordinates out of range: {}'.format(text))
+    return latitude, longitude
+
+
+def bounding_box(latitude, longitude, radius_km):
+    ''' Method to get the (south, west, north, east) box around a circle '''
+    spread = radius_km / KM_PER_DEGREE
+    # Meridians converge towards the poles, widening the box in longitude
+    width = spread / max(math.cos(math.radians(latitude)), 0.01)
+    return (
+        max(latitude - spread, -90), max(longitude - width, -180),
+        min(latitude + spread, 90), min(longitude + width, 180))
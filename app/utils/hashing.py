@@ -0,0 +1,210 @@
+import fcntl
+import os
+import random
+import threading
+import time
+
+import bcrypt
+
+from instance.config import Config
+
+
+# bcrypt accepts costs from 4 to 31; past 16 a hash takes seconds
+MIN_ROUNDS, MAX_ROUNDS = 4, 16
+# Seconds between a queued hash's attempts to take a free slot
+POLL_INTERVAL = 0.01
+
+
+class HashingPoolBusy(Exception):
+    ''' Raised when the password hashing queue is full '''
+    pass
+
+
+def _hash(password, rounds):
+    ''' Method to generate a bcrypt hash of password at a cost '''
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+    return hashed.decode('utf-8')
+
+
+def _verify(password_hash, password):
+    ''' Method to check a password against a bcrypt hash '''
+    try:
+        return bcrypt.checkpw(
+            password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+def hash_rounds(password_hash):
+    ''' Method to read the cost a bcrypt hash was generated with '''
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def time_hash(rounds, samples=3):
+    ''' Method to time one bcrypt hash at a cost, in milliseconds '''
+    timings = []
+    for _ in range(samples):
+        started = time.time()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+        timings.append((time.time() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(budget_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS):
+    ''' Find the highest bcrypt cost that hashes within budget_ms.
+
+    Returns the chosen cost and the median time measured at each cost
+    tried. Every extra round doubles the work, so measuring stops at the
+    first cost over budget.
+    '''
+    chosen, timings = min_rounds, {}
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = time_hash(rounds)
+        if timings[rounds] > budget_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def hashing_bounds(pool_size, queue_limit, workers, reserved):
+    ''' Fit the hashing slots and queue into the workers not reserved.
+
+    A running or queued hash holds a sync request worker, so together
+    they are kept to the workers of the host less the reserved ones,
+    which stay free for other endpoints. One hash may run whatever the
+    reserve. A pool size of 0 is left without a bound.
+    '''
+    if not pool_size:
+        return 0, queue_limit
+    hashing = max(workers - reserved, 1)
+    pool_size = min(pool_size, hashing)
+    return pool_size, min(queue_limit, hashing - pool_size)
+
+
+class PasswordHasher(object):
+    ''' Bounds the bcrypt work of every process on a host.
+
+    Hashing is CPU bound for hundreds of milliseconds, so a burst of
+    logins would take every request worker and the host's CPU with it.
+    A hash runs in the process asking for it while holding one of
+    BCRYPT_POOL_SIZE lock files in BCRYPT_LOCK_DIR, shared by all the
+    gunicorn workers of the host, so at most that many run at once. At
+    most BCRYPT_QUEUE_LIMIT more wait for one, each holding a queue
+    lock file; past that HashingPoolBusy is raised straight away rather
+    than queueing. A pool size of 0 hashes without a bound. The bounds
+    are fitted to the host's workers by hashing_bounds.
+    '''
+
+    def __init__(self, workers, queue_limit, directory):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.directory = directory
+        self._lock = threading.Lock()
+        # Hashes of this process waiting for a slot
+        self.depth = 0
+        self.max_depth = 0
+        self.jobs = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _slot(self, kind, index):
+        ''' Method to open the lock file of one slot '''
+        os.makedirs(self.directory, exist_ok=True)
+        return open(os.path.join(
+            self.directory, '{}-{}.lock'.format(kind, index)), 'a')
+
+    def _acquire(self, kind, count):
+        ''' Lock a free one of count slots, or return None.
+
+        Counting the slots locks each for an instant, so every slot is
+        tried a second time before giving up.
+        '''
+        order = random.sample(range(count), count)
+        for index in order + order:
+            slot = self._slot(kind, index)
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot
+            except OSError:
+                slot.close()
+        return None
+
+    def _held(self, kind, count):
+        ''' Method to count the slots some process holds '''
+        held = 0
+        for index in range(count):
+            with self._slot(kind, index) as slot:
+                try:
+                    fcntl.flock(slot, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                except OSError:
+                    held += 1
+        return held
+
+    def run(self, job, *args):
+        ''' Method to run a hashing job and record its queue wait '''
+        submitted = time.time()
+        slot = self._acquire('work', self.workers) if self.workers else None
+        if self.workers and slot is None:
+            queued = self._acquire('queue', self.queue_limit)
+            if queued is None:
+                with self._lock:
+                    self.rejected += 1
+                raise HashingPoolBusy('Password hashing queue is full')
+            with self._lock:
+                self.depth += 1
+                self.max_depth = max(self.max_depth, self.depth)
+            try:
+                while slot is None:
+                    time.sleep(POLL_INTERVAL)
+                    slot = self._acquire('work', self.workers)
+            finally:
+                queued.close()
+                with self._lock:
+                    self.depth -= 1
+        wait = time.time() - submitted
+        try:
+            result = job(*args)
+        finally:
+            if slot is not None:
+                slot.close()
+        with self._lock:
+            self.jobs += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        return result
+
+    def hash(self, password, rounds):
+        ''' Method to generate a bcrypt hash of password '''
+        return self.run(_hash, password, rounds)
+
+    def verify(self, password_hash, password):
+        ''' Method to check password against a bcrypt hash '''
+        return self.run(_verify, password_hash, password)
+
+    def stats(self):
+        ''' Report the host's running and queued hashes.
+
+        The largest queue, jobs, rejections and waits are this process's.
+        '''
+        with self._lock:
+            return dict(
+                workers=self.workers,
+                queue_limit=self.queue_limit,
+                running=self._held('work', self.workers),
+                queue_depth=self._held('queue', self.queue_limit),
+                max_queue_depth=self.max_depth,
+                jobs=self.jobs,
+                rejected=self.rejected,
+                average_wait=self.total_wait / self.jobs if self.jobs else 0,
+                max_wait=self.max_wait)
+
+
+password_hasher = PasswordHasher(
+    *hashing_bounds(
+        int(Config.BCRYPT_POOL_SIZE), int(Config.BCRYPT_QUEUE_LIMIT),
+        int(Config.WEB_CONCURRENCY), int(Config.BCRYPT_RESERVED_WORKERS)),
+    directory=Config.BCRYPT_LOCK_DIR)
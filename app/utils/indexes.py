@@ -0,0 +1,121 @@
+import re
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.schema import CreateIndex
+
+from app.models.baseModel import create_extensions, needs_missing_extension
+
+# SQLSTATEs of an index on a table or column not migrated yet
+UNDEFINED_TABLE, UNDEFINED_COLUMN = '42P01', '42703'
+
+
+def concurrent_statements(metadata):
+    ''' Method to list (name, SQL) building each declared index online '''
+    statements = []
+    for table in metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            sql = str(CreateIndex(index).compile(
+                dialect=postgresql.dialect())).strip()
+            statements.append((index.name, re.sub(
+                r'^CREATE (UNIQUE )?INDEX',
+                r'CREATE \1INDEX CONCURRENTLY IF NOT EXISTS', sql)))
+    return statements
+
+
+def build_indexes(engine, metadata, echo=print):
+    ''' Create every declared index without locking out writes.
+
+    CREATE INDEX CONCURRENTLY cannot run in a transaction, so each index
+    is built on an autocommit connection. A concurrent build that failed
+    leaves an invalid index behind; those are dropped and rebuilt.
+    Indexes that already exist are skipped, so this can be rerun, and
+    run before `db migrate` so the migration finds nothing left to add.
+    Indexes on tables or columns the migration has yet to add are
+    skipped then; run it again after `db upgrade` to build them, and
+    the expression indexes Alembic leaves out. The extensions indexes
+    need are created first where the server provides them; indexes
+    needing one it lacks are skipped.
+    '''
+    connection = engine.connect().execution_options(
+        isolation_level='AUTOCOMMIT')
+    try:
+        create_extensions(connection)
+        deferred = {
+            index.name for table in metadata.sorted_tables
+            for index in table.indexes
+            if needs_missing_extension(index, connection)}
+        invalid = {row.name for row in connection.execute(
+            "SELECT c.relname AS name FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid")}
+        for name, sql in concurrent_statements(metadata):
+            if name in deferred:
+                echo('skipping index {}, its extension is missing'.format(
+                    name))
+                continue
+            if name in invalid:
+                echo('dropping invalid index {}'.format(name))
+                connection.execute(
+                    'DROP INDEX CONCURRENTLY IF EXISTS {}'.format(name))
+            echo(sql)
+            try:
+                connection.execute(sql)
+            except ProgrammingError as error:
+                if getattr(error.orig, 'pgcode', None) not in (
+                        UNDEFINED_TABLE, UNDEFINED_COLUMN):
+                    raise
+                echo('skipping index {}, its table is not migrated'.format(
+                    name))
+    finally:
+        connection.close()
+
+
+def index_report(engine, metadata):
+    ''' Report unused and missing indexes from the statistics views.
+
+    unused lists indexes never scanned since statistics were last reset,
+    other than those enforcing a primary key or unique constraint.
+    missing lists declared indexes absent from the database, foreign
+    keys no index leads with, and tables read mostly by sequential scans.
+    '''
+    unused = [dict(row) for row in engine.execute(
+        "SELECT s.relname AS table, s.indexrelname AS index, "
+        "pg_relation_size(s.indexrelid) AS size "
+        "FROM pg_stat_user_indexes s "
+        "JOIN pg_index i ON i.indexrelid = s.indexrelid "
+        "WHERE s.idx_scan = 0 AND NOT i.indisunique "
+        "ORDER BY size DESC, s.indexrelname")]
+
+    existing = {row.indexname for row in engine.execute(
+        "SELECT indexname FROM pg_indexes "
+        "WHERE schemaname = current_schema()")}
+    undeclared = [
+        dict(table=table.name, index=index.name)
+        for table in metadata.sorted_tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+        if index.name not in existing]
+
+    unindexed_foreign_keys = [dict(row) for row in engine.execute(
+        "SELECT c.conrelid::regclass::text AS table, a.attname AS column "
+        "FROM pg_constraint c "
+        "JOIN pg_attribute a "
+        "ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1] "
+        "WHERE c.contype = 'f' AND NOT EXISTS ("
+        "SELECT 1 FROM pg_index i WHERE i.indrelid = c.conrelid "
+        "AND i.indkey[0] = c.conkey[1]) "
+        "ORDER BY 1, 2")]
+
+    sequential_scans = [dict(row) for row in engine.execute(
+        "SELECT relname AS table, seq_scan, seq_tup_read, "
+        "coalesce(idx_scan, 0) AS idx_scan, n_live_tup AS rows "
+        "FROM pg_stat_user_tables "
+        "WHERE seq_scan > coalesce(idx_scan, 0) AND n_live_tup > 1000 "
+        "ORDER BY seq_tup_read DESC")]
+
+    return dict(
+        unused=unused,
+        missing=dict(
+            declared=undeclared,
+            foreign_keys=unindexed_foreign_keys,
+            sequential_scans=sequential_scans))
@@ -0,0 +1,139 @@
+import threading
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+from sqlalchemy import func, true
+
+from app.models.baseModel import db, table_versions
+from app.models.numbering import Numbering
+from instance.config import Config
+
+# Rows modified this long before the last one seen are read again, so a
+# transaction committing after a later one is not missed
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class NumberIndex(object):
+    ''' Sorted interval array of the numbers held by numbering records.
+
+    Each active record holds the block from assigned_number over
+    assigned_range numbers; a prefix is the block of every number it
+    starts. The blocks are kept sorted by first number, with the
+    furthest number reached so far, so the block holding a number is
+    found by bisection. The index is brought up to date before a lookup
+    once the numbering table was written through BaseModel or
+    NUMBER_INDEX_TTL seconds passed, reading only the rows modified
+    since the last update and rebuilding when rows went missing. Ids
+    only grow, so rows deleted and inserted between two updates change
+    the sum of the active ids even when they leave the count alone.
+    '''
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._id_sum = 0
+        self._arrays = ([], [], [])
+        self._watermark = None
+        self._version = None
+        self._checked = 0
+        self.builds = 0
+        self.updates = 0
+
+    def reset(self):
+        ''' Method to drop the index so the next lookup rebuilds it '''
+        with self._lock:
+            self._watermark = self._version = None
+
+    def _rows(self):
+        ''' Method to query the numbering rows as index entries '''
+        return db.session.query(
+            Numbering.id, Numbering.assigned_number,
+            Numbering.assigned_range, Numbering.service_provider_id,
+            Numbering.active, Numbering.date_modified).filter(
+                Numbering.assigned_number.isnot(None))
+
+    def _apply(self, rows):
+        ''' Method to store the blocks of rows, dropping inactive ones '''
+        for row in rows:
+            if self._blocks.pop(row.id, None) is not None:
+                self._id_sum -= row.id
+            if row.active:
+                last = row.assigned_number + max(
+                    row.assigned_range or 1, 1) - 1
+                self._blocks[row.id] = (
+                    row.assigned_number, last, row.id,
+                    row.service_provider_id)
+                self._id_sum += row.id
+            if row.date_modified and (
+                    self._watermark is None or
+                    row.date_modified > self._watermark):
+                self._watermark = row.date_modified
+
+    def _publish(self):
+        ''' Method to swap in sorted arrays of the current blocks '''
+        blocks = sorted(self._blocks.values())
+        reach, furthest = [], None
+        for block in blocks:
+            furthest = block[1] if furthest is None else max(
+                furthest, block[1])
+            reach.append(furthest)
+        self._arrays = ([block[0] for block in blocks], blocks, reach)
+
+    def refresh(self):
+        ''' Method to bring the index up to date with the numbering table '''
+        with self._lock:
+            version = table_versions[Numbering.__tablename__]
+            now = time.time()
+            if self._version == version and now < self._checked + self.ttl:
+                return
+            if self._watermark is None:
+                self._blocks, self._id_sum = {}, 0
+                self._apply(self._rows().filter(Numbering.active == true()))
+                self.builds += 1
+            else:
+                self._apply(self._rows().filter(
+                    Numbering.date_modified >=
+                    self._watermark - SYNC_OVERLAP))
+                active = self._rows().filter(
+                    Numbering.active == true()).with_entities(
+                        func.count(Numbering.id),
+                        func.coalesce(func.sum(Numbering.id), 0)).one()
+                if tuple(active) != (len(self._blocks), self._id_sum):
+                    # Deleted rows leave no trace to read
+                    self._watermark = None
+                    self._blocks, self._id_sum = {}, 0
+                    self._apply(self._rows().filter(
+                        Numbering.active == true()))
+                    self.builds += 1
+                else:
+                    self.updates += 1
+            self._publish()
+            self._version, self._checked = version, now
+
+    def holder(self, number):
+        ''' Method to find the (first, last, id, provider) block of number '''
+        starts, blocks, reach = self._arrays
+        position = bisect_right(starts, number) - 1
+        while position >= 0 and reach[position] >= number:
+            if blocks[position][1] >= number:
+                return blocks[position]
+            position -= 1
+        return None
+
+    def lookup(self, numbers):
+        ''' Method to find the block holding each of numbers '''
+        self.refresh()
+        return [self.holder(number) for number in numbers]
+
+    def stats(self):
+        ''' Method to report the size and refreshes of the index '''
+        return dict(
+            blocks=len(self._arrays[1]),
+            builds=self.builds,
+            updates=self.updates,
+            ttl=self.ttl)
+
+
+number_index = NumberIndex(float(Config.NUMBER_INDEX_TTL))
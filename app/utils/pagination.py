@@ -0,0 +1,164 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from flask import request, url_for
+from flask_restplus import abort
+from flask_sqlalchemy import Pagination
+from sqlalchemy import asc, desc, tuple_
+
+from app.utils.conditional import conditional, row_state
+from app.utils.counting import COUNT_STRATEGIES, count_rows
+from instance.config import Config
+
+CURSOR_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+CursorPage = namedtuple(
+    'CursorPage', ['items', 'next_cursor', 'prev_cursor', 'total'])
+
+
+def encode_cursor(row, reverse=False):
+    ''' Method to create an opaque cursor pointing at the given row '''
+    position = [
+        row.date_created.strftime(CURSOR_DATE_FORMAT), row.id, reverse]
+    return base64.urlsafe_b64encode(
+        json.dumps(position).encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor):
+    ''' Method to read the (date_created, id, reverse) stored in a cursor '''
+    try:
+        date_created, row_id, reverse = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8'))
+        return (
+            datetime.strptime(date_created, CURSOR_DATE_FORMAT),
+            int(row_id),
+            bool(reverse))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor: {}'.format(cursor))
+
+
+def count_strategy(default=None):
+    ''' Method to read the requested count strategy from ?count= '''
+    strategy = (request.args.get('count') or '').lower()
+    if strategy in ('1', 'true', 'yes'):
+        return Config.COUNT_STRATEGY
+    if not strategy:
+        return default
+    if strategy not in COUNT_STRATEGIES:
+        return abort(
+            400,
+            message='Count must be one of: {}'.format(
+                ', '.join(COUNT_STRATEGIES)))
+    return strategy
+
+
+def page_arguments():
+    ''' Method to read ?page= and ?limit=, capping the limit at 100 '''
+    try:
+        page = int(request.args.get('page') or 1)
+        limit = int(request.args.get('limit') or Config.MAX_PAGE_SIZE)
+    except ValueError:
+        return abort(400, message='Page and Limit must be integers')
+    if limit < 1 or page < 1:
+        return abort(400, message='Page or Limit cannot be negative values')
+    return page, min(limit, 100)
+
+
+class CountedPagination(Pagination):
+    ''' A page of results along with the strategy used to count them '''
+
+    def __init__(self, query, page, per_page, total, items, count_strategy):
+        super(CountedPagination, self).__init__(
+            query, page, per_page, total, items)
+        self.count_strategy = count_strategy
+
+
+def paginate(query, page, per_page):
+    ''' Fetch one page of a query, counting it as ?count= asks.
+
+    A short first page is its own exact total, so no count is run for it.
+    Otherwise the total comes from the requested strategy, and is never
+    less than the rows already seen, since an estimate can fall short.
+    The ids on the page are read first, so a conditional request for an
+    unchanged page is answered before any row is loaded.
+    '''
+    strategy = count_strategy(Config.COUNT_STRATEGY)
+    page_query = query.limit(per_page).offset((page - 1) * per_page)
+    ids, last_modified = row_state(page_query)
+    if not ids and page != 1:
+        return abort(404)
+
+    seen = (page - 1) * per_page + len(ids)
+    if page == 1 and len(ids) < per_page:
+        total, strategy = seen, 'exact'
+    else:
+        total = max(count_rows(query, strategy), seen)
+    conditional(ids, last_modified, total, strategy, listing=True)
+    return CountedPagination(
+        query, page, per_page, total, page_query.all(), strategy)
+
+
+def cursor_paginate(query, model, cursor, per_page, count=None):
+    ''' Page through a query on (date_created, id), newest first.
+
+    Each page is a single index range scan that seeks straight to the
+    cursor position, so deep pages cost the same as the first one. The
+    total is only counted when a count strategy is given.
+    '''
+    reverse = False
+    total = count_rows(query, count) if count else None
+    query = query.order_by(None)
+
+    if cursor:
+        date_created, row_id, reverse = decode_cursor(cursor)
+        key = tuple_(model.date_created, model.id)
+        position = tuple_(date_created, row_id)
+        query = query.filter(key > position if reverse else key < position)
+
+    order = asc if reverse else desc
+    rows = query.order_by(
+        order(model.date_created), order(model.id)).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if reverse:
+        rows.reverse()
+
+    has_next = True if reverse else has_more
+    has_prev = has_more if reverse else bool(cursor)
+    next_cursor = encode_cursor(rows[-1]) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0], True) if rows and has_prev else None
+    return CursorPage(rows, next_cursor, prev_cursor, total)
+
+
+def cursor_page(query, model, cursor, per_page, endpoint, serializer):
+    ''' Method to build the response body for a cursor paginated listing '''
+    count = count_strategy()
+    try:
+        paged = cursor_paginate(query, model, cursor, per_page, count=count)
+    except ValueError as e:
+        return abort(400, message=str(e))
+
+    modified = [row.date_modified for row in paged.items if row.date_modified]
+    conditional(
+        [row.id for row in paged.items], max(modified) if modified else None,
+        paged.total, count, listing=True)
+    results = dict(
+        data=serializer(paged.items),
+        per_page=per_page,
+        next_cursor=paged.next_cursor,
+        prev_cursor=paged.prev_cursor)
+    if paged.total is not None:
+        results['total_data'] = paged.total
+        results['count_strategy'] = count
+
+    arguments = request.args.to_dict()
+    arguments['limit'] = per_page
+    if paged.next_cursor:
+        arguments['cursor'] = paged.next_cursor
+        results['next_page'] = url_for(endpoint, **arguments)
+    if paged.prev_cursor:
+        arguments['cursor'] = paged.prev_cursor
+        results['prev_page'] = url_for(endpoint, **arguments)
+    return results
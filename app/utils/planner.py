@@ -0,0 +1,26 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.models.baseModel import db
+
+
+class Explain(Executable, ClauseElement):
+    ''' An EXPLAIN of a select statement, returning the plan as JSON '''
+
+    def __init__(self, statement, analyze=False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, 'postgresql')
+def compile_explain(element, compiler, **kw):
+    options = 'ANALYZE, FORMAT JSON' if element.analyze else 'FORMAT JSON'
+    return 'EXPLAIN ({}) {}'.format(
+        options, compiler.process(element.statement, **kw))
+
+
+def query_plan(query, analyze=False):
+    ''' Method to get the root node of the planner's plan for a query '''
+    statement = getattr(query, 'statement', query)
+    result = db.session.execute(Explain(statement, analyze)).scalar()
+    return result[0]['Plan']
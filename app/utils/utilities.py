@@ -17,6 +17,6 @@ def verify_token(token=None):
     token = request.headers.get('x-access-token') or ''
     user_id = User.verify_authentication_token(token)
     if user_id:
-        g.user = User.query.filter_by(id=user_id).first()
-        return True
+        g.user = User.cached(user_id)
+        return g.user is not None
     return False
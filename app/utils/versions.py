@@ -0,0 +1,37 @@
+import threading
+import time
+
+from app.models.baseModel import TableVersion, db, table_versions
+from instance.config import Config
+
+
+class SharedVersions(object):
+    ''' Table versions as counted in the database by every process.
+
+    Caches that outlive a request check their entries against these,
+    so a write committed by any worker invalidates them everywhere. The
+    counts are read at most once every ttl seconds, or at once after
+    this process commits a write, so another worker's write shows up
+    within ttl seconds without a query per cache lookup.
+    '''
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._local = None
+        self._checked = 0
+
+    def get(self, tables):
+        ''' Method to get the current version of each of tables '''
+        with self._lock:
+            local = sum(table_versions.values())
+            now = time.time()
+            if self._local != local or now >= self._checked + self.ttl:
+                self._versions = dict(db.session.query(
+                    TableVersion.name, TableVersion.version).all())
+                self._local, self._checked = local, now
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+
+shared_versions = SharedVersions(float(Config.TABLE_VERSION_TTL))
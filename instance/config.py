@@ -9,12 +9,63 @@ class Config(object):
     __SECRET = 'HeathLEDGERwasTHEBESTidc'
     # database with host configuration removed. Defaults to machine localhost
     __DB_NAME = os.getenv('DATABASE_URL') or "postgresql://localhost/shiftk3y"
-    BCRYPT_LOG_ROUNDS = 13
+    # Pick with `python manage.py calibrate_bcrypt`
+    BCRYPT_LOG_ROUNDS = os.getenv('BCRYPT_LOG_ROUNDS') or 13
+    # Time one password hash may take on login, in milliseconds
+    BCRYPT_LOGIN_BUDGET = os.getenv('BCRYPT_LOGIN_BUDGET') or 250
+    # Request workers of a host, read by gunicorn as well
+    WEB_CONCURRENCY = os.getenv('WEB_CONCURRENCY') or 1
+    # Request workers never held by a hash, left for other endpoints
+    BCRYPT_RESERVED_WORKERS = os.getenv('BCRYPT_RESERVED_WORKERS') or 1
+    # Hashes run at once by all the workers of a host (0 for no bound)
+    BCRYPT_POOL_SIZE = os.getenv('BCRYPT_POOL_SIZE') or 2
+    # Hashes allowed to wait for a slot before logins are turned away;
+    # with the running ones, at most the workers that are not reserved
+    BCRYPT_QUEUE_LIMIT = os.getenv('BCRYPT_QUEUE_LIMIT') or 16
+    # Lock files the workers of a host share the hashing slots through
+    BCRYPT_LOCK_DIR = os.getenv('BCRYPT_LOCK_DIR') or '/tmp/ims_bcrypt'
     SECRET_KEY = os.getenv('SECRET') or __SECRET
     AUTH_TOKEN_DURATION = os.getenv('TOKEN_DURATION') or 3000
+    USER_CACHE_SIZE = os.getenv('USER_CACHE_SIZE') or 1000  # Users kept
+    USER_CACHE_TTL = os.getenv('USER_CACHE_TTL') or 60  # Seconds
     SQLALCHEMY_DATABASE_URI = __DB_NAME
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     MAX_PAGE_SIZE = os.getenv('MAX_PAGE_SIZE') or 30  # Maximum results per page    
+    EXPORT_CHUNK_SIZE = os.getenv('EXPORT_CHUNK_SIZE') or 500  # Rows per chunk
+    # exact, cached or estimate, used when ?count= is not given
+    COUNT_STRATEGY = os.getenv('COUNT_STRATEGY') or 'exact'
+    COUNT_CACHE_TTL = os.getenv('COUNT_CACHE_TTL') or 300  # Seconds
+    COUNT_CACHE_SIZE = os.getenv('COUNT_CACHE_SIZE') or 1000  # Queries kept
+    # Seconds a process may serve cached data after another one writes it
+    TABLE_VERSION_TTL = os.getenv('TABLE_VERSION_TTL') or 1
+    # lru, filesystem, redis or none
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND') or 'lru'
+    RESPONSE_CACHE_SIZE = os.getenv('RESPONSE_CACHE_SIZE') or 1000  # Entries
+    RESPONSE_CACHE_TTL = os.getenv('RESPONSE_CACHE_TTL') or 300  # Seconds
+    RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR') or '/tmp/ims_cache'
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL') or \
+        'redis://localhost:6379/0'
+    # Days a row stays inactive before `manage.py archive` moves it
+    ARCHIVE_RETENTION_DAYS = os.getenv('ARCHIVE_RETENTION_DAYS') or 90
+    ARCHIVE_BATCH_SIZE = os.getenv('ARCHIVE_BATCH_SIZE') or 500  # Rows
+    ARCHIVE_INTERVAL = os.getenv('ARCHIVE_INTERVAL') or 3600  # Seconds
+    # Seconds a process may answer number lookups before rereading writes
+    NUMBER_INDEX_TTL = os.getenv('NUMBER_INDEX_TTL') or 5
+    NUMBER_LOOKUP_LIMIT = os.getenv('NUMBER_LOOKUP_LIMIT') or 10000  # Numbers
+    # Closest two frequencies may be in one area, in assigned_stl_frequency
+    # units
+    SPECTRUM_GUARD_BAND = os.getenv('SPECTRUM_GUARD_BAND') or 200
+    # Radius of ?near= spectrum searches given no radius_km, in kilometres
+    SPECTRUM_NEAR_RADIUS_KM = os.getenv('SPECTRUM_NEAR_RADIUS_KM') or 20
+    # Rows a side of the tiles spectrum interference is computed in
+    SPECTRUM_ANALYTICS_BLOCK_SIZE = \
+        os.getenv('SPECTRUM_ANALYTICS_BLOCK_SIZE') or 512
+    SPECTRUM_OCCUPANCY_MAX_BINS = \
+        os.getenv('SPECTRUM_OCCUPANCY_MAX_BINS') or 10000  # Bins
+    # Strongest interference a receiver tolerates in dBm, reading
+    # frequencies as MHz, powers as dBm and antenna gains as dBi
+    SPECTRUM_INTERFERENCE_THRESHOLD = \
+        os.getenv('SPECTRUM_INTERFERENCE_THRESHOLD') or -90
 
 class DevelopmentConfig(Config):
     """Configurations for Development"""
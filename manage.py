@@ -1,7 +1,16 @@
 import os
+import time
 from flask_script import Manager
 from flask_migrate import Migrate, MigrateCommand
 from app import db, create_app
+from app.models import baseModel
+from app.models.baseModel import BaseModel
+from app.models.number_block import NumberBlock
+from app.models.spectrum import Spectrum
+from app.utils.archive import archive_rows
+from app.utils.generated import build_generated_columns
+from app.utils.hashing import calibrate
+from app.utils.indexes import build_indexes, index_report
 
 config_name = os.getenv('APP_SETTINGS') or 'development'
 
@@ -11,5 +20,98 @@ manager = Manager(app)
 
 manager.add_command('db', MigrateCommand)
 
+
+@manager.option(
+    '-b', '--budget', dest='budget', default=None,
+    help='Milliseconds one password hash may take (BCRYPT_LOGIN_BUDGET)')
+def calibrate_bcrypt(budget=None):
+    ''' Pick the highest bcrypt cost that fits the login latency budget '''
+    budget = float(budget or app.config['BCRYPT_LOGIN_BUDGET'])
+    rounds, timings = calibrate(budget)
+    for cost, elapsed in sorted(timings.items()):
+        print('cost {:>2}: {:8.1f} ms'.format(cost, elapsed))
+    print('Highest cost within {:.0f} ms: {}'.format(budget, rounds))
+    print('Set BCRYPT_LOG_ROUNDS={} to use it; stored hashes are'.format(
+        rounds))
+    print('rehashed to the new cost as their users log in.')
+
+
+@manager.option(
+    '-s', '--scheduled', dest='scheduled', action='store_true',
+    help='Keep running, archiving every ARCHIVE_INTERVAL seconds')
+def archive(scheduled=False):
+    ''' Move rows inactive past ARCHIVE_RETENTION_DAYS to archive tables '''
+    while True:
+        archive_rows(
+            db.engine, db.metadata,
+            int(app.config['ARCHIVE_RETENTION_DAYS']),
+            int(app.config['ARCHIVE_BATCH_SIZE']))
+        if not scheduled:
+            break
+        time.sleep(float(app.config['ARCHIVE_INTERVAL']))
+
+
+@manager.option('-c', '--category', dest='category', required=True,
+                help='Service category of the number plan')
+@manager.option('-t', '--type', dest='number_type', default=None,
+                help='Number type of the number plan')
+@manager.option('-f', '--first', dest='first', type=int, required=True,
+                help='First number of the range')
+@manager.option('-l', '--last', dest='last', type=int, required=True,
+                help='Last number of the range')
+def open_numbers(category, number_type, first, last):
+    ''' Make a range of a number plan free for /numbering/allocate '''
+    NumberBlock.open(category, number_type, first, last)
+    BaseModel.commit()
+    for block in NumberBlock.plan(category, number_type).order_by(
+            NumberBlock.first_number):
+        print('free {}-{} ({} numbers)'.format(
+            block.first_number, block.last_number, block.size))
+
+
+@manager.command
+def parse_locations():
+    ''' Fill spectrum coordinates from locations saved before they existed '''
+    print('parsed {} spectrum records'.format(Spectrum.parse_locations()))
+
+
+@manager.command
+def create_generated_columns():
+    ''' Make the columns the models compute in the database generated '''
+    build_generated_columns(db.engine, db.metadata)
+
+
+@manager.command
+def create_extensions():
+    ''' Create the extensions the models' indexes and searches use '''
+    with db.engine.begin() as connection:
+        baseModel.create_extensions(connection)
+
+
+@manager.command
+def create_indexes():
+    ''' Build the models' indexes with CREATE INDEX CONCURRENTLY '''
+    build_indexes(db.engine, db.metadata)
+
+
+@manager.command
+def indexes():
+    ''' List unused and missing indexes from the pg_stat views '''
+    report = index_report(db.engine, db.metadata)
+    print('Unused indexes (never scanned since the last stats reset):')
+    for row in report['unused']:
+        print('  {table}.{index} ({size} bytes)'.format(**row))
+    missing = report['missing']
+    print('Declared indexes missing from the database:')
+    for row in missing['declared']:
+        print('  {table}.{index}'.format(**row))
+    print('Foreign keys without an index:')
+    for row in missing['foreign_keys']:
+        print('  {table}.{column}'.format(**row))
+    print('Tables read mostly by sequential scans:')
+    for row in missing['sequential_scans']:
+        print('  {table}: {seq_scan} seq / {idx_scan} index scans, '
+              '{seq_tup_read} rows read of {rows}'.format(**row))
+
 if __name__ == '__main__':
     manager.run()
@@ -1,11 +1,25 @@
 import unittest
 from tests.test_config import TestConfig
+from tests.test_query_plans import TestQueryPlans
 from tests.models.test_user import TestUserModel
 from tests.models.test_company import TestCompanyModel
+from tests.models.test_person import TestPersonModel
+from tests.models.test_number_block import TestNumberBlock
+from tests.models.test_numbering import TestNumberingModel
+from tests.models.test_spectrum import TestSpectrumModel
 from tests.api.v1.test_auth_endpoint import TestRegister, TestAuth
 from tests.api.v1.test_user_endpoint import TestUserEndpoint
 from tests.api.v1.test_company_endpoint import TestCompanyEndpoint
 from tests.api.v1.test_address_endpoint import TestAddressEndpoint
+from tests.utils.test_loading import TestLoaderPlan
+from tests.utils.test_serializers import TestCompiledSerializer
+from tests.utils.test_cache import TestResponseCache
+from tests.utils.test_hashing import TestPasswordHasher
+from tests.utils.test_indexes import TestIndexes
+from tests.utils.test_archive import TestArchive
+from tests.utils.test_number_index import TestNumberIndex
+from tests.utils.test_geo import TestGeo
+from tests.utils.test_analytics import TestSpectrumAnalytics
 
 if __name__ == "__main__":
     unittest.main()
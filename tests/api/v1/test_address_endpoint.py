@@ -33,7 +33,7 @@ class TestAddressEndpoint(BaseCase):
                                          headers=self.auth_headers())
             result = response.data.decode('utf-8')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(json.loads(result)), 6)
+        self.assertEqual(len(json.loads(result)), 7)
 
     def test_get_returns_one_address_if_id_is_specified(self):
         with self.app.app_context():
@@ -107,7 +107,7 @@ class TestAddressEndpoint(BaseCase):
         self.assertEqual(response.status_code, 200)
         expected_result = sorted(
             [
-                'data', 'next_page',
+                'data', 'next_page', 'count_strategy',
                 'page', 'per_page', 'total_data', 'pages', 'prev_page'])
         self.assertListEqual(sorted(result.keys()), expected_result)
         self.assertEqual(len(result.get('data')), 1)
@@ -1,6 +1,10 @@
 import json
 
+import bcrypt
+
 from tests.base_test import BaseCase
+from app.models.user import User
+from app.utils.hashing import hash_rounds
 
 class TestRegister(BaseCase):
     ''' A class of registration tests'''
@@ -66,4 +70,22 @@ class TestAuth(BaseCase):
         auth_response = self.client().post('/api/v1/auth/login', data=login_details)
         self.assertEqual(auth_response.status_code, 401)
         result = json.loads(auth_response.data.decode('utf-8'))
-        self.assertEqual(result['message'], 'Wrong password')
\ No newline at end of file
+        self.assertEqual(result['message'], 'Wrong password')
+
+    def test_login_rehashes_passwords_hashed_with_another_cost(self):
+        with self.app.app_context():
+            user = User.query.filter_by(email='pnyondo@andela.com').first()
+            user._password_hash = bcrypt.hashpw(
+                b'test', bcrypt.gensalt(5)).decode('utf-8')
+            user.save()
+        login_details = json.dumps(
+            dict(email='pnyondo@andela.com', password='test'))
+        auth_response = self.client().post(
+            '/api/v1/auth/login', data=login_details)
+        self.assertEqual(auth_response.status_code, 200)
+        with self.app.app_context():
+            user = User.query.filter_by(email='pnyondo@andela.com').first()
+            self.assertEqual(
+                hash_rounds(user._password_hash),
+                self.app.config['BCRYPT_LOG_ROUNDS'])
+            self.assertTrue(user.verify_password('test'))
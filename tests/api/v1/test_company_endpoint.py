@@ -1,7 +1,18 @@
 import json
+import threading
+import time
+
+from sqlalchemy import event
 
 from tests.base_test import BaseCase
+from app.models.baseModel import db, installed_extensions
+from app.models.address import Address
 from app.models.company import Company
+from app.models.contact_person import ContactPerson
+from app.models.person import Person
+from app.utils.counting import count_rows
+from app.utils.versions import shared_versions
+from instance.config import Config
 
 
 class TestCompanyEndpoint(BaseCase):
@@ -32,13 +43,85 @@ class TestCompanyEndpoint(BaseCase):
             'Company created successfully!',
             json.loads(response.data.decode('utf-8')).get('message'))
 
+    def test_post_companies_reuses_existing_records_in_one_commit(self):
+        self.company_data.update({
+            'address1': 'Plot 103 Kira Road',
+            'techPersonName': 'John Smith',
+            'techPersonEmail': 'test1@test.com',
+            'legalPersonName': 'Bjorn Smit',
+            'legalPersonEmail': 'test2@test.com'})
+        commits = []
+
+        def count_commit(session):
+            # Savepoints released along the way are not commits
+            if not session.transaction.nested:
+                commits.append(session)
+
+        with self.app.app_context():
+            headers = self.auth_headers()
+            event.listen(db.session, 'after_commit', count_commit)
+            try:
+                response = self.client().post(
+                    '/api/v1/companies',
+                    data=json.dumps(self.company_data),
+                    headers=headers)
+            finally:
+                event.remove(db.session, 'after_commit', count_commit)
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(commits), 1)
+            self.assertEqual(Address.query.count(), 2)
+            self.assertEqual(Person.query.count(), 2)
+            self.assertEqual(ContactPerson.query.count(), 2)
+            company = Company.query.filter_by(name='MOVERS').one()
+            self.assertEqual(company.tech_person.person.last_name, 'Smith')
+
+    def test_post_existing_company_conflicts_without_partial_rows(self):
+        self.company_data.update({'name': 'sample_1'})
+        with self.app.app_context():
+            response = self.client().post(
+                '/api/v1/companies',
+                data=json.dumps(self.company_data),
+                headers=self.auth_headers())
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(Address.query.filter_by(
+                address_line_1='Ggombe B, Wakiso').count(), 0)
+            self.assertEqual(Person.query.count(), 2)
+
+    def test_company_stored_by_a_concurrent_request_conflicts(self):
+        with self.app.app_context():
+            headers = self.auth_headers()
+            other = db.engine.connect()
+            storing = other.begin()
+            other.execute(
+                "INSERT INTO company (name, active) VALUES ('MOVERS', true)")
+            responses = []
+            poster = threading.Thread(target=lambda: responses.append(
+                self.client().post(
+                    '/api/v1/companies', data=json.dumps(self.company_data),
+                    headers=headers)))
+            poster.start()
+            try:
+                # Commit once the request's insert waits on the name
+                deadline = time.time() + 5
+                while time.time() < deadline and not db.engine.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE wait_event_type = 'Lock'").scalar():
+                    time.sleep(0.01)
+                storing.commit()
+            finally:
+                other.close()
+                poster.join(5)
+            self.assertEqual(responses[0].status_code, 409)
+            self.assertEqual(Address.query.filter_by(
+                address_line_1='Ggombe B, Wakiso').count(), 0)
+
     def test_get_returns_all_companies_for_user(self):
         with self.app.app_context():
             response = self.client().get('/api/v1/companies',
                                          headers=self.auth_headers())
             result = response.data.decode('utf-8')
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(json.loads(result)), 6)
+        self.assertEqual(len(json.loads(result)), 7)
 
     def test_get_returns_one_company_if_id_is_specified(self):
         with self.app.app_context():
@@ -91,6 +174,49 @@ class TestCompanyEndpoint(BaseCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(result), 2)
 
+    def test_search_requires_every_word_of_the_search_term(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies?q=2 sample',
+                                         headers=self.auth_headers())
+            no_words = self.client().get('/api/v1/companies?q=%26!',
+                                         headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8')).get('data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in result], ['sample_2'])
+        self.assertEqual(
+            json.loads(no_words.data.decode('utf-8')).get('data'), [])
+
+    def test_fuzzy_search_tolerates_misspelt_company_names(self):
+        with self.app.app_context():
+            if not db.session.execute(
+                    "SELECT 1 FROM pg_extension "
+                    "WHERE extname = 'pg_trgm'").scalar():
+                self.skipTest('pg_trgm is not available')
+            response = self.client().get(
+                '/api/v1/companies?q=sammple&match=fuzzy',
+                headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8')).get('data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(item['name'] for item in result),
+            ['sample_1', 'sample_2'])
+
+    def test_fuzzy_search_matches_substrings_without_pg_trgm(self):
+        installed_extensions['pg_trgm'] = False
+        self.addCleanup(installed_extensions.pop, 'pg_trgm', None)
+        with self.app.app_context():
+            response = self.client().get(
+                '/api/v1/companies?q=PLE_1&match=fuzzy',
+                headers=self.auth_headers())
+            wildcard = self.client().get(
+                '/api/v1/companies?q=%25&match=fuzzy',
+                headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8')).get('data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in result], ['sample_1'])
+        self.assertEqual(
+            json.loads(wildcard.data.decode('utf-8')).get('data'), [])
+
     def test_pagination_of_companies_when_you_pass_a_limit_parameter(self):
         with self.app.app_context():
             response = self.client().get('/api/v1/companies?limit=1',
@@ -100,7 +226,172 @@ class TestCompanyEndpoint(BaseCase):
         self.assertEqual(response.status_code, 200)
         expected_result = sorted(
             [
-                'data', 'next_page',
+                'data', 'next_page', 'count_strategy',
                 'page', 'per_page', 'total_data', 'pages', 'prev_page'])
         self.assertListEqual(sorted(result.keys()), expected_result)
         self.assertEqual(len(result.get('data')), 1)
+        self.assertEqual(result.get('count_strategy'), 'exact')
+
+    def test_pagination_rejects_page_and_limit_that_are_not_numbers(self):
+        for arguments in ('page=two', 'limit=ten', 'limit=0', 'page=-1'):
+            response = self.client().get(
+                '/api/v1/companies?{}'.format(arguments),
+                headers=self.auth_headers())
+            self.assertEqual(response.status_code, 400)
+
+    def test_cached_count_is_invalidated_when_a_company_is_saved(self):
+        with self.app.app_context():
+            response = self.client().get(
+                '/api/v1/companies?limit=1&count=cached',
+                headers=self.auth_headers())
+            result = json.loads(response.data.decode('utf-8'))
+            self.assertEqual(result.get('count_strategy'), 'cached')
+            self.assertEqual(result.get('total_data'), 2)
+
+            Company(name='sample_3').save()
+            response = self.client().get(
+                '/api/v1/companies?limit=1&count=cached',
+                headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result.get('total_data'), 3)
+
+    def test_cached_count_is_invalidated_by_another_worker(self):
+        with self.app.app_context():
+            self.assertEqual(count_rows(Company.query, 'cached'), 2)
+            # Written as another process would, unseen by this one's counters
+            db.session.execute(
+                "INSERT INTO company (name, active) VALUES ('sample_3', true)")
+            db.session.execute(
+                "UPDATE table_version SET version = version + 1 "
+                "WHERE name = 'company'")
+            db.session.commit()
+
+            shared_versions.ttl = 0
+            try:
+                self.assertEqual(count_rows(Company.query, 'cached'), 3)
+            finally:
+                shared_versions.ttl = float(Config.TABLE_VERSION_TTL)
+
+    def test_estimated_count_comes_from_the_query_planner(self):
+        with self.app.app_context():
+            response = self.client().get(
+                '/api/v1/companies?limit=1&count=estimate',
+                headers=self.auth_headers())
+            unknown = self.client().get(
+                '/api/v1/companies?limit=1&count=guess',
+                headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result.get('count_strategy'), 'estimate')
+        self.assertGreaterEqual(result.get('total_data'), 1)
+        self.assertEqual(unknown.status_code, 400)
+
+    def test_cursor_pagination_walks_companies_without_page_numbers(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies?limit=1&cursor=',
+                                         headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(result.get('data')), 1)
+        self.assertEqual(result['data'][0]['name'], 'sample_2')
+        self.assertNotIn('total_data', result)
+        self.assertIsNone(result.get('prev_cursor'))
+
+        with self.app.app_context():
+            response = self.client().get(
+                '/api/v1/companies?limit=1&cursor={}'.format(
+                    result['next_cursor']),
+                headers=self.auth_headers())
+        result = json.loads(response.data.decode('utf-8'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result['data'][0]['name'], 'sample_1')
+        self.assertIsNone(result.get('next_cursor'))
+        self.assertTrue(result.get('prev_cursor'))
+
+    def test_cursor_pagination_rejects_invalid_cursor(self):
+        with self.app.app_context():
+            response = self.client().get(
+                '/api/v1/companies?cursor=not-a-cursor&count=true',
+                headers=self.auth_headers())
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_streams_companies_as_ndjson(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies/export',
+                                         headers=self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        records = [
+            json.loads(line) for line in
+            response.data.decode('utf-8').splitlines()]
+        self.assertListEqual(
+            [record['name'] for record in records], ['sample_1', 'sample_2'])
+        self.assertEqual(records[0]['address']['district'], 'KLA')
+
+    def test_export_streams_companies_as_csv(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies/export?format=csv',
+                                         headers=self.auth_headers())
+        lines = response.data.decode('utf-8').splitlines()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('address.district', lines[0].split(','))
+        self.assertEqual(len(lines), 3)
+
+    def test_export_rejects_unknown_format(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies/export?format=xml',
+                                         headers=self.auth_headers())
+        self.assertEqual(response.status_code, 400)
+
+    def test_unchanged_company_is_not_modified_for_its_etag(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies/1',
+                                         headers=self.auth_headers())
+            etag = response.headers.get('ETag')
+            self.assertTrue(etag)
+            self.assertTrue(response.headers.get('Last-Modified'))
+
+            headers = self.auth_headers()
+            headers['If-None-Match'] = etag
+            cached = self.client().get('/api/v1/companies/1', headers=headers)
+            self.assertEqual(cached.status_code, 304)
+            self.assertEqual(cached.data, b'')
+
+            self.client().put('/api/v1/companies/1',
+                              data=json.dumps({'name': 'Bungee Jump'}),
+                              headers=self.auth_headers())
+            changed = self.client().get('/api/v1/companies/1', headers=headers)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers.get('ETag'), etag)
+
+    def test_unchanged_company_page_is_not_modified_for_its_etag(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies?limit=1',
+                                         headers=self.auth_headers())
+            headers = self.auth_headers()
+            headers['If-None-Match'] = response.headers.get('ETag')
+            cached = self.client().get('/api/v1/companies?limit=1',
+                                       headers=headers)
+            self.assertEqual(cached.status_code, 304)
+
+            Company(name='sample_3').save()
+            changed = self.client().get('/api/v1/companies?limit=1',
+                                        headers=headers)
+        self.assertEqual(changed.status_code, 200)
+
+    def test_company_page_ignores_if_modified_since(self):
+        with self.app.app_context():
+            response = self.client().get('/api/v1/companies',
+                                         headers=self.auth_headers())
+            self.assertIsNone(response.headers.get('Last-Modified'))
+
+            Company.query.get(2).delete_company()
+            headers = self.auth_headers()
+            headers['If-Modified-Since'] = 'Fri, 01 Jan 2100 00:00:00 GMT'
+            changed = self.client().get('/api/v1/companies', headers=headers)
+        self.assertEqual(changed.status_code, 200)
+        result = json.loads(changed.data.decode('utf-8'))
+        self.assertEqual(
+            [company['name'] for company in result['data']], ['sample_1'])
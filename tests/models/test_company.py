@@ -23,6 +23,39 @@ class TestCompanyModel(BaseCase):
             check = company.save_company()
         self.assertTrue(check, "Company should be added")
 
+    def test_added_company_is_loaded_from_its_inserted_row(self):
+        with self.app.app_context():
+            company = Company(name='Go hard or go home')
+            company.save_company()
+            self.assertIsNotNone(company.id)
+            self.assertTrue(isinstance(company.date_created, datetime))
+            self.assertTrue(company.active)
+
+    def test_add_company_with_existing_name_is_rejected(self):
+        with self.app.app_context():
+            check = Company(name='sample_1').save_company()
+            self.assertFalse(check, "Company with the same name exists")
+            self.assertEqual(
+                Company.query.filter_by(name='sample_1').count(), 1)
+
+    def test_queries_leave_out_inactive_companies_unless_asked(self):
+        with self.app.app_context():
+            Company.query.get(1).delete_company()
+            self.assertEqual(Company.query.count(), 1)
+            self.assertIsNone(Company.query.get(1))
+            self.assertIsNone(Company.query.filter_by(name='sample_1').first())
+
+            inactive = Company.query.filter_by(name='sample_1').\
+                with_inactive().one()
+            self.assertFalse(inactive.active)
+            self.assertEqual(Company.query.with_inactive().count(), 2)
+
+    def test_name_of_a_deleted_company_can_be_reused(self):
+        with self.app.app_context():
+            Company.query.get(1).delete_company()
+            check = Company(name='sample_1').save_company()
+        self.assertTrue(check, "Deleted companies release their name")
+
     def test_delete_company(self):
         with self.app.app_context():
             company = Company.query.filter_by(
@@ -0,0 +1,143 @@
+import json
+
+from tests.base_test import BaseCase
+from app.models.baseModel import BaseModel, db
+from app.models.number_block import NumberBlock
+from app.models.numbering import Numbering
+
+
+class TestNumberBlock(BaseCase):
+    ''' Tests for the number plan's free blocks and allocations '''
+
+    def setUp(self):
+        super(TestNumberBlock, self).setUp()
+        with self.app.app_context():
+            Numbering(
+                service_category='mobile', assigned_number=110,
+                assigned_range=10).save_numbering()
+            NumberBlock.open('mobile', None, 100, 199)
+            NumberBlock.open('mobile', None, 300, 304)
+            BaseModel.commit()
+
+    @staticmethod
+    def free_blocks():
+        ''' method to list the free blocks of the mobile plan '''
+        return [
+            (block.first_number, block.last_number) for block in
+            NumberBlock.plan('mobile', None).order_by(
+                NumberBlock.first_number)]
+
+    def test_open_leaves_out_assigned_numbers(self):
+        with self.app.app_context():
+            self.assertEqual(
+                self.free_blocks(), [(100, 109), (120, 199), (300, 304)])
+            self.assertTrue(NumberBlock.is_free('mobile', None, 120, 80))
+            self.assertFalse(NumberBlock.is_free('mobile', None, 105, 10))
+            self.assertEqual(NumberBlock.next_free('mobile', None, 6), 100)
+
+    def test_take_splits_the_block_it_uses(self):
+        with self.app.app_context():
+            self.assertEqual(NumberBlock.take('mobile', None, 5), 300)
+            self.assertEqual(NumberBlock.take('mobile', None, 1, 150), 150)
+            self.assertIsNone(NumberBlock.take('mobile', None, 10, 195))
+            BaseModel.commit()
+            self.assertEqual(
+                self.free_blocks(), [(100, 109), (120, 149), (151, 199)])
+
+    def test_take_skips_blocks_locked_by_other_allocations(self):
+        with self.app.app_context():
+            other = db.engine.connect()
+            locking = other.begin()
+            other.execute(
+                'SELECT * FROM number_block WHERE first_number = 300 '
+                'FOR UPDATE')
+            try:
+                self.assertEqual(NumberBlock.take('mobile', None, 5), 100)
+            finally:
+                locking.rollback()
+                other.close()
+
+    def test_saved_and_deleted_numbering_updates_the_free_blocks(self):
+        with self.app.app_context():
+            numbering = Numbering(
+                service_category='mobile', assigned_number=100,
+                assigned_range=5)
+            self.assertTrue(numbering.save_numbering())
+            self.assertEqual(
+                self.free_blocks(), [(105, 109), (120, 199), (300, 304)])
+            self.assertFalse(Numbering(
+                service_category='mobile', assigned_number=100,
+                assigned_range=5).save_numbering())
+            self.assertEqual(
+                self.free_blocks(), [(105, 109), (120, 199), (300, 304)])
+
+            self.assertTrue(numbering.delete_numbering())
+            self.assertEqual(
+                self.free_blocks(), [(100, 109), (120, 199), (300, 304)])
+
+    def test_take_skips_numbers_held_by_records(self):
+        with self.app.app_context():
+            # Written without save_numbering, so still in a free block
+            db.session.add(Numbering(
+                service_category='mobile', assigned_number=300,
+                assigned_range=2))
+            BaseModel.commit()
+            self.assertEqual(NumberBlock.take('mobile', None, 5), 100)
+            self.assertIsNone(NumberBlock.take('mobile', None, 1, 301))
+            BaseModel.commit()
+            self.assertEqual(
+                self.free_blocks(), [(105, 109), (120, 199), (302, 304)])
+
+    def test_allocate_endpoint_follows_assigned_and_deleted_numbers(self):
+        data = {
+            'serviceCategory': 'mobile', 'serviceProvider': '1',
+            'numberType': '', 'applicableServiceType': '',
+            'description': '', 'assignedRange': '5',
+            'assignedNumber': '100', 'assignmentDate': '',
+            'lastAuthRenewalDate': '', 'notes': '', 'recommendations': '',
+            'assignedBy': '', 'report': ''}
+        response = self.client().post(
+            '/api/v1/numbering', data=json.dumps(data),
+            content_type='application/json', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 201)
+
+        data = {'serviceCategory': 'mobile', 'size': 5, 'start': 100}
+        response = self.client().post(
+            '/api/v1/numbering/allocate', data=json.dumps(data),
+            content_type='application/json', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 409)
+        data = {'serviceCategory': 'mobile', 'size': 5}
+        response = self.client().post(
+            '/api/v1/numbering/allocate', data=json.dumps(data),
+            content_type='application/json', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 201)
+        allocated = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(allocated['assignedNumber'], 105)
+
+        response = self.client().delete(
+            '/api/v1/numbering/{}'.format(allocated['id']),
+            headers=self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        data = {'serviceCategory': 'mobile', 'size': 5, 'start': 105}
+        response = self.client().post(
+            '/api/v1/numbering/allocate', data=json.dumps(data),
+            content_type='application/json', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 201)
+
+    def test_allocate_endpoint_assigns_a_block(self):
+        data = {'serviceCategory': 'mobile', 'size': 8}
+        response = self.client().post(
+            '/api/v1/numbering/allocate', data=json.dumps(data),
+            content_type='application/json', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 201)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result['assignedNumber'], 100)
+        self.assertEqual(result['assignedRange'], 8)
+
+        data = {'serviceCategory': 'mobile', 'size': 500}
+        response = self.client().post(
+            '/api/v1/numbering/allocate', data=json.dumps(data),
+            content_type='application/json', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 409)
+        with self.app.app_context():
+            self.assertEqual(Numbering.query.count(), 2)
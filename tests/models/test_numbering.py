@@ -0,0 +1,78 @@
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+from tests.base_test import BaseCase
+from app.models.baseModel import db
+from app.models.numbering import Numbering
+from app.models.resource import ResourceMeta
+
+
+class TestNumberingModel(BaseCase):
+    ''' Tests for the blocks of numbers held by numbering records '''
+
+    def setUp(self):
+        super(TestNumberingModel, self).setUp()
+        with self.app.app_context():
+            Numbering(
+                service_category='mobile', assigned_number=1000,
+                assigned_range=100).save_numbering()
+
+    def numbering_data(self, number, size):
+        ''' method to build the body of a numbering POST '''
+        return {
+            'serviceCategory': 'mobile', 'serviceProvider': '1',
+            'numberType': 'geographic', 'applicableServiceType': 'voice',
+            'description': 'block', 'assignedRange': str(size),
+            'assignedNumber': str(number), 'assignmentDate': '',
+            'lastAuthRenewalDate': '', 'notes': 'none',
+            'recommendations': 'none', 'assignedBy': '', 'report': ''}
+
+    def test_overlapping_blocks_are_rejected(self):
+        with self.app.app_context():
+            with self.assertRaises(IntegrityError):
+                Numbering(
+                    service_category='mobile', assigned_number=1050,
+                    assigned_range=100).save()
+            db.session.rollback()
+            Numbering(
+                service_category='mobile',
+                assigned_number=1100).save_numbering()
+            self.assertEqual(Numbering.query.count(), 2)
+
+    def test_deleted_records_release_their_block(self):
+        with self.app.app_context():
+            Numbering.query.one().delete_numbering()
+            self.assertTrue(Numbering(
+                service_category='mobile', assigned_number=1010,
+                assigned_range=5).save_numbering())
+
+    def test_saving_writes_a_new_report_and_refers_to_it(self):
+        with self.app.app_context():
+            self.assertTrue(Numbering(
+                service_category='mobile', assigned_number=2000,
+                report=ResourceMeta.from_url(
+                    'https://files/report.pdf')).save_numbering())
+            self.assertFalse(Numbering(
+                service_category='mobile', assigned_number=2000,
+                report=ResourceMeta.from_url(
+                    'https://files/copy.pdf')).save_numbering())
+            db.session.remove()
+            numbering = Numbering.query.filter_by(
+                assigned_number=2000).one()
+            self.assertEqual(numbering.report.name, 'report.pdf')
+            self.assertEqual(ResourceMeta.query.count(), 1)
+
+    def test_post_names_the_overlapping_record(self):
+        response = self.post_data(
+            '/api/v1/numbering', self.numbering_data(1099, 2))
+        self.assertEqual(response.status_code, 409)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result['conflict'], 1)
+        self.assertEqual(
+            result['message'],
+            'Numbers 1099-1100 overlap numbering record 1 (mobile 1000-1099)')
+
+        response = self.post_data(
+            '/api/v1/numbering', self.numbering_data(1100, 2))
+        self.assertEqual(response.status_code, 201)
@@ -0,0 +1,35 @@
+from tests.base_test import BaseCase
+from app.models.baseModel import db
+from app.models.person import Person
+from app.utils.generated import build_generated_columns
+
+
+class TestPersonModel(BaseCase):
+    ''' Tests for the person model's stored full name '''
+
+    def test_full_name_is_stored_and_looked_up_by_the_database(self):
+        with self.app.app_context():
+            person = Person.query.filter_by(full_name='John Smith').one()
+            self.assertEqual(person.full_name, 'John Smith')
+
+            person.last_name = 'Smithson'
+            person.save()
+            self.assertEqual(person._full_name, 'John Smithson')
+            self.assertIsNone(
+                Person.query.filter_by(full_name='John Smith').first())
+
+    def test_plain_full_name_column_is_made_generated(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.execute(
+                'ALTER TABLE person DROP COLUMN full_name, '
+                'ADD COLUMN full_name VARCHAR(511)')
+            statements = []
+            build_generated_columns(
+                db.engine, db.metadata, echo=statements.append)
+            build_generated_columns(
+                db.engine, db.metadata, echo=statements.append)
+            full_names = [row[0] for row in db.engine.execute(
+                'SELECT full_name FROM person ORDER BY id')]
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(full_names, ['John Smith', 'Bjorn Smit'])
@@ -0,0 +1,88 @@
+import json
+
+from tests.base_test import BaseCase
+from app.models.company import Company
+from app.models.spectrum import Spectrum, SpectrumConflict
+
+
+class TestSpectrumModel(BaseCase):
+    ''' Tests for frequency conflicts between spectrum assignments '''
+
+    def setUp(self):
+        super(TestSpectrumModel, self).setUp()
+        with self.app.app_context():
+            Spectrum(
+                assigned_stl_frequency=7000, assigned_stl_power=10,
+                assigned_stl_location='Kololo',
+                applicant=Company.query.get(1)).save_spectrum()
+
+    def test_conflicts_are_found_within_the_guard_band_of_an_area(self):
+        with self.app.app_context():
+            self.assertEqual(
+                Spectrum.conflicting(7150, ' KOLOLO').count(), 1)
+            self.assertEqual(Spectrum.conflicting(7200, 'Kololo').count(), 0)
+            self.assertEqual(Spectrum.conflicting(7000, 'Ntinda').count(), 0)
+
+    def test_conflicting_assignments_are_not_saved(self):
+        with self.app.app_context():
+            spectrum = Spectrum(
+                assigned_stl_frequency=7100, assigned_stl_location='kololo',
+                applicant=Company.query.get(2))
+            with self.assertRaises(SpectrumConflict) as raised:
+                spectrum.save_spectrum()
+            self.assertEqual(raised.exception.conflicts, [1])
+            Spectrum.query.session.rollback()
+
+            with self.assertRaises(SpectrumConflict):
+                spectrum.save()
+            Spectrum.query.session.rollback()
+
+            spectrum.assigned_stl_frequency = 7200
+            self.assertTrue(spectrum.save_spectrum())
+
+    def test_check_endpoint_lists_conflicts(self):
+        response = self.post_data('/api/v1/spectrum/check', {
+            'authorizedStlFrequency': '6900',
+            'authorizedStlLocation': 'Kololo'})
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertFalse(result['clear'])
+        self.assertEqual(result['conflicts'][0]['applicant'], 'sample_1')
+        self.assertEqual(result['conflicts'][0]['separation'], 100)
+
+        response = self.post_data('/api/v1/spectrum/check', {
+            'authorizedStlFrequency': '6800',
+            'authorizedStlLocation': 'Kololo'})
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertTrue(result['clear'])
+
+    def test_near_finds_transmitters_within_the_radius(self):
+        with self.app.app_context():
+            for name, location in (
+                    ('kampala', 'Kampala 0.3476, 32.5825'),
+                    ('entebbe', 'Entebbe 0.0512, 32.4637'),
+                    ('jinja', 'Jinja 0.4479, 33.2026')):
+                Spectrum(
+                    authorized_transmit_location=location,
+                    assigned_stl_location=name,
+                    applicant=Company.query.get(1)).save_spectrum()
+
+            spectrum = Spectrum.query.filter_by(
+                assigned_stl_location='kampala').one()
+            self.assertEqual(
+                (spectrum.transmit_latitude, spectrum.transmit_longitude),
+                (0.3476, 32.5825))
+
+            near = Spectrum.near(Spectrum.query, 0.33, 32.58, 40).all()
+            self.assertEqual(
+                [row.assigned_stl_location for row in near],
+                ['kampala', 'entebbe'])
+
+        response = self.client().get(
+            '/api/v1/spectrum?near=0.45,33.2&radius_km=5')
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(
+            [row['assignedStlLocation'] for row in result['data']],
+            ['jinja'])
+        response = self.client().get('/api/v1/spectrum?near=north')
+        self.assertEqual(response.status_code, 400)
@@ -1,5 +1,10 @@
+from sqlalchemy import event
+
 from tests.base_test import BaseCase
-from app.models.user import User
+from app.models.baseModel import db
+from app.models.user import User, token_serializer, user_cache
+from app.utils.versions import shared_versions
+from instance.config import Config
 
 
 class TestUserModel(BaseCase):
@@ -59,4 +64,56 @@ class TestUserModel(BaseCase):
         self.assertFalse(
             verify_user,
             "User that is deleted should not be returned"
-        )
\ No newline at end of file
+        )
+
+    def test_cached_user_is_returned_without_a_query(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            user_cache.delete(1)
+            User.cached(1)
+            db.session.remove()
+            event.listen(
+                db.engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                user = User.cached(1)
+                email = user.email
+            finally:
+                event.remove(
+                    db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(statements, [])
+        self.assertEqual(email, 'emugaya@andela.com')
+
+    def test_delete_user_invalidates_the_cached_user(self):
+        with self.app.app_context():
+            user = User.cached(1)
+            self.assertTrue(user.delete_user())
+            self.assertIsNone(user_cache.get(1))
+            self.assertIsNone(User.cached(1))
+
+    def test_token_serializer_is_reused(self):
+        self.assertIs(token_serializer(), token_serializer())
+        self.assertIs(
+            token_serializer().make_signer(), token_serializer().make_signer())
+
+    def test_user_deleted_by_another_worker_is_not_cached(self):
+        with self.app.app_context():
+            self.assertTrue(User.cached(1))
+            # Written as another process would, unseen by this one's counters
+            db.session.execute(
+                'UPDATE "{}" SET active = false WHERE id = 1'.format(
+                    User.__tablename__))
+            db.session.execute(
+                "UPDATE table_version SET version = version + 1 "
+                "WHERE name = '{}'".format(User.__tablename__))
+            db.session.commit()
+
+            self.assertTrue(User.cached(1))
+            shared_versions.ttl = 0
+            try:
+                self.assertIsNone(User.cached(1))
+            finally:
+                shared_versions.ttl = float(Config.TABLE_VERSION_TTL)
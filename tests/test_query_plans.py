@@ -0,0 +1,174 @@
+import json
+import os
+
+from sqlalchemy import desc, event
+
+from tests.base_test import BaseCase
+from app.models.baseModel import db
+from app.models.address import Address
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.department import Department
+from app.models.employee import Employee
+from app.models.numbering import Numbering
+from app.models.person import Person
+from app.models.postal import Postal
+from app.models.resource import ResourceMeta
+from app.models.spectrum import Spectrum
+from app.models.telecom import Telecom
+from app.models.typeapproval import Typeapproval
+from app.utils.planner import query_plan
+
+# Estimated costs of the hot queries, rewritten with RECORD_QUERY_PLANS=1
+BASELINE = os.path.join(os.path.dirname(__file__), 'query_plans.json')
+# How far a cost may rise over its baseline before the guard fails
+TOLERANCE = 1.2
+ROWS = 5000
+
+# (table, columns, values, joins) for each table seeded with ROWS rows;
+# g is the row number and every searchable text holds the token x<g>;
+# rows are written in g order so the heap layout is the same whatever
+# plan the joins take
+SEED = [
+    ('address', 'address_line_1, district',
+     "'plot x' || g, 'district ' || g % 50", ''),
+    ('person', 'first_name, last_name', "'first', 'x' || g", ''),
+    ('contact', 'email', "'x' || g || '@example.com'", ''),
+    ('department', 'name', "'department x' || g", ''),
+    ('resource', 'name, location, version',
+     "'report' || g || '.pdf', '/reports', 1", ''),
+    ('contact_person', 'person_id, contact_id', 'p.id, c.id',
+     "JOIN person p ON p.last_name = 'x' || g "
+     "JOIN contact c ON c.email = 'x' || g || '@example.com'"),
+    ('company', 'name, address_id', "'company x' || g, a.id",
+     "JOIN address a ON a.address_line_1 = 'plot x' || g"),
+    ('employee', 'contact_person_id', 'cp.id',
+     "JOIN person p ON p.last_name = 'x' || g "
+     "JOIN contact_person cp ON cp.person_id = p.id"),
+    ('numbering', 'service_category, assigned_number, service_provider_id',
+     "'category x' || g, 1000000 + g, c.id",
+     "JOIN company c ON c.name = 'company x' || g"),
+    ('postal', 'call_sign', "'call x' || g", ''),
+    ('spectrum', 'band_of_operation, assigned_stl_location, applicant_id, '
+     'transmit_latitude, transmit_longitude',
+     "'band x' || g, 'stl ' || g, c.id, g % 100 * 0.01, 32 + g / 100 * 0.01",
+     "JOIN company c ON c.name = 'company x' || g"),
+    ('telecom', 'service_details', "'service x' || g", ''),
+    ('typeapproval', 'equipment_name, ta_unique_id, applicant_id',
+     "'equipment x' || g, 'TA' || g, c.id",
+     "JOIN company c ON c.name = 'company x' || g"),
+]
+
+# The model behind each namespace's endpoints
+MODELS = [
+    Address, Company, Contact, Department, Employee, Numbering, Person,
+    Postal, Spectrum, Telecom, Typeapproval]
+
+
+def plan_nodes(plan):
+    ''' Method to walk every node of a plan tree '''
+    yield plan
+    for child in plan.get('Plans', []):
+        for node in plan_nodes(child):
+            yield node
+
+
+class TestQueryPlans(BaseCase):
+    ''' Guards the plans of each namespace's hot queries.
+
+    The tables are seeded to a size where the planner prefers indexes,
+    then every hot query is explained. A sequential scan of a seeded
+    table, or an estimated cost past the recorded baseline, fails.
+    '''
+
+    def setUp(self):
+        super(TestQueryPlans, self).setUp()
+        with self.app.app_context():
+            for table, columns, values, joins in SEED:
+                db.session.execute(
+                    "INSERT INTO {0} ({1}, active, date_created, "
+                    "date_modified) SELECT {2}, g % 10 <> 0, "
+                    "now() - g * interval '1 minute', now() "
+                    "FROM generate_series(1, :rows) g {3} ORDER BY g".format(
+                        table, columns, values, joins),
+                    {'rows': ROWS})
+            db.session.commit()
+            db.session.execute('ANALYZE')
+            db.session.commit()
+
+    def explain_statement(self, callback):
+        ''' method to explain the last statement run by callback '''
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters,
+                                  *args):
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            callback()
+        finally:
+            event.remove(
+                db.engine, 'before_cursor_execute', before_cursor_execute)
+        statement, parameters = statements[-1]
+        cursor = db.session.connection().connection.cursor()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        return cursor.fetchone()[0][0]['Plan']
+
+    def hot_plans(self):
+        ''' method to explain the hot queries of every namespace '''
+        plans = {}
+        for model in MODELS:
+            name = model.__tablename__
+            row = model.query.order_by(
+                desc(model.date_created)).first()
+
+            plans[name + '.list'] = query_plan(
+                model.query.order_by(
+                    desc(model.date_created)).limit(20).offset(40))
+            plans[name + '.get'] = query_plan(
+                model.query.filter_by(id=row.id))
+            plans[name + '.exists'] = self.explain_statement(row.exists)
+            if model.__searchable__:
+                plans[name + '.search'] = query_plan(model.search(
+                    model.query, 'x4242').limit(20))
+
+        plans['person.full_name'] = query_plan(
+            Person.query.filter_by(full_name='first x4242'))
+        plans['resource.full_name'] = query_plan(
+            ResourceMeta.query.filter_by(full_name='/reports/report4242.pdf'))
+        plans['spectrum.conflicts'] = query_plan(
+            Spectrum.conflicting(7000, 'stl 4242'))
+        plans['spectrum.near'] = query_plan(Spectrum.near(
+            Spectrum.query, 0.5, 32.2, 2).limit(20))
+        return plans
+
+    def test_hot_queries_do_not_scan_large_tables(self):
+        seeded = {table for table, _, _, _ in SEED}
+        with self.app.app_context():
+            plans = self.hot_plans()
+        for name, plan in sorted(plans.items()):
+            scanned = [
+                node['Relation Name'] for node in plan_nodes(plan)
+                if node['Node Type'] == 'Seq Scan' and
+                node['Relation Name'] in seeded]
+            self.assertEqual(
+                scanned, [], '{} scans {}'.format(name, scanned))
+
+    def test_hot_query_costs_stay_within_baseline(self):
+        with self.app.app_context():
+            costs = {
+                name: plan['Total Cost']
+                for name, plan in self.hot_plans().items()}
+        if os.getenv('RECORD_QUERY_PLANS'):
+            with open(BASELINE, 'w') as baseline:
+                json.dump(costs, baseline, indent=2, sort_keys=True)
+                baseline.write('\n')
+        with open(BASELINE) as baseline:
+            recorded = json.load(baseline)
+        for name, cost in sorted(costs.items()):
+            self.assertIn(name, recorded, 'No baseline for ' + name)
+            self.assertLessEqual(
+                cost, recorded[name] * TOLERANCE,
+                '{} costs {} against a baseline of {}'.format(
+                    name, cost, recorded[name]))
@@ -0,0 +1,73 @@
+import json
+
+from tests.base_test import BaseCase
+from app.models.company import Company
+from app.models.spectrum import Spectrum
+from app.utils import analytics
+
+
+class TestSpectrumAnalytics(BaseCase):
+    ''' Tests for the band occupancy and interference of assignments '''
+
+    def setUp(self):
+        super(TestSpectrumAnalytics, self).setUp()
+        with self.app.app_context():
+            for frequency, band, location in (
+                    (7000, 'UHF', 'Kampala 0.3476, 32.5825'),
+                    (7100, 'UHF', 'Entebbe 0.0512, 32.4637'),
+                    (7150, 'uhf ', 'Jinja 0.4479, 33.2026'),
+                    (9000, 'SHF', 'Mbarara -0.6072, 30.6545')):
+                Spectrum(
+                    assigned_stl_frequency=frequency, assigned_stl_power=30,
+                    authorized_antenna_gain=20, authorized_antenna_height=30,
+                    band_of_operation=band, assigned_stl_location=location,
+                    applicant=Company.query.get(1)).save_spectrum()
+
+    def test_pairs_are_the_same_whatever_the_block_size(self):
+        with self.app.app_context():
+            assignments = analytics.load_assignments('UHF')
+            self.assertEqual(
+                list(assignments['frequency']), [7000, 7100, 7150])
+            found = [
+                analytics.interference(assignments, 200, -90, size, 10)
+                for size in (1, 2, 512)]
+        self.assertEqual(found[0], found[1])
+        self.assertEqual(found[0], found[2])
+
+        compared, interfering, pairs = found[0]
+        # Jinja is beyond the radio horizon of 30 m high antennas
+        self.assertEqual((compared, interfering), (3, 1))
+        first, second, separation, distance, margin = pairs[0]
+        self.assertEqual((first, second, separation), (1, 2, 100))
+        self.assertAlmostEqual(distance, 35.5, places=1)
+        self.assertLess(margin, 0)
+
+    def test_occupancy_endpoint_counts_assignments_per_bin(self):
+        response = self.client().get(
+            '/api/v1/spectrum/analytics/occupancy?band=uhf&width=100')
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(
+            [(row['start'], row['assignments']) for row in result['bins']],
+            [(7000, 1), (7100, 2)])
+        self.assertEqual(result['bins'][0]['peakEirp'], 50)
+        self.assertEqual(result['occupancy'], 1)
+
+        response = self.client().get(
+            '/api/v1/spectrum/analytics/occupancy?width=0.001')
+        self.assertEqual(response.status_code, 400)
+
+    def test_interference_endpoint_lists_the_worst_pairs(self):
+        response = self.client().get(
+            '/api/v1/spectrum/analytics/interference')
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result['assignments'], 4)
+        self.assertEqual(
+            [(pair['first'], pair['second']) for pair in result['pairs']],
+            [(1, 2)])
+
+        for limit in ('abc', '-1'):
+            response = self.client().get(
+                '/api/v1/spectrum/analytics/interference?limit=' + limit)
+            self.assertEqual(response.status_code, 400)
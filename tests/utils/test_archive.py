@@ -0,0 +1,75 @@
+import json
+
+from tests.base_test import BaseCase
+from app.models.baseModel import db
+from app.models.company import Company
+from app.models.numbering import Numbering
+from app.utils.archive import archive_rows
+
+
+class TestArchive(BaseCase):
+    ''' Tests for moving long inactive rows to the archive tables '''
+
+    def setUp(self):
+        super(TestArchive, self).setUp()
+        with self.app.app_context():
+            Numbering(
+                service_category='mobile', assigned_number=256700,
+                service_provider=Company.query.get(1)).save_numbering()
+            Company.query.get(1).delete_company()
+            Company.query.get(2).delete_company()
+            db.session.execute(
+                "UPDATE company SET date_modified = now() - interval "
+                "'100 days'")
+            db.session.commit()
+
+    def archive(self):
+        ''' method to archive rows inactive for 90 days, a row a batch '''
+        return archive_rows(
+            db.engine, db.metadata, 90, 1, echo=lambda message: None)
+
+    def test_rows_referenced_by_live_rows_stay(self):
+        with self.app.app_context():
+            moved = self.archive()
+            self.assertEqual(moved['company'], 1)
+            self.assertEqual(
+                [company.id for company in
+                 Company.query.with_inactive().all()], [1])
+            self.assertEqual(
+                db.session.execute(
+                    'SELECT id, name FROM company_archive').fetchall(),
+                [(2, 'sample_2')])
+
+    def test_archiving_resumes_in_batches(self):
+        with self.app.app_context():
+            numbering = Numbering.query.one()
+            numbering.delete_numbering()
+            db.session.execute(
+                "UPDATE numbering SET date_modified = now() - interval "
+                "'100 days'")
+            db.session.commit()
+            db.session.remove()
+
+            moved = self.archive()
+            self.assertEqual(moved, dict(company=2, numbering=1, spectrum=0))
+            self.assertEqual(Company.query.with_inactive().count(), 0)
+            self.assertEqual(self.archive()['company'], 0)
+
+    def test_archived_records_are_read_on_request(self):
+        with self.app.app_context():
+            self.archive()
+        response = self.client().get('/api/v1/companies/2')
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client().get(
+            '/api/v1/companies/2?include_archived=true')
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result['name'], 'sample_2')
+
+        response = self.client().get(
+            '/api/v1/companies?include_archived=true')
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(
+            [company['name'] for company in result['data']], ['sample_2'])
@@ -0,0 +1,83 @@
+import json
+
+from tests.base_test import BaseCase
+from app.models.baseModel import db
+from app.models.company import Company
+from app.utils.cache import response_cache
+from app.utils.lru import LRUCache
+from app.utils.versions import shared_versions
+from instance.config import Config
+
+
+class TestResponseCache(BaseCase):
+    ''' Tests for the write invalidated response cache '''
+
+    def get_companies(self):
+        ''' method to list companies through the API '''
+        return self.client().get('/api/v1/companies',
+                                 headers=self.auth_headers())
+
+    def test_repeated_get_is_served_from_the_cache(self):
+        with self.app.app_context():
+            first = self.get_companies()
+            second = self.get_companies()
+            stats = response_cache.stats()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.headers['ETag'], second.headers['ETag'])
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_saving_a_company_invalidates_cached_lists(self):
+        with self.app.app_context():
+            self.get_companies()
+            Company(name='sample_3').save()
+            response = self.get_companies()
+            stats = response_cache.stats()
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result.get('total_data'), 3)
+        self.assertEqual((stats['hits'], stats['misses']), (0, 2))
+
+    def test_lru_backend_evicts_least_recently_used_entries(self):
+        backend = LRUCache(2)
+        backend.set('a', '1')
+        backend.set('b', '2')
+        backend.get('a')
+        backend.set('c', '3')
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('a'), '1')
+        self.assertEqual(backend.evictions, 1)
+
+    def test_counters_are_exposed(self):
+        with self.app.app_context():
+            self.get_companies()
+            response = self.client().get('/api/v1/metrics/cache')
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(result.get('enabled'))
+        self.assertEqual(result.get('misses'), 1)
+        self.assertEqual(result.get('evictions'), 0)
+
+    def test_write_by_another_worker_invalidates_cached_lists(self):
+        worker = self.create_new_app()
+        headers = self.auth_headers()
+        with worker.app_context():
+            worker.test_client().get('/api/v1/companies', headers=headers)
+
+        # Written as another process would, unseen by this one's counters
+        with self.app.app_context():
+            db.session.execute(
+                "INSERT INTO company (name, active) VALUES ('sample_3', true)")
+            db.session.execute(
+                "UPDATE table_version SET version = version + 1 "
+                "WHERE name = 'company'")
+            db.session.commit()
+
+        shared_versions.ttl = 0
+        try:
+            with worker.app_context():
+                response = worker.test_client().get(
+                    '/api/v1/companies', headers=headers)
+        finally:
+            shared_versions.ttl = float(Config.TABLE_VERSION_TTL)
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(result.get('total_data'), 3)
@@ -0,0 +1,35 @@
+import unittest
+
+from app.utils.geo import bounding_box, parse_coordinates, parse_point
+
+
+class TestGeo(unittest.TestCase):
+    ''' Tests for reading coordinates out of location text '''
+
+    def test_coordinates_are_read_from_free_text(self):
+        self.assertEqual(
+            parse_coordinates('Kololo hill 0.3317, 32.5947'),
+            (0.3317, 32.5947))
+        self.assertEqual(
+            parse_coordinates('Mast at 1 S 36 E'), (-1.0, 36.0))
+        self.assertEqual(
+            parse_coordinates('Mbarara (-0.6072; 30.6545)'),
+            (-0.6072, 30.6545))
+
+    def test_addresses_are_not_taken_for_coordinates(self):
+        self.assertIsNone(parse_coordinates('Plot 12, 34 Kira Road'))
+        self.assertIsNone(parse_coordinates('123.45, 67.8'))
+        self.assertIsNone(parse_coordinates(None))
+
+    def test_points_are_validated(self):
+        self.assertEqual(parse_point('0.3,32.5'), (0.3, 32.5))
+        for text in ('0.3', '95,32', 'north,east'):
+            with self.assertRaises(ValueError):
+                parse_point(text)
+
+    def test_bounding_box_widens_away_from_the_equator(self):
+        south, west, north, east = bounding_box(0, 32, 111.19)
+        self.assertAlmostEqual(north - south, 2, places=3)
+        self.assertAlmostEqual(east - west, 2, places=3)
+        south, west, north, east = bounding_box(60, 32, 111.19)
+        self.assertAlmostEqual(east - west, 4, places=3)
@@ -0,0 +1,117 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+
+from tests.base_test import BaseCase
+from app.utils.hashing import (
+    HashingPoolBusy, PasswordHasher, calibrate, hash_rounds, hashing_bounds,
+    password_hasher)
+
+
+class TestPasswordHasher(BaseCase):
+    ''' Tests for the bounded password hashing pool '''
+
+    def setUp(self):
+        super(TestPasswordHasher, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.release = threading.Event()
+
+    def hold(self, hasher, jobs=1):
+        ''' method to run jobs on hasher in threads until released '''
+        for _ in range(jobs):
+            worker = threading.Thread(
+                target=hasher.run, args=(self.release.wait, 5))
+            worker.start()
+            self.addCleanup(worker.join)
+            self.addCleanup(self.release.set)
+
+    @staticmethod
+    def wait_for(condition):
+        ''' method to wait up to 5 seconds for condition to hold '''
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_pool_hashes_and_verifies_passwords(self):
+        hasher = PasswordHasher(1, 4, self.directory)
+        password_hash = hasher.hash('secret', 4)
+        self.assertTrue(hasher.verify(password_hash, 'secret'))
+        self.assertFalse(hasher.verify(password_hash, 'guess'))
+        stats = hasher.stats()
+        self.assertEqual(stats['jobs'], 3)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreaterEqual(stats['max_wait'], 0)
+
+    def test_full_queue_rejects_the_work_of_every_worker(self):
+        # Hashers sharing a lock directory, as the workers of a host do
+        first, second, third = [
+            PasswordHasher(1, 1, self.directory) for _ in range(3)]
+        self.hold(first)
+        self.assertTrue(self.wait_for(lambda: third.stats()['running'] == 1))
+        hashed = []
+        waiter = threading.Thread(
+            target=lambda: hashed.append(second.hash('secret', 4)))
+        waiter.start()
+        self.assertTrue(
+            self.wait_for(lambda: third.stats()['queue_depth'] == 1))
+
+        with self.assertRaises(HashingPoolBusy):
+            third.hash('secret', 4)
+        self.assertEqual(third.stats()['rejected'], 1)
+
+        self.release.set()
+        waiter.join(5)
+        self.assertTrue(third.verify(hashed[0], 'secret'))
+        self.assertEqual(second.stats()['max_queue_depth'], 1)
+
+    def test_login_is_turned_away_while_the_host_is_busy(self):
+        # Another worker's logins taking every slot and queue place
+        other = PasswordHasher(
+            password_hasher.workers, password_hasher.queue_limit,
+            password_hasher.directory)
+        self.hold(other, other.workers + other.queue_limit)
+        self.assertTrue(self.wait_for(
+            lambda: (password_hasher.stats()['running'],
+                     password_hasher.stats()['queue_depth']) ==
+            (other.workers, other.queue_limit)))
+
+        response = self.post_data('/api/v1/auth/login', {
+            'email': 'emugaya@andela.com', 'password': 'test'})
+        self.assertEqual(response.status_code, 503)
+        self.release.set()
+        response = self.post_data('/api/v1/auth/login', {
+            'email': 'emugaya@andela.com', 'password': 'test'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_hashes_never_hold_the_reserved_workers(self):
+        # One gunicorn worker, as by default, runs one hash and no queue
+        self.assertEqual(hashing_bounds(2, 16, 1, 1), (1, 0))
+        self.assertEqual(hashing_bounds(2, 16, 8, 2), (2, 4))
+        self.assertEqual(hashing_bounds(4, 1, 8, 2), (4, 1))
+        self.assertEqual(hashing_bounds(0, 16, 1, 1), (0, 16))
+
+    def test_calibration_picks_the_highest_cost_within_budget(self):
+        rounds, timings = calibrate(60000, max_rounds=6)
+        self.assertEqual(rounds, 6)
+        self.assertEqual(sorted(timings), [4, 5, 6])
+        rounds, timings = calibrate(0)
+        self.assertEqual(rounds, 4)
+        self.assertEqual(sorted(timings), [4])
+
+    def test_hash_rounds_reads_the_cost_of_a_hash(self):
+        hasher = PasswordHasher(0, 0, self.directory)
+        self.assertEqual(hash_rounds(hasher.hash('secret', 5)), 5)
+        self.assertIsNone(hash_rounds('not a hash'))
+
+    def test_login_is_counted_by_the_hashing_metrics(self):
+        with self.app.app_context():
+            self.auth_headers()
+            response = self.client().get('/api/v1/metrics/hashing')
+        result = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(result['jobs'], 1)
+        self.assertIn('average_wait', result)
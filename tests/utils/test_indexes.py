@@ -0,0 +1,72 @@
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table
+
+from tests.base_test import BaseCase
+from app.models.baseModel import db, needs_missing_extension
+from app.utils.indexes import build_indexes, concurrent_statements
+from app.utils.indexes import index_report
+
+
+class TestIndexes(BaseCase):
+    ''' Tests for the declared indexes and their online builder '''
+
+    def test_listing_indexes_are_partial_on_active_rows(self):
+        statements = dict(concurrent_statements(db.metadata))
+        self.assertEqual(
+            statements['ix_company_live'],
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_company_live '
+            'ON company (date_created, id) WHERE active')
+
+    def test_trigram_indexes_are_declared(self):
+        statements = dict(concurrent_statements(db.metadata))
+        self.assertEqual(
+            statements['ix_company_name_trgm'],
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_company_name_trgm '
+            'ON company USING gin (name gin_trgm_ops)')
+
+    def test_build_indexes_rebuilds_missing_and_skips_existing(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.execute('DROP INDEX ix_company_live')
+            report = index_report(db.engine, db.metadata)
+            self.assertIn(
+                dict(table='company', index='ix_company_live'),
+                report['missing']['declared'])
+
+            built = []
+            build_indexes(db.engine, db.metadata, echo=built.append)
+            report = index_report(db.engine, db.metadata)
+            # Only indexes needing an extension the server lacks are left
+            deferred = [
+                dict(table=table.name, index=index.name)
+                for table in db.metadata.sorted_tables
+                for index in sorted(
+                    table.indexes, key=lambda index: index.name)
+                if needs_missing_extension(index, db.engine)]
+        self.assertEqual(len(built), len(concurrent_statements(db.metadata)))
+        self.assertEqual(report['missing']['declared'], deferred)
+        self.assertEqual(report['missing']['foreign_keys'], [])
+
+    def test_build_indexes_skips_tables_and_columns_not_migrated(self):
+        # Models as they stand before `db migrate` adds their schema
+        metadata = MetaData()
+        Table(
+            'company', metadata, Column('id', Integer, primary_key=True),
+            Column('name', String(255)), Column('rating', Integer),
+            Index('ix_company_rating', 'rating'),
+            Index('ix_company_name_copy', 'name'))
+        Table(
+            'licence', metadata, Column('id', Integer, primary_key=True),
+            Column('number', Integer, index=True))
+        with self.app.app_context():
+            db.session.remove()
+            built = []
+            build_indexes(db.engine, metadata, echo=built.append)
+            existing = {row.indexname for row in db.engine.execute(
+                "SELECT indexname FROM pg_indexes")}
+        self.assertIn(
+            'skipping index ix_company_rating, its table is not migrated',
+            built)
+        self.assertIn(
+            'skipping index ix_licence_number, its table is not migrated',
+            built)
+        self.assertIn('ix_company_name_copy', existing)
@@ -0,0 +1,57 @@
+from flask_restplus import marshal
+from sqlalchemy import event
+
+from tests.base_test import BaseCase
+from app.models.baseModel import db
+from app.models.company import Company
+from app.api.v1.company import company_fields, company_loader
+
+
+class TestLoaderPlan(BaseCase):
+    ''' Tests for eager loading plans derived from fields models '''
+
+    def count_queries(self, callback):
+        ''' method to count the statements run by callback '''
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            callback()
+        finally:
+            event.remove(
+                db.engine, 'before_cursor_execute', before_cursor_execute)
+        return len(statements)
+
+    def test_plan_follows_nested_and_dotted_attributes(self):
+        with self.app.app_context():
+            chains = company_loader.relationship_paths()
+        self.assertListEqual(
+            chains,
+            [
+                ('address',),
+                ('legal_person', 'contact'),
+                ('legal_person', 'person'),
+                ('tech_person', 'contact'),
+                ('tech_person', 'person'),
+            ])
+
+    def test_marshalling_a_page_runs_a_single_query(self):
+        with self.app.app_context():
+            for index in range(5):
+                Company(
+                    name='loaded_{}'.format(index),
+                    address=self.address_1,
+                    legal_person=self.contact_person_1,
+                    tech_person=self.contact_person_2).save()
+            db.session.expire_all()
+
+            def list_companies():
+                companies = Company.query.options(
+                    *company_loader.options).filter_by(active=True).all()
+                self.assertEqual(len(companies), 7)
+                marshal(companies, company_fields)
+
+            self.assertEqual(self.count_queries(list_companies), 1)
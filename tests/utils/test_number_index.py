@@ -0,0 +1,90 @@
+import json
+
+from tests.base_test import BaseCase
+from app.models.baseModel import BaseModel, db
+from app.models.company import Company
+from app.models.numbering import Numbering
+from app.utils.number_index import NumberIndex, number_index
+
+
+class TestNumberIndex(BaseCase):
+    ''' Tests for the in-process index of who holds each number '''
+
+    def setUp(self):
+        super(TestNumberIndex, self).setUp()
+        number_index.reset()
+        with self.app.app_context():
+            Numbering(
+                service_category='mobile', assigned_number=25670000,
+                assigned_range=10000,
+                service_provider=Company.query.get(1)).save_numbering()
+            Numbering(
+                service_category='short code', assigned_number=100,
+                service_provider=Company.query.get(2)).save_numbering()
+
+    def test_lookup_finds_the_block_holding_each_number(self):
+        index = NumberIndex(ttl=60)
+        with self.app.app_context():
+            holders = index.lookup([25670000, 25679999, 25680000, 100, 99])
+        self.assertEqual(
+            [holder and holder[0] for holder in holders],
+            [25670000, 25670000, None, 100, None])
+        self.assertEqual(holders[3][3], 2)
+
+    def test_writes_are_picked_up_without_a_rebuild(self):
+        index = NumberIndex(ttl=60)
+        with self.app.app_context():
+            index.lookup([100])
+            Numbering.query.filter_by(
+                assigned_number=100).one().delete_numbering()
+            Numbering(
+                service_category='short code',
+                assigned_number=200).save_numbering()
+            self.assertEqual(index.lookup([100, 200])[1][0], 200)
+            self.assertIsNone(index.lookup([100])[0])
+
+            Numbering.query.filter_by(
+                assigned_number=200).one().delete_numbering(True)
+            self.assertIsNone(index.lookup([200])[0])
+        self.assertEqual((index.builds, index.updates), (2, 1))
+
+    def test_deleted_and_inserted_rows_leave_no_stale_holder(self):
+        index = NumberIndex(ttl=60)
+        with self.app.app_context():
+            index.lookup([100])
+            # A hard delete, and an insert from a transaction that took
+            # longer than SYNC_OVERLAP to commit, so the count is kept
+            db.session.add(Numbering(
+                service_category='short code', assigned_number=300))
+            db.session.flush()
+            db.session.execute(
+                "UPDATE numbering SET date_modified = "
+                "date_modified - interval '1 hour' "
+                "WHERE assigned_number = 300")
+            db.session.execute(
+                'DELETE FROM numbering WHERE assigned_number = 100')
+            BaseModel.commit()
+            holders = index.lookup([100, 300])
+        self.assertIsNone(holders[0])
+        self.assertEqual(holders[1][0], 300)
+        self.assertEqual(index.builds, 2)
+
+    def test_lookup_endpoint_answers_batches(self):
+        response = self.client().get(
+            '/api/v1/numbering/lookup?number=25675555,100&number=7')
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.data.decode('utf-8'))['data']
+        self.assertEqual(
+            result[0]['holder']['serviceProvider']['name'], 'sample_1')
+        self.assertEqual(result[1]['holder']['assignedNumber'], 100)
+        self.assertIsNone(result[2]['holder'])
+
+        response = self.post_data(
+            '/api/v1/numbering/lookup',
+            {'numbers': list(range(25670000, 25672000))})
+        result = json.loads(response.data.decode('utf-8'))['data']
+        self.assertEqual(len(result), 2000)
+        self.assertTrue(all(item['holder'] for item in result))
+
+        response = self.client().get('/api/v1/numbering/lookup?number=x')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,64 @@
+import timeit
+import unittest
+from datetime import datetime
+
+from flask_restplus import marshal
+
+from app.api.v1.company import company_fields, company_serializer
+from app.api.v1.spectrum import spectrum_fields, spectrum_serializer
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.contact_person import ContactPerson
+from app.models.employee import Employee
+from app.models.person import Person
+from app.models.resource import ResourceMeta
+from app.models.spectrum import Spectrum
+
+
+class TestCompiledSerializer(unittest.TestCase):
+    ''' Tests that compiled serializers match marshal, only faster '''
+
+    def setUp(self):
+        employee = Employee(contact_person=ContactPerson(
+            person=Person('John', 'Smith'),
+            contact=Contact(email='jsmith@test.com')))
+        applicant = Company(name='sample_1', tech_person=ContactPerson(
+            person=Person('Bjorn', 'Smit')))
+        self.spectrum = [
+            Spectrum(
+                id=index,
+                assigned_transmission_power=index,
+                authorized_antenna_gain=12,
+                authorized_transmit_location='Kampala',
+                assigned_stl_frequency=7000 + index,
+                tx_freq_assign_date=datetime(2018, 1, 1, 10, 30, index % 60),
+                band_of_operation='UHF',
+                authorized_by=employee,
+                report=ResourceMeta(name='report.pdf', location='/public'),
+                applicant=applicant,
+                date_created=datetime(2018, 1, 2, 8, 0, 0, 1000 + index))
+            for index in range(100)]
+        self.companies = [applicant, Company(name='sample_2')]
+
+    def test_output_matches_marshal(self):
+        self.assertEqual(
+            spectrum_serializer(self.spectrum),
+            marshal(self.spectrum, spectrum_fields))
+        self.assertEqual(
+            company_serializer(self.companies),
+            marshal(self.companies, company_fields))
+        self.assertEqual(
+            company_serializer(self.companies[0]),
+            marshal(self.companies[0], company_fields))
+
+    def test_compiled_serializer_is_faster_than_marshal(self):
+        marshalled = min(timeit.repeat(
+            lambda: marshal(self.spectrum, spectrum_fields),
+            number=5, repeat=5))
+        compiled = min(timeit.repeat(
+            lambda: spectrum_serializer(self.spectrum),
+            number=5, repeat=5))
+        self.assertLess(
+            compiled * 2, marshalled,
+            'Compiled serializer took {:.4f}s against {:.4f}s '
+            'for marshal'.format(compiled, marshalled))